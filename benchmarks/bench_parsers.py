@@ -0,0 +1,266 @@
+"""Measure parse throughput of the manufacturer parsers on saved HTML fixtures.
+
+Every parser runs on its fixture in benchmarks/fixtures with each available
+backend: the BeautifulSoup tree builders html.parser and lxml, selectolax for the
+row selection alone, and with --browser the in-page extraction in Chromium. Rows
+per second and peak Python memory are compared with benchmarks/baseline.json and
+the run fails when a parser falls more than the tolerance below its baseline.
+
+Rates are compared relative to a fixed calibration workload measured in the same
+run, so a slower or busier machine does not fail against a baseline recorded on
+a faster one.
+
+Examples:
+    uv run python -m benchmarks.bench_parsers
+    uv run python -m benchmarks.bench_parsers --browser --update-baseline
+"""
+
+import argparse
+import importlib.util
+import io
+import json
+import pathlib
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from manufacturers import get_plugin
+
+FIXTURES_PATH = pathlib.Path(__file__).parent / "fixtures"
+BASELINE_PATH = pathlib.Path(__file__).parent / "baseline.json"
+
+# Allowed drop of the relative rate below the baseline before the run fails;
+# shared CI runners still vary by a third between runs after normalization
+DEFAULT_TOLERANCE = 0.5
+
+# Every case first runs unmeasured for WARMUP_SECONDS, then repeats its parser
+# for ROUNDS rounds of at least ROUND_SECONDS each and keeps the fastest round,
+# which is least disturbed by other processes
+WARMUP_SECONDS = 0.5
+ROUNDS = 5
+ROUND_SECONDS = 0.2
+
+# Table parsed by the calibration workload, with BeautifulSoup's html.parser
+CALIBRATION_ROWS = 200
+CALIBRATION_HTML = (
+    "<table><tbody>"
+    + "<tr><td><a href='/p'>P-0505S</a></td><td>4.5-5.5 V</td><td>5 V</td></tr>"
+    * CALIBRATION_ROWS
+    + "</tbody></table>"
+)
+
+# Series row handed to the product page parsers
+SAMPLE_SERIES = {
+    "recom": {
+        "product_name": "R-78B",
+        "product_link": "fixture",
+        "power": "1.5 W",
+        "mounting_type": "THT",
+        "package_style": "SIP3",
+    },
+    "traco": {
+        "product_series": "TES 1",
+        "series_url": "fixture",
+        "series_power_variants": "1 W",
+    },
+    "xppower": {"productCode": "JCA", "url": "fixture", "power": "6 W"},
+}
+
+# BeautifulSoup tree builders and the module each one needs
+SOUP_BACKENDS = {"html.parser": "html.parser", "lxml": "lxml"}
+
+
+def is_installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def soup_parser(manufacturer: str, page: str, backend: str) -> Callable:
+    """Plugin parser using a BeautifulSoup tree builder"""
+    plugin = type(get_plugin(manufacturer))()
+    plugin.html_parser = backend
+    if page == "series":
+        return plugin.parse_series
+    series = pd.Series(SAMPLE_SERIES[manufacturer])
+    return lambda html: plugin.parse_series_page(html, series)
+
+
+def selectolax_parser(manufacturer: str, page: str) -> Callable:
+    """Tree building and row selection with selectolax, without field parsing"""
+    from selectolax.lexbor import LexborHTMLParser
+
+    plugin = get_plugin(manufacturer)
+    selector = (
+        plugin.series_selector
+        if page == "series"
+        else f"{plugin.product_selector} tbody tr"
+    )
+    return lambda html: LexborHTMLParser(html).css(selector)
+
+
+def browser_parser(manufacturer: str, page: str) -> Callable:
+    """Plugin scraper reading the DOM of the fixture loaded into Chromium"""
+    from shared.browser_pool import browser_pool
+    from shared.snapshots import SnapshotArchive, use_archive
+    from shared.storage import MemoryStorage
+
+    plugin = get_plugin(manufacturer)
+    storage = MemoryStorage()
+
+    def parse(html: str) -> List[dict]:
+        # The fixture is served as the replayed snapshot of its URL
+        digest = storage.save_cas(io.BytesIO(html.encode("utf-8")))
+        archive = SnapshotArchive(
+            storage, manufacturer, "benchmark", page, {"fixture": digest}
+        )
+        with use_archive(archive):
+            if page == "series":
+                return browser_pool.run(plugin.scrape_series("fixture"))
+            series = pd.Series(SAMPLE_SERIES[manufacturer])
+            return browser_pool.run(plugin.scrape_series_page(series))
+
+    return parse
+
+
+def parsers(manufacturer: str, page: str, browser: bool) -> Dict[str, Callable]:
+    """Parser per available backend of a manufacturer's page"""
+    backends = {}
+    if get_plugin(manufacturer).fetch_strategy == "browser":
+        if browser:
+            backends["chromium"] = browser_parser(manufacturer, page)
+    else:
+        for backend, module in SOUP_BACKENDS.items():
+            if is_installed(module):
+                backends[backend] = soup_parser(manufacturer, page, backend)
+    if is_installed("selectolax"):
+        backends["selectolax"] = selectolax_parser(manufacturer, page)
+    return backends
+
+
+def repeat_for(run: Callable[[], object], seconds: float) -> float:
+    """Runs per second of a function repeated for at least the given time"""
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        run()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return runs / elapsed
+
+
+def best_rate(run: Callable[[], object]) -> float:
+    """Runs per second of the fastest round, after a warmup"""
+    repeat_for(run, WARMUP_SECONDS)
+    return max(repeat_for(run, ROUND_SECONDS) for _ in range(ROUNDS))
+
+
+def calibrate() -> float:
+    """Rows per second of the calibration workload on this machine"""
+    from bs4 import BeautifulSoup
+
+    return CALIBRATION_ROWS * best_rate(
+        lambda: BeautifulSoup(CALIBRATION_HTML, "html.parser").select("tr")
+    )
+
+
+def measure(parse: Callable, html: str) -> dict:
+    """Rows per second and peak Python memory of a parser on one page
+
+    The calibration workload is measured right before the parser, so both
+    rates see the same load of the machine.
+    """
+    rows = len(parse(html))
+
+    tracemalloc.start()
+    parse(html)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    calibration = calibrate()
+    rows_per_second = rows * best_rate(lambda: parse(html))
+    return {
+        "rows": rows,
+        "rows_per_second": round(rows_per_second, 1),
+        "relative_rate": round(rows_per_second / calibration, 4),
+        "peak_memory_mb": round(peak_bytes / 1024 / 1024, 2),
+    }
+
+
+def run_benchmarks(browser: bool) -> Dict[str, dict]:
+    """Measure every fixture with every available backend"""
+    results = {}
+    for fixture in sorted(FIXTURES_PATH.glob("*/*.html")):
+        manufacturer, page = fixture.parent.name, fixture.stem
+        html = fixture.read_text(encoding="utf-8")
+        for backend, parse in parsers(manufacturer, page, browser).items():
+            results[f"{manufacturer}/{page}/{backend}"] = measure(parse, html)
+    return results
+
+
+def find_regressions(
+    results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float
+) -> List[str]:
+    """Cases whose relative throughput fell more than tolerance below the baseline"""
+    regressions = []
+    for case, result in results.items():
+        expected = baseline.get(case, {}).get("relative_rate")
+        if expected and result["relative_rate"] < expected * (1 - tolerance):
+            regressions.append(
+                f"{case}: {result['relative_rate']} x calibration, "
+                f"baseline {expected} x calibration"
+            )
+    return regressions
+
+
+def print_results(results: Dict[str, dict], baseline: Dict[str, dict]) -> None:
+    print(
+        f"{'case':<34}{'rows':>6}{'rows/s':>12}{'relative':>10}{'baseline':>10}"
+        f"{'peak MB':>9}"
+    )
+    for case, result in results.items():
+        expected = baseline.get(case, {}).get("relative_rate", "-")
+        print(
+            f"{case:<34}{result['rows']:>6}{result['rows_per_second']:>12}"
+            f"{result['relative_rate']:>10}{expected:>10}{result['peak_memory_mb']:>9}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--browser",
+        action="store_true",
+        help="Also measure parsers reading the DOM in Chromium",
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store the measured throughput as the new baseline",
+    )
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if BASELINE_PATH.exists():
+        baseline = json.loads(BASELINE_PATH.read_text())
+
+    results = run_benchmarks(args.browser)
+    print_results(results, baseline)
+
+    if args.update_baseline:
+        baseline.update(results)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
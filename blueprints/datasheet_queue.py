@@ -0,0 +1,313 @@
+import logging
+import io
+import json
+from datetime import datetime, timezone
+from typing import List
+import azure.functions as func
+import pandas as pd
+from shared.downloader import normalize_url
+from shared.environment import AzureEnvironment
+from shared.manifest import write_manifest, digest_bytes, digest_mutable_data
+from shared.payload import pack_payload
+from shared.telemetry import track_activity
+from blueprints.pdf_handler import DATASHEET_COLUMNS, extract_pdf_text, fetch_datasheet
+
+# Create blueprint instance
+bp = func.Blueprint()
+
+# Queue with one message per datasheet; after maxDequeueCount failed attempts
+# (host.json) the runtime moves a message to the poison queue
+DATASHEET_QUEUE_NAME = "datasheets"
+DATASHEET_POISON_QUEUE_NAME = f"{DATASHEET_QUEUE_NAME}-poison"
+
+
+def item_prefix(product_type: str, batch_id: str) -> str:
+    """Prefix of the per-datasheet result records of a batch"""
+    return f"items/{product_type}/{batch_id}/"
+
+
+def write_item_record(message: dict, record: dict) -> None:
+    """Store the result of one datasheet work item"""
+    env = AzureEnvironment()
+    file_name = digest_bytes(message["datasheet_link"].encode("utf-8")) + ".json"
+    env.storage.save_json(
+        f"{message['manufacturer']}4_extract_pdf_data",
+        item_prefix(message["product_type"], message["batch_id"]) + file_name,
+        {
+            "datasheet_url": message["datasheet_link"],
+            "product_codes": message["product_codes"],
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            **record,
+        },
+    )
+
+
+# --------------- Enqueue Datasheets Activity Function ---------------
+@bp.queue_output(
+    arg_name="messages",
+    queue_name=DATASHEET_QUEUE_NAME,
+    connection="AzureWebJobsStorage",
+)
+@bp.activity_trigger(input_name="input")
+@track_activity(items_key="total")
+def enqueue_datasheets(input: dict, messages: func.Out[List[str]]) -> dict:
+    """Activity function to queue one work item per datasheet"""
+    try:
+        # Get parameters
+        manufacturer = input.get("manufacturer", "recom")
+        product_type = input.get("product_type", "dc-dc-converters")
+        batch_id = input["batch_id"]
+
+        # Initialize environment
+        env = AzureEnvironment()
+
+        # Load products data with datasheet links
+        products_df = env.storage.load_df(
+            f"{manufacturer}2_scrape_products", f"{product_type}.csv"
+        )
+        products_df = products_df[
+            products_df["datasheet_link"].notna()
+            & (products_df["datasheet_link"] != "")
+        ]
+
+        # One message per normalized datasheet URL, listing the products it
+        # covers; record names are unique per URL
+        products_df = products_df.drop_duplicates(subset="product_code")
+        product_codes = products_df.groupby(
+            products_df["datasheet_link"].astype(str).map(normalize_url), sort=False
+        )["product_code"].apply(list)
+        messages.set(
+            [
+                json.dumps(
+                    {
+                        "manufacturer": manufacturer,
+                        "product_type": product_type,
+                        "batch_id": batch_id,
+                        "product_codes": codes,
+                        "datasheet_link": url,
+                    }
+                )
+                for url, codes in product_codes.items()
+            ]
+        )
+
+        return {
+            "success": True,
+            "manufacturer": manufacturer,
+            "product_type": product_type,
+            "batch_id": batch_id,
+            "total": len(product_codes),
+        }
+    except Exception as e:
+        logging.error(f"Error in enqueue_datasheets: {str(e)}")
+        return {
+            "success": False,
+            "error": str(e),
+            "manufacturer": input.get("manufacturer", "recom"),
+            "product_type": input.get("product_type", "dc-dc-converters"),
+        }
+
+
+# --------------- Process Datasheet Queue Function ---------------
+@bp.queue_trigger(
+    arg_name="msg", queue_name=DATASHEET_QUEUE_NAME, connection="AzureWebJobsStorage"
+)
+def process_datasheet(msg: func.QueueMessage):
+    """Queue trigger function downloading and extracting a single datasheet"""
+    message = json.loads(msg.get_body().decode("utf-8"))
+    logging.info(f"Processing datasheet {message['datasheet_link']}")
+
+    env = AzureEnvironment()
+
+    # Download errors raise, so the message is retried and finally poisoned
+    content = fetch_datasheet(message["datasheet_link"])
+    pdf_digest = env.storage.save_cas(io.BytesIO(content))
+
+    try:
+        text = extract_pdf_text(content)
+    except Exception as e:
+        # Unreadable PDFs do not get better on retry
+        logging.warning(f"Error extracting text of {message['datasheet_link']}: {e}")
+        write_item_record(
+            message, {"state": "failed", "pdf_digest": pdf_digest, "error": str(e)}
+        )
+        return
+
+    write_item_record(
+        message,
+        {
+            "state": "done",
+            "pdf_digest": pdf_digest,
+            "extracted_text": text,
+        },
+    )
+
+
+# --------------- Poison Datasheet Queue Function ---------------
+@bp.queue_trigger(
+    arg_name="msg",
+    queue_name=DATASHEET_POISON_QUEUE_NAME,
+    connection="AzureWebJobsStorage",
+)
+def record_poison_datasheet(msg: func.QueueMessage):
+    """Queue trigger function recording datasheets that failed every attempt"""
+    message = json.loads(msg.get_body().decode("utf-8"))
+    logging.warning(f"Datasheet {message['datasheet_link']} failed all retries")
+    write_item_record(
+        message,
+        {"state": "failed", "error": "Failed after all retries"},
+    )
+
+
+# --------------- Check Datasheet Batch Activity Function ---------------
+@bp.activity_trigger(input_name="input")
+def check_datasheet_batch(input: dict) -> dict:
+    """Activity function to count the finished work items of a batch"""
+    try:
+        # Get parameters
+        manufacturer = input.get("manufacturer", "recom")
+        product_type = input.get("product_type", "dc-dc-converters")
+        batch_id = input["batch_id"]
+        total = input["total"]
+
+        # Initialize environment
+        env = AzureEnvironment()
+
+        finished = len(
+            env.storage.list_files(
+                f"{manufacturer}4_extract_pdf_data",
+                item_prefix(product_type, batch_id),
+            )
+        )
+
+        return {
+            "success": True,
+            "manufacturer": manufacturer,
+            "product_type": product_type,
+            "batch_id": batch_id,
+            "total": total,
+            "finished": finished,
+            "pending": max(0, total - finished),
+        }
+    except Exception as e:
+        logging.error(f"Error in check_datasheet_batch: {str(e)}")
+        return {
+            "success": False,
+            "error": str(e),
+            "manufacturer": input.get("manufacturer", "recom"),
+            "product_type": input.get("product_type", "dc-dc-converters"),
+        }
+
+
+# --------------- Merge Datasheet Batch Activity Function ---------------
+@bp.activity_trigger(input_name="input")
+@track_activity(items_key="processed_pdfs")
+def merge_datasheet_batch(input: dict) -> dict:
+    """Activity function to combine the work items of a batch into step outputs"""
+    try:
+        # Get parameters
+        manufacturer = input.get("manufacturer", "recom")
+        product_type = input.get("product_type", "dc-dc-converters")
+        batch_id = input["batch_id"]
+        total = input["total"]
+
+        # Initialize environment
+        env = AzureEnvironment()
+
+        step_name = f"{manufacturer}4_extract_pdf_data"
+        records = [
+            env.storage.load_json(step_name, record_file)
+            for record_file in env.storage.list_files(
+                step_name, item_prefix(product_type, batch_id)
+            )
+        ]
+        done = [record for record in records if record["state"] == "done"]
+        failed = [
+            {"product_code": product_code, "error": record.get("error")}
+            for record in records
+            if record["state"] != "done"
+            for product_code in record["product_codes"]
+        ]
+
+        # Datasheets without a record when the batch timed out are still queued;
+        # the steps stay incomplete so the next run queues them again
+        pending = max(0, total - len(records))
+
+        # PDFs live in the CAS, so the download step records the product to
+        # document table
+        downloaded = [record for record in records if record.get("pdf_digest")]
+        pdf_step_name = f"{manufacturer}3_download_pdfs"
+        datasheets_df = pd.DataFrame(
+            [
+                {
+                    "product_code": product_code,
+                    "datasheet_url": record["datasheet_url"],
+                    "pdf_digest": record["pdf_digest"],
+                }
+                for record in downloaded
+                for product_code in record["product_codes"]
+            ],
+            columns=DATASHEET_COLUMNS,
+        )
+        file_name = f"{product_type}.csv"
+        env.storage.save_df(pdf_step_name, file_name, datasheets_df)
+        write_manifest(
+            env.storage,
+            manufacturer,
+            product_type,
+            "download_pdfs",
+            {file_name: digest_mutable_data(env.storage, pdf_step_name, file_name)},
+            complete=not pending and len(downloaded) == len(records),
+        )
+
+        df = pd.DataFrame(
+            [
+                {
+                    "pdf_digest": record["pdf_digest"],
+                    "datasheet_url": record["datasheet_url"],
+                    "extracted_text": record["extracted_text"],
+                }
+                for record in done
+            ],
+            columns=["pdf_digest", "datasheet_url", "extracted_text"],
+        ).drop_duplicates(subset="pdf_digest")
+        file_name = f"{product_type}.csv"
+        env.storage.save_df(step_name, file_name, df)
+        write_manifest(
+            env.storage,
+            manufacturer,
+            product_type,
+            "extract_pdf_data",
+            {file_name: digest_mutable_data(env.storage, step_name, file_name)},
+            complete=not pending and not failed,
+        )
+
+        if not done:
+            return {
+                "success": False,
+                "error": "No data extracted from PDFs",
+                "manufacturer": manufacturer,
+                "product_type": product_type,
+            }
+
+        return {
+            "success": True,
+            "manufacturer": manufacturer,
+            "product_type": product_type,
+            "batch_id": batch_id,
+            "downloaded": len(downloaded),
+            "processed_pdfs": len(df),
+            "failures": len(failed),
+            "pending": pending,
+            "failed_products": pack_payload(env.storage, failed, count=len(failed)),
+            "step_name": step_name,
+            "file_name": file_name,
+        }
+    except Exception as e:
+        logging.error(f"Error in merge_datasheet_batch: {str(e)}")
+        return {
+            "success": False,
+            "error": str(e),
+            "manufacturer": input.get("manufacturer", "recom"),
+            "product_type": input.get("product_type", "dc-dc-converters"),
+        }
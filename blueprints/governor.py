@@ -0,0 +1,17 @@
+import azure.durable_functions as df
+import azure.functions as func
+from shared.governor import governor_entity_operation
+
+# Create blueprint instance
+bp = func.Blueprint()
+
+
+# --------------- Host Governor Entity Function ---------------
+@bp.entity_trigger(context_name="context")
+def host_governor(context: df.DurableEntityContext):
+    """Entity sharing the outbound request limits of every host across activities"""
+    state, result = governor_entity_operation(
+        context.get_state(dict), context.operation_name, context.get_input()
+    )
+    context.set_state(state)
+    context.set_result(result)
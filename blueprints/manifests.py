@@ -0,0 +1,42 @@
+import logging
+import azure.functions as func
+from shared.environment import AzureEnvironment
+from shared.manifest import is_up_to_date, load_manifest
+
+# Create blueprint instance
+bp = func.Blueprint()
+
+
+# --------------- Check Step Manifest Activity Function ---------------
+@bp.activity_trigger(input_name="input")
+def check_step_manifest(input: dict) -> dict:
+    """Activity function to check whether a step can be skipped"""
+    try:
+        # Get parameters
+        manufacturer = input.get("manufacturer", "recom")
+        product_type = input.get("product_type", "dc-dc-converters")
+        step = input["step"]
+
+        # Initialize environment
+        env = AzureEnvironment()
+
+        up_to_date = is_up_to_date(env.storage, manufacturer, product_type, step)
+        manifest = load_manifest(env.storage, manufacturer, product_type, step)
+
+        return {
+            "success": True,
+            "skipped": up_to_date,
+            "manufacturer": manufacturer,
+            "product_type": product_type,
+            "step": step,
+            "manifest_updated_at": manifest["updated_at"] if manifest else None,
+        }
+    except Exception as e:
+        logging.error(f"Error in check_step_manifest: {str(e)}")
+        return {
+            "success": False,
+            "skipped": False,
+            "error": str(e),
+            "manufacturer": input.get("manufacturer", "recom"),
+            "product_type": input.get("product_type", "dc-dc-converters"),
+        }
@@ -1,66 +1,758 @@
+from datetime import timedelta
+from typing import Optional
 import azure.functions as func
 import azure.durable_functions as df
+from shared.governor import GOVERNOR_ENTITY_NAME, combine_host_reports
+from shared.progress import PipelineProgress
+from shared.singleton import (
+    CONFIG_EVENT,
+    DEBOUNCE_SECONDS,
+    DEFAULT_DATASHEET_POLL_SECONDS,
+    DEFAULT_DATASHEET_TIMEOUT_SECONDS,
+    DEFAULT_MAX_CONCURRENT_SHARDS,
+    MAX_DEBOUNCE_SECONDS,
+    merge_orchestrator_inputs,
+    pipeline_chains,
+)
+from shared.telemetry import collect_metrics, combine_metrics
 
 # Create blueprint instance
 bp = func.Blueprint()
 
+# Steps run per series shard in streaming mode
+STREAMED_STEPS = ["scrape_products", "download_pdfs", "extract_pdf_data"]
+
+# Steps run as per-datasheet queue messages in queue mode
+QUEUED_STEPS = ["download_pdfs", "extract_pdf_data"]
+
+# Activities retried after a host recycle or timeout, resuming from their crawl
+# checkpoint
+CHECKPOINTED_ACTIVITIES = {"scrape_products", "scrape_products_shard"}
+CHECKPOINT_RETRY_OPTIONS = df.RetryOptions(
+    first_retry_interval_in_milliseconds=30000, max_number_of_attempts=3
+)
+
+
+# Steps sending requests to manufacturer hosts; they start from the outbound
+# limits the host_governor entity learned from earlier activities
+GOVERNED_STEPS = {"scrape_series", "scrape_products", "download_pdfs"}
+GOVERNOR_ENTITY_ID = df.EntityId(GOVERNOR_ENTITY_NAME, "outbound")
+
+
+def with_host_limits(context: df.DurableOrchestrationContext, activity_input: dict):
+    """Activity input carrying the outbound limits shared by all activities"""
+    host_limits = yield context.call_entity(GOVERNOR_ENTITY_ID, "get")
+    return {**activity_input, "host_limits": host_limits or {}}
+
+
+def report_host_stats(context: df.DurableOrchestrationContext, results) -> None:
+    """Merge the host reports of finished activities into the shared limits"""
+    host_reports = combine_host_reports(results)
+    if host_reports:
+        context.signal_entity(GOVERNOR_ENTITY_ID, "report", host_reports)
+
+
+def call_step_activity(
+    context: df.DurableOrchestrationContext, name: str, activity_input: dict
+):
+    """Call an activity, with retries for the ones that resume from checkpoints"""
+    if name in CHECKPOINTED_ACTIVITIES:
+        return context.call_activity_with_retry(
+            name, CHECKPOINT_RETRY_OPTIONS, activity_input
+        )
+    return context.call_activity(name, activity_input)
+
+
+def plan_shards(
+    context: df.DurableOrchestrationContext, activity_input: dict, options: dict
+):
+    """Split the series list of a chain into shards"""
+    plan_input = dict(activity_input)
+    if options.get("product_shard_size"):
+        plan_input["shard_size"] = options["product_shard_size"]
+
+    plan = yield context.call_activity("plan_product_shards", plan_input)
+    if plan.get("success"):
+        # Shard ranges are derived here, so only two counters cross the history
+        series_count = plan["series_count"]
+        shard_size = plan["shard_size"]
+        plan["shards"] = [
+            {
+                "shard_index": shard_index,
+                "series_start": series_start,
+                "series_stop": min(series_start + shard_size, series_count),
+            }
+            for shard_index, series_start in enumerate(
+                range(0, series_count, shard_size)
+            )
+        ]
+    return plan
+
+
+def run_bounded(
+    context: df.DurableOrchestrationContext,
+    create_task,
+    items,
+    options,
+    on_finished=None,
+):
+    """Run one task per item, with at most max_concurrent_shards running at once
+
+    on_finished(item, result) is called as each task completes, e.g. to publish
+    progress.
+    """
+    max_concurrent = max(
+        1, options.get("max_concurrent_shards", DEFAULT_MAX_CONCURRENT_SHARDS)
+    )
+
+    # Sliding window: start a new task whenever a running one finishes
+    tasks: list = []
+    running: list = []
+    for item in items:
+        if len(running) >= max_concurrent:
+            finished = yield context.task_any(running)
+            running.remove(finished)
+            if on_finished:
+                on_finished(items[tasks.index(finished)], finished.result)
+        task = create_task(item)
+        tasks.append(task)
+        running.append(task)
+
+    if running:
+        yield context.task_all(running)
+        if on_finished:
+            for task in running:
+                on_finished(items[tasks.index(task)], task.result)
+
+    return [task.result for task in tasks]
+
+
+def run_product_shards(
+    context: df.DurableOrchestrationContext,
+    activity_input: dict,
+    options: dict,
+    progress: PipelineProgress,
+):
+    """Scrape products in series shards with bounded parallelism and merge them"""
+    manufacturer = activity_input["manufacturer"]
+    product_type = activity_input["product_type"]
+
+    plan = yield from plan_shards(context, activity_input, options)
+    if not plan.get("success"):
+        return plan
+    progress.add_counts(
+        manufacturer, product_type, "scrape_products", series_total=plan["series_count"]
+    )
+
+    shard_results = yield from run_bounded(
+        context,
+        lambda shard: call_step_activity(
+            context, "scrape_products_shard", {**activity_input, **shard}
+        ),
+        plan["shards"],
+        options,
+        lambda shard, result: progress.add_counts(
+            manufacturer,
+            product_type,
+            "scrape_products",
+            series_done=shard["series_stop"] - shard["series_start"],
+        ),
+    )
+    report_host_stats(context, shard_results)
+    failed_shards = [
+        result.get("shard_index") for result in shard_results if not result["success"]
+    ]
+
+    merge_result = yield context.call_activity(
+        "merge_product_shards",
+        {
+            **activity_input,
+            "shard_indexes": [
+                result["shard_index"] for result in shard_results if result["success"]
+            ],
+            "failed_shards": failed_shards,
+            "failed_series": [
+                series_name
+                for result in shard_results
+                for series_name in result.get("failed_series", [])
+            ],
+        },
+    )
+    merge_result["failed_shards"] = failed_shards
+
+    # Account planning, shard and merge calls to the scrape_products stage
+    merge_result["metrics"] = combine_metrics(
+        "scrape_products",
+        [plan.get("metrics"), merge_result.get("metrics")]
+        + [result.get("metrics") for result in shard_results],
+        items=merge_result.get("count"),
+    )
+    return merge_result
+
+
+def run_streaming_shards(
+    context: df.DurableOrchestrationContext,
+    activity_input: dict,
+    options: dict,
+    progress: PipelineProgress,
+):
+    """Scrape, download and extract each series shard as soon as it is ready"""
+    manufacturer = activity_input["manufacturer"]
+    product_type = activity_input["product_type"]
+
+    plan = yield from plan_shards(context, activity_input, options)
+    if not plan.get("success"):
+        return plan, plan, plan
+    for step in STREAMED_STEPS:
+        progress.add_counts(
+            manufacturer, product_type, step, series_total=plan["series_count"]
+        )
+
+    def on_shard_finished(shard: dict, result: dict):
+        series_done = shard["series_stop"] - shard["series_start"]
+        progress.add_counts(
+            manufacturer, product_type, "scrape_products", series_done=series_done
+        )
+        progress.add_counts(
+            manufacturer,
+            product_type,
+            "download_pdfs",
+            series_done=series_done,
+            downloaded=result.get("pdfs", {}).get("downloaded"),
+        )
+        progress.add_counts(
+            manufacturer,
+            product_type,
+            "extract_pdf_data",
+            series_done=series_done,
+            processed_pdfs=result.get("extracted", {}).get("processed_pdfs"),
+        )
+
+    # One sub-orchestration per shard, so shards overlap across the three stages
+    shard_results = yield from run_bounded(
+        context,
+        lambda shard: context.call_sub_orchestrator(
+            "product_shard_orchestrator",
+            {**activity_input, **shard},
+            f"{context.instance_id}:{activity_input['manufacturer']}:"
+            f"{activity_input['product_type']}:shard-{shard['shard_index']}",
+        ),
+        plan["shards"],
+        options,
+        on_shard_finished,
+    )
+    report_host_stats(context, shard_results)
+    failed_shards = [
+        result["shard_index"]
+        for result in shard_results
+        if not result["products"]["success"]
+    ]
+
+    products_result = yield context.call_activity(
+        "merge_product_shards",
+        {
+            **activity_input,
+            "shard_indexes": [
+                result["shard_index"]
+                for result in shard_results
+                if result["products"]["success"]
+            ],
+            "failed_shards": failed_shards,
+            "failed_series": [
+                series_name
+                for result in shard_results
+                for series_name in result["products"].get("failed_series", [])
+            ],
+        },
+    )
+    products_result["failed_shards"] = failed_shards
+
+    pdfs_result = yield context.call_activity(
+        "merge_pdf_shards",
+        {
+            **activity_input,
+            "download_shards": [
+                result["shard_index"]
+                for result in shard_results
+                if result.get("pdfs", {}).get("success")
+            ],
+            "extract_shards": [
+                result["shard_index"]
+                for result in shard_results
+                if result.get("extracted", {}).get("success")
+            ],
+            # Per-item failures stay packed by the shards until the merge
+            "failed_products": [
+                result["pdfs"]["failed_products"]
+                for result in shard_results
+                if result.get("pdfs", {}).get("success")
+            ],
+            "failed_pdfs": [
+                result["extracted"]["failed_pdfs"]
+                for result in shard_results
+                if result.get("extracted", {}).get("success")
+            ],
+            # Steps that lost a shard or item are not skipped by the next run
+            "download_complete": all(
+                shard_downloads_complete(result) for result in shard_results
+            ),
+            "extract_complete": all(
+                shard_extraction_complete(result) for result in shard_results
+            ),
+        },
+    )
+    products_result["metrics"] = combine_metrics(
+        "scrape_products",
+        [plan.get("metrics"), products_result.get("metrics")]
+        + [result["products"].get("metrics") for result in shard_results],
+        items=products_result.get("count"),
+    )
+
+    # The merge result stands for both stages, with metrics split per stage
+    download_result = {
+        **pdfs_result,
+        "failures": pdfs_result.get("download_failures"),
+        "metrics": combine_metrics(
+            "download_pdfs",
+            [result.get("pdfs", {}).get("metrics") for result in shard_results],
+        ),
+    }
+    extract_result = {
+        **pdfs_result,
+        "failures": pdfs_result.get("extract_failures"),
+        "metrics": combine_metrics(
+            "extract_pdf_data",
+            [pdfs_result.get("metrics")]
+            + [result.get("extracted", {}).get("metrics") for result in shard_results],
+            items=pdfs_result.get("processed_pdfs"),
+        ),
+    }
+    return products_result, download_result, extract_result
+
+
+def run_datasheet_queue(
+    context: df.DurableOrchestrationContext,
+    activity_input: dict,
+    options: dict,
+    progress: PipelineProgress,
+):
+    """Queue one work item per datasheet and wait until the batch has finished"""
+    manufacturer = activity_input["manufacturer"]
+    product_type = activity_input["product_type"]
+    # Instance IDs repeat for runs of the same config, so the run's start time
+    # keeps their records, and late messages of a timed-out run, apart
+    batch_input = {
+        **activity_input,
+        "batch_id": f"{context.instance_id}-{activity_input['run_id']}",
+    }
+
+    batch = yield context.call_activity("enqueue_datasheets", batch_input)
+    if not batch.get("success"):
+        return batch, batch
+
+    poll_seconds = options.get("datasheet_poll_seconds", DEFAULT_DATASHEET_POLL_SECONDS)
+    deadline = context.current_utc_datetime + timedelta(
+        seconds=options.get(
+            "datasheet_timeout_seconds", DEFAULT_DATASHEET_TIMEOUT_SECONDS
+        )
+    )
+
+    # Queue workers write one record per datasheet, poisoned ones included
+    while True:
+        check_result = yield context.call_activity(
+            "check_datasheet_batch", {**batch_input, "total": batch["total"]}
+        )
+        for step in QUEUED_STEPS:
+            progress.step(manufacturer, product_type, step).update(
+                datasheets_total=batch["total"],
+                datasheets_done=check_result.get("finished", 0),
+            )
+        progress.publish()
+
+        if check_result.get("pending", 1) == 0:
+            break
+        next_check = context.current_utc_datetime + timedelta(seconds=poll_seconds)
+        if next_check > deadline:
+            break
+        yield context.create_timer(next_check)
+
+    merge_result = yield context.call_activity(
+        "merge_datasheet_batch", {**batch_input, "total": batch["total"]}
+    )
+    merge_result["metrics"] = combine_metrics(
+        "extract_pdf_data",
+        [batch.get("metrics"), merge_result.get("metrics")],
+        items=merge_result.get("processed_pdfs"),
+    )
+
+    # The merge result stands for both stages, with the metrics counted once
+    download_result = {
+        key: value for key, value in merge_result.items() if key != "metrics"
+    }
+    return download_result, merge_result
+
+
+def check_step(
+    context: df.DurableOrchestrationContext,
+    step: str,
+    activity_input: dict,
+    options: dict,
+):
+    """Check whether a step's manifest allows skipping it"""
+    # Series are scraped live, so there is no stored input to compare against
+    if step == "scrape_series" or options.get("force", False):
+        return {"skipped": False}
+
+    # Replays exist to apply changed parsers to unchanged pages
+    if step == "scrape_products" and options.get("replay_snapshots"):
+        return {"skipped": False}
+
+    check_result = yield context.call_activity(
+        "check_step_manifest", {**activity_input, "step": step}
+    )
+    return check_result
+
+
+def run_step(
+    context: df.DurableOrchestrationContext,
+    step: str,
+    activity_input: dict,
+    options: dict,
+    progress: PipelineProgress,
+):
+    """Run a pipeline step unless its manifest shows unchanged inputs"""
+    manufacturer = activity_input["manufacturer"]
+    product_type = activity_input["product_type"]
+    progress.start_step(manufacturer, product_type, step)
+
+    check_result = yield from check_step(context, step, activity_input, options)
+    if check_result.get("skipped"):
+        result = check_result
+    else:
+        if step in GOVERNED_STEPS:
+            activity_input = yield from with_host_limits(context, activity_input)
+        if step == "scrape_products" and options.get("shard_products", True):
+            result = yield from run_product_shards(
+                context, activity_input, options, progress
+            )
+        else:
+            result = yield call_step_activity(context, step, activity_input)
+            report_host_stats(context, result)
+
+    progress.finish_step(manufacturer, product_type, step, result)
+    return result
+
+
+def run_product_type_chain(
+    context: df.DurableOrchestrationContext,
+    manufacturer: str,
+    product_type: str,
+    options: Optional[dict] = None,
+    progress: Optional[PipelineProgress] = None,
+):
+    """Run the six pipeline steps for one manufacturer/product type"""
+    options = options or {}
+    progress = progress or PipelineProgress(context)
+    results = {}
+    activity_input = {
+        "manufacturer": manufacturer,
+        "product_type": product_type,
+        # Names the snapshot archive of the pages fetched by this chain
+        "run_id": context.current_utc_datetime.strftime("%Y%m%dT%H%M%S"),
+    }
+    if options.get("force", False):
+        # Scrapers then ignore the products of the last run
+        activity_input["force"] = True
+    if options.get("replay_snapshots"):
+        # Scrapers parse the archived pages of an earlier run, offline
+        activity_input["replay_snapshots"] = options["replay_snapshots"]
+
+    # Step 1: Scrape series
+    series_result = yield from run_step(
+        context, "scrape_series", activity_input, options, progress
+    )
+    results[f"{product_type}_series"] = series_result
+
+    # Steps 2-4 streamed per series shard, unless the products are unchanged
+    streamed = False
+    if options.get("streaming", False):
+        check_result = yield from check_step(
+            context, "scrape_products", activity_input, options
+        )
+        if not check_result.get("skipped"):
+            for step in STREAMED_STEPS:
+                progress.start_step(manufacturer, product_type, step)
+            streaming_input = yield from with_host_limits(context, activity_input)
+            streamed_results = yield from run_streaming_shards(
+                context, streaming_input, options, progress
+            )
+            for step, result in zip(STREAMED_STEPS, streamed_results):
+                progress.finish_step(manufacturer, product_type, step, result)
+            (
+                results[f"{product_type}_products"],
+                results[f"{product_type}_pdfs"],
+                results[f"{product_type}_extracted"],
+            ) = streamed_results
+            streamed = True
+
+    if not streamed:
+        # Step 2: Scrape products
+        products_result = yield from run_step(
+            context, "scrape_products", activity_input, options, progress
+        )
+        results[f"{product_type}_products"] = products_result
+
+        # Steps 3-4 as one queue message per datasheet, unless the products
+        # are unchanged
+        queued = False
+        if options.get("queue_pdfs", False):
+            check_result = yield from check_step(
+                context, "download_pdfs", activity_input, options
+            )
+            if not check_result.get("skipped"):
+                for step in QUEUED_STEPS:
+                    progress.start_step(manufacturer, product_type, step)
+                queued_results = yield from run_datasheet_queue(
+                    context, activity_input, options, progress
+                )
+                for step, result in zip(QUEUED_STEPS, queued_results):
+                    progress.finish_step(manufacturer, product_type, step, result)
+                (
+                    results[f"{product_type}_pdfs"],
+                    results[f"{product_type}_extracted"],
+                ) = queued_results
+                queued = True
+
+        if not queued:
+            # Step 3: Download PDFs
+            pdf_result = yield from run_step(
+                context, "download_pdfs", activity_input, options, progress
+            )
+            results[f"{product_type}_pdfs"] = pdf_result
+
+            # Step 4: Extract data from PDFs
+            extract_result = yield from run_step(
+                context, "extract_pdf_data", activity_input, options, progress
+            )
+            results[f"{product_type}_extracted"] = extract_result
+
+    # Step 5: Structure data
+    structure_result = yield from run_step(
+        context, "extract_structured_data", activity_input, options, progress
+    )
+    results[f"{product_type}_structured"] = structure_result
+
+    # Step 6: Validate data
+    validate_result = yield from run_step(
+        context, "validate_data", activity_input, options, progress
+    )
+    results[f"{product_type}_validated"] = validate_result
+
+    return results
+
+
+def run_pipeline(context: df.DurableOrchestrationContext):
+    """Run the data extraction pipeline for all configured chains"""
+
+    # Get pipeline parameters
+    params = context.get_input() or {}
+    parallel = params.get("parallel", False)
+
+    # Reruns of a config reuse its instance ID, so reports are also keyed by start
+    run_id = context.current_utc_datetime.strftime("%Y%m%dT%H%M%S")
+
+    chains = [
+        (chain["manufacturer"], product_type)
+        for chain in pipeline_chains(params)
+        for product_type in chain["product_types"]
+    ]
+    manufacturers = {manufacturer for manufacturer, _ in chains}
+
+    progress = PipelineProgress(context)
+    progress.status["chain_count"] = len(chains)
+
+    if parallel:
+        # Fan out: one sub-orchestration per (manufacturer, product_type) chain
+        sub_instances = [
+            f"{context.instance_id}:{manufacturer}:{product_type}"
+            for manufacturer, product_type in chains
+        ]
+
+        # Chains publish their own progress, merged by the status endpoint
+        progress.status["sub_instances"] = sub_instances
+        progress.publish()
+
+        tasks = [
+            context.call_sub_orchestrator(
+                "product_type_orchestrator",
+                {
+                    "manufacturer": manufacturer,
+                    "product_type": product_type,
+                    "options": params,
+                },
+                sub_instance,
+            )
+            for (manufacturer, product_type), sub_instance in zip(chains, sub_instances)
+        ]
+        chain_results = yield context.task_all(tasks)
+    else:
+        # Execute each chain in sequence
+        chain_results = []
+        for manufacturer, product_type in chains:
+            chain_result = yield from run_product_type_chain(
+                context, manufacturer, product_type, params, progress
+            )
+            chain_results.append(chain_result)
+
+    # Fan in: merge per-chain results, keyed by manufacturer when there are several
+    results: dict = {}
+    for (manufacturer, _), chain_result in zip(chains, chain_results):
+        if len(manufacturers) > 1:
+            results.setdefault(manufacturer, {}).update(chain_result)
+        else:
+            results.update(chain_result)
+
+    # Persist the resource report of this run, passing only the stage metrics
+    results["report"] = yield context.call_activity(
+        "write_run_report",
+        {
+            "instance_id": context.instance_id,
+            "run_id": run_id,
+            "metrics": collect_metrics(results),
+        },
+    )
+
+    return results
+
+
+def run_product_type(context: df.DurableOrchestrationContext):
+    """Run the pipeline for a single product type"""
+    params = context.get_input()
+    results = yield from run_product_type_chain(
+        context, params["manufacturer"], params["product_type"], params.get("options")
+    )
+    return results
+
+
+def run_product_shard(context: df.DurableOrchestrationContext):
+    """Stream one series shard through steps 2-4"""
+    params = context.get_input()
+    results = {"shard_index": params["shard_index"]}
+
+    results["products"] = yield call_step_activity(
+        context, "scrape_products_shard", params
+    )
+    if not results["products"]["success"] or not results["products"]["count"]:
+        return results
+
+    results["pdfs"] = yield context.call_activity("download_pdfs", params)
+    if not results["pdfs"]["success"]:
+        return results
+
+    results["extracted"] = yield context.call_activity("extract_pdf_data", params)
+    return results
+
+
+def shard_downloads_complete(result: dict) -> bool:
+    """Whether a streamed shard downloaded the datasheets of all its products"""
+    if not result["products"]["success"]:
+        return False
+    if "pdfs" not in result:
+        # Shards without products have nothing to download
+        return True
+    return result["pdfs"]["success"] and not result["pdfs"]["failures"]
+
+
+def shard_extraction_complete(result: dict) -> bool:
+    """Whether a streamed shard extracted all documents of its products"""
+    if not shard_downloads_complete(result):
+        return False
+    if not result.get("pdfs", {}).get("products"):
+        # Shards without datasheets have nothing to extract
+        return True
+    extracted = result.get("extracted", {})
+    return extracted.get("success", False) and not extracted["failures"]
+
+
+def run_debouncer(context: df.DurableOrchestrationContext):
+    """Collect config uploads until none arrives for a while, then start one run"""
+    configs = list(context.get_input()["configs"])
+    window_end = context.current_utc_datetime + timedelta(seconds=MAX_DEBOUNCE_SECONDS)
+
+    # Exactly one wait is open at a time: an event goes to the latest wait and
+    # only one event is buffered while none is open, so a wait abandoned to a
+    # timer would swallow an upload
+    config_event = context.wait_for_external_event(CONFIG_EVENT)
+    while True:
+        deadline = min(
+            context.current_utc_datetime + timedelta(seconds=DEBOUNCE_SECONDS),
+            window_end,
+        )
+        timer = context.create_timer(deadline)
+        winner = yield context.task_any([config_event, timer])
+        if winner is timer:
+            break
+
+        # Another upload arrived, so restart the quiet period
+        timer.cancel()
+        configs.append(config_event.result)
+        config_event = context.wait_for_external_event(CONFIG_EVENT)
+
+    # Orchestrators cannot start top-level instances, so the run goes via a queue
+    result = yield context.call_activity(
+        "queue_pipeline_start", merge_orchestrator_inputs(configs)
+    )
+
+    # Uploads raised while the run was queued start the next burst
+    late_configs = []
+    while True:
+        timer = context.create_timer(context.current_utc_datetime)
+        winner = yield context.task_any([config_event, timer])
+        if winner is timer:
+            break
+        late_configs.append(config_event.result)
+        config_event = context.wait_for_external_event(CONFIG_EVENT)
+    if late_configs:
+        context.continue_as_new({"configs": late_configs})
+
+    return {**result, "configs": len(configs)}
+
 
 # --------------- Orchestrator Function ---------------
 @bp.orchestration_trigger(context_name="context")
 def orchestrator(context: df.DurableOrchestrationContext):
     """Main orchestrator for the data extraction pipeline"""
-    #
-    # # Get pipeline parameters
-    # params = context.get_input()
-    # manufacturer = params.get("manufacturer", "recom")
-    # product_types = params.get(
-    #     "product_types", ["dc-dc-converters", "ac-dc-power-supplies"]
-    # )
-    #
-    # results = {}
-    #
-    # # Execute each step in sequence
-    # for product_type in product_types:
-    #     # Step 1: Scrape series
-    #     series_result = yield context.call_activity(
-    #         "scrape_series",
-    #         {"manufacturer": manufacturer, "product_type": product_type},
-    #     )
-    #     results[f"{product_type}_series"] = series_result
-    #
-    #     # Step 2: Scrape products
-    #     products_result = yield context.call_activity(
-    #         "scrape_products",
-    #         {"manufacturer": manufacturer, "product_type": product_type},
-    #     )
-    #     results[f"{product_type}_products"] = products_result
-    #
-    #     # Step 3: Download PDFs
-    #     pdf_result = yield context.call_activity(
-    #         "download_pdfs",
-    #         {"manufacturer": manufacturer, "product_type": product_type},
-    #     )
-    #     results[f"{product_type}_pdfs"] = pdf_result
-    #
-    #     # Step 4: Extract data from PDFs
-    #     extract_result = yield context.call_activity(
-    #         "extract_pdf_data",
-    #         {"manufacturer": manufacturer, "product_type": product_type},
-    #     )
-    #     results[f"{product_type}_extracted"] = extract_result
-    #
-    #     # Step 5: Structure data
-    #     structure_result = yield context.call_activity(
-    #         "extract_structured_data",
-    #         {"manufacturer": manufacturer, "product_type": product_type},
-    #     )
-    #     results[f"{product_type}_structured"] = structure_result
-    #
-    #     # Step 6: Validate data
-    #     validate_result = yield context.call_activity(
-    #         "validate_data",
-    #         {"manufacturer": manufacturer, "product_type": product_type},
-    #     )
-    #     results[f"{product_type}_validated"] = validate_result
-    #
-    # return results
+    result = yield from run_pipeline(context)
+    return result
+
+
+# --------------- Product Type Sub-Orchestrator ---------------
+@bp.orchestration_trigger(context_name="context")
+def product_type_orchestrator(context: df.DurableOrchestrationContext):
+    """Sub-orchestrator running the pipeline for a single product type"""
+    result = yield from run_product_type(context)
+    return result
+
+
+# --------------- Product Shard Sub-Orchestrator ---------------
+@bp.orchestration_trigger(context_name="context")
+def product_shard_orchestrator(context: df.DurableOrchestrationContext):
+    """Sub-orchestrator streaming one series shard through steps 2-4"""
+    result = yield from run_product_shard(context)
+    return result
+
+
+# --------------- Config Debouncer Orchestrator ---------------
+@bp.orchestration_trigger(context_name="context")
+def pipeline_debouncer(context: df.DurableOrchestrationContext):
+    """Orchestrator merging bursts of config uploads into one pipeline run"""
+    result = yield from run_debouncer(context)
+    return result
+
+
+# Orchestration generators by function name, for running the pipeline in-process
+ORCHESTRATIONS = {
+    "orchestrator": run_pipeline,
+    "product_type_orchestrator": run_product_type,
+    "product_shard_orchestrator": run_product_shard,
+}
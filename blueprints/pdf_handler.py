@@ -1,195 +1,383 @@
+import asyncio
 import logging
 import io
+from typing import Dict
 import azure.functions as func
 import pandas as pd
 import requests
 import PyPDF2
 import fitz  # PyMuPDF
+from shared.downloader import Download, download_all, normalize_url
 from shared.environment import AzureEnvironment
+from shared.governor import governed_get
+from shared.manifest import write_manifest, digest_mutable_data
+from shared.payload import pack_payload, resolve_payload
+from shared.shards import shard_file_name
+from shared.telemetry import record_http_request, track_activity
 
 # Create blueprint instance
 bp = func.Blueprint()
 
+# Columns of the table mapping every product to the document of its datasheet
+DATASHEET_COLUMNS = ["product_code", "datasheet_url", "pdf_digest"]
+
+
+def fetch_datasheet(datasheet_link: str) -> bytes:
+    """Download a datasheet, raising on HTTP errors"""
+    response = governed_get(requests, datasheet_link, timeout=30)
+    record_http_request()
+    if response.status_code != 200:
+        raise ValueError(f"HTTP {response.status_code}")
+    return response.content
+
+
+def extract_pdf_text(pdf_content: bytes) -> str:
+    """Extract the text of a PDF with PyPDF2, falling back to PyMuPDF"""
+    pdf_bytes = io.BytesIO(pdf_content)
+    text = ""
+
+    # Try using PyPDF2 first
+    try:
+        reader = PyPDF2.PdfReader(pdf_bytes)
+        for page_num in range(len(reader.pages)):
+            text += reader.pages[page_num].extract_text() + "\n"
+    except Exception:
+        # If PyPDF2 fails, try PyMuPDF (fitz)
+        text = ""
+        doc = fitz.open(stream=pdf_content, filetype="pdf")
+        for page_num in range(doc.page_count):
+            text += doc.load_page(page_num).get_text() + "\n"
+        doc.close()
+    return text
+
 
 # --------------- Download PDFs Activity Function ---------------
 @bp.activity_trigger(input_name="input")
+@track_activity(items_key="downloaded")
 def download_pdfs(input: dict) -> dict:
     """Activity function to download PDF files"""
-    # logging.info(
-    #     f"Downloading PDFs for {input['manufacturer']} {input['product_type']}"
-    # )
-    #
-    # try:
-    #     # Get parameters
-    #     manufacturer = input.get("manufacturer", "recom")
-    #     product_type = input.get("product_type", "dc-dc-converters")
-    #
-    #     # Initialize environment
-    #     env = AzureEnvironment()
-    #
-    #     # Load products data with datasheet links
-    #     step_name = f"{manufacturer}2_scrape_products"
-    #     file_name = f"{product_type}.csv"
-    #     products_df = env.storage.load_df(step_name, file_name)
-    #
-    #     # Filter out rows without datasheet links
-    #     products_df = products_df[
-    #         products_df["datasheet_link"].notna()
-    #         & (products_df["datasheet_link"] != "")
-    #     ]
-    #
-    #     # Download each PDF
-    #     total_pdfs = len(products_df)
-    #     downloaded = 0
-    #     failures = 0
-    #
-    #     for index, product in products_df.iterrows():
-    #         try:
-    #             # Get datasheet link
-    #             datasheet_link = product["datasheet_link"]
-    #             if not datasheet_link:
-    #                 continue
-    #
-    #             # Generate filename
-    #             product_code = (
-    #                 product["product_code"].replace("/", "_").replace("\\", "_")
-    #             )
-    #             pdf_filename = f"{product_code}.pdf"
-    #
-    #             # Download PDF
-    #             response = requests.get(datasheet_link, timeout=30)
-    #             if response.status_code == 200:
-    #                 # Save PDF to blob storage
-    #                 container_name = f"{manufacturer}3_download_pdfs"
-    #                 env.storage.save_blob(
-    #                     container_name,
-    #                     f"{product_type}/{pdf_filename}",
-    #                     response.content,
-    #                 )
-    #                 downloaded += 1
-    #             else:
-    #                 logging.warning(
-    #                     f"Failed to download PDF for {product_code}: HTTP {response.status_code}"
-    #                 )
-    #                 failures += 1
-    #         except Exception as e:
-    #             logging.warning(
-    #                 f"Error downloading PDF for {product.get('product_code', 'unknown')}: {str(e)}"
-    #             )
-    #             failures += 1
-    #
-    #     return {
-    #         "success": True,
-    #         "manufacturer": manufacturer,
-    #         "product_type": product_type,
-    #         "total_pdfs": total_pdfs,
-    #         "downloaded": downloaded,
-    #         "failures": failures,
-    #     }
-    # except Exception as e:
-    #     logging.error(f"Error in download_pdfs: {str(e)}")
-    #     return {
-    #         "success": False,
-    #         "error": str(e),
-    #         "manufacturer": input.get("manufacturer", "recom"),
-    #         "product_type": input.get("product_type", "dc-dc-converters"),
-    #     }
+    logging.info(
+        f"Downloading PDFs for {input['manufacturer']} {input['product_type']}"
+    )
+
+    try:
+        # Get parameters
+        manufacturer = input.get("manufacturer", "recom")
+        product_type = input.get("product_type", "dc-dc-converters")
+        shard_index = input.get("shard_index")
+
+        # Initialize environment
+        env = AzureEnvironment()
+
+        # Load products data with datasheet links, either all or one series shard
+        step_name = f"{manufacturer}2_scrape_products"
+        file_name = (
+            f"{product_type}.csv"
+            if shard_index is None
+            else shard_file_name(product_type, shard_index)
+        )
+        products_df = env.storage.load_df(step_name, file_name)
+
+        # Filter out rows without datasheet links
+        products_df = products_df[
+            products_df["datasheet_link"].notna()
+            & (products_df["datasheet_link"] != "")
+        ]
+
+        # One download per normalized datasheet URL, since products often share
+        # a datasheet (e.g. every model of a series)
+        downloads: Dict[str, Download] = {}
+        product_urls = []
+        for _, product in products_df.iterrows():
+            url = normalize_url(str(product["datasheet_link"]))
+            downloads.setdefault(url, Download(url))
+            product_urls.append((product["product_code"], url))
+        total_pdfs = len(downloads)
+
+        # Stream the documents concurrently into the CAS
+        asyncio.run(download_all(env.storage, list(downloads.values())))
+
+        datasheets = []
+        failed_products = []
+        for product_code, url in product_urls:
+            download = downloads[url]
+            if download.error is None:
+                datasheets.append(
+                    {
+                        "product_code": product_code,
+                        "datasheet_url": url,
+                        "pdf_digest": download.digest,
+                    }
+                )
+            else:
+                logging.warning(
+                    f"Error downloading PDF for {product_code}: {download.error}"
+                )
+                failed_products.append(
+                    {"product_code": product_code, "error": download.error}
+                )
+        downloaded = sum(download.error is None for download in downloads.values())
+        failures = len(failed_products)
+
+        # Save the product to document table read by the extraction steps
+        step_name = f"{manufacturer}3_download_pdfs"
+        datasheets_df = pd.DataFrame(datasheets, columns=DATASHEET_COLUMNS)
+        if shard_index is None:
+            file_name = f"{product_type}.csv"
+            env.storage.save_df(step_name, file_name, datasheets_df)
+
+            # Record step manifest for incremental runs
+            write_manifest(
+                env.storage,
+                manufacturer,
+                product_type,
+                "download_pdfs",
+                {file_name: digest_mutable_data(env.storage, step_name, file_name)},
+                complete=not failures,
+            )
+        else:
+            # Shards are merged by merge_pdf_shards
+            file_name = shard_file_name(product_type, shard_index)
+            env.storage.save_df(step_name, file_name, datasheets_df)
+
+        return {
+            "success": True,
+            "manufacturer": manufacturer,
+            "product_type": product_type,
+            "shard_index": shard_index,
+            "total_pdfs": total_pdfs,
+            "downloaded": downloaded,
+            "products": len(datasheets),
+            "failures": failures,
+            "failed_products": pack_payload(
+                env.storage, failed_products, count=failures
+            ),
+            "step_name": step_name,
+            "file_name": file_name,
+        }
+    except Exception as e:
+        logging.error(f"Error in download_pdfs: {str(e)}")
+        return {
+            "success": False,
+            "error": str(e),
+            "manufacturer": input.get("manufacturer", "recom"),
+            "product_type": input.get("product_type", "dc-dc-converters"),
+        }
 
 
 # --------------- Extract PDF Data Activity Function ---------------
 @bp.activity_trigger(input_name="input")
+@track_activity(items_key="processed_pdfs")
 def extract_pdf_data(input: dict) -> dict:
     """Activity function to extract data from PDF files"""
-    # logging.info(
-    #     f"Extracting PDF data for {input['manufacturer']} {input['product_type']}"
-    # )
-    #
-    # try:
-    #     # Get parameters
-    #     manufacturer = input.get("manufacturer", "recom")
-    #     product_type = input.get("product_type", "dc-dc-converters")
-    #
-    #     # Initialize environment
-    #     env = AzureEnvironment()
-    #
-    #     # Get list of PDFs from the container
-    #     container_name = f"{manufacturer}3_download_pdfs"
-    #     pdf_files = env.storage.list_blobs(container_name, f"{product_type}/")
-    #
-    #     extracted_data = []
-    #     for pdf_blob in pdf_files:
-    #         try:
-    #             # Get filename from blob path
-    #             filename = pdf_blob.name.split("/")[-1]
-    #             product_code = filename.replace(".pdf", "").replace("_", "/")
-    #
-    #             # Download PDF content
-    #             pdf_content = env.storage.get_blob(container_name, pdf_blob.name)
-    #
-    #             # Extract text from PDF
-    #             pdf_bytes = io.BytesIO(pdf_content)
-    #             text = ""
-    #
-    #             # Try using PyPDF2 first
-    #             try:
-    #                 reader = PyPDF2.PdfReader(pdf_bytes)
-    #                 for page_num in range(len(reader.pages)):
-    #                     text += reader.pages[page_num].extract_text() + "\n"
-    #             except Exception as e:
-    #                 # If PyPDF2 fails, try PyMuPDF (fitz)
-    #                 pdf_bytes.seek(0)
-    #                 try:
-    #                     doc = fitz.open(stream=pdf_bytes.read(), filetype="pdf")
-    #                     for page_num in range(doc.page_count):
-    #                         text += doc.load_page(page_num).get_text() + "\n"
-    #                     doc.close()
-    #                 except Exception as e2:
-    #                     logging.warning(
-    #                         f"Both PDF extraction methods failed for {filename}: {str(e2)}"
-    #                     )
-    #                     continue
-    #
-    #             # Save extracted text
-    #             extracted_data.append(
-    #                 {
-    #                     "product_code": product_code,
-    #                     "filename": filename,
-    #                     "extracted_text": text,
-    #                 }
-    #             )
-    #
-    #         except Exception as e:
-    #             logging.warning(f"Error extracting text from {pdf_blob.name}: {str(e)}")
-    #             continue
-    #
-    #     # Convert to DataFrame and save
-    #     if extracted_data:
-    #         df = pd.DataFrame(extracted_data)
-    #
-    #         step_name = f"{manufacturer}4_extract_pdf_data"
-    #         file_name = f"{product_type}.csv"
-    #         env.storage.save_df(step_name, file_name, df)
-    #
-    #         return {
-    #             "success": True,
-    #             "manufacturer": manufacturer,
-    #             "product_type": product_type,
-    #             "processed_pdfs": len(extracted_data),
-    #             "step_name": step_name,
-    #             "file_name": file_name,
-    #         }
-    #     else:
-    #         return {
-    #             "success": False,
-    #             "error": "No data extracted from PDFs",
-    #             "manufacturer": manufacturer,
-    #             "product_type": product_type,
-    #         }
-    # except Exception as e:
-    #     logging.error(f"Error in extract_pdf_data: {str(e)}")
-    #     return {
-    #         "success": False,
-    #         "error": str(e),
-    #         "manufacturer": input.get("manufacturer", "recom"),
-    #         "product_type": input.get("product_type", "dc-dc-converters"),
-    #     }
+    logging.info(
+        f"Extracting PDF data for {input['manufacturer']} {input['product_type']}"
+    )
+
+    try:
+        # Get parameters
+        manufacturer = input.get("manufacturer", "recom")
+        product_type = input.get("product_type", "dc-dc-converters")
+        shard_index = input.get("shard_index")
+
+        # Initialize environment
+        env = AzureEnvironment()
+
+        # Load the product to document table, either all or one series shard
+        datasheets_df = env.storage.load_df(
+            f"{manufacturer}3_download_pdfs",
+            (
+                f"{product_type}.csv"
+                if shard_index is None
+                else shard_file_name(product_type, shard_index)
+            ),
+        )
+
+        # Extract every document once, however many products share it
+        extracted_data = []
+        failed_pdfs = []
+        documents = datasheets_df.drop_duplicates(subset="pdf_digest")
+        for _, document in documents.iterrows():
+            pdf_digest = document["pdf_digest"]
+            try:
+                # Read PDF content from the CAS
+                pdf_content = env.storage.read_cas(pdf_digest).read()
+
+                # Extract text from PDF
+                try:
+                    text = extract_pdf_text(pdf_content)
+                except Exception as e2:
+                    logging.warning(
+                        "Both PDF extraction methods failed for "
+                        f"{document['datasheet_url']}: {str(e2)}"
+                    )
+                    failed_pdfs.append({"pdf_digest": pdf_digest, "error": str(e2)})
+                    continue
+
+                # Save extracted text
+                extracted_data.append(
+                    {
+                        "pdf_digest": pdf_digest,
+                        "datasheet_url": document["datasheet_url"],
+                        "extracted_text": text,
+                    }
+                )
+
+            except Exception as e:
+                logging.warning(f"Error extracting text from {pdf_digest}: {str(e)}")
+                failed_pdfs.append({"pdf_digest": pdf_digest, "error": str(e)})
+                continue
+
+        # Convert to DataFrame and save
+        if extracted_data:
+            df = pd.DataFrame(extracted_data)
+
+            step_name = f"{manufacturer}4_extract_pdf_data"
+            if shard_index is None:
+                file_name = f"{product_type}.csv"
+                env.storage.save_df(step_name, file_name, df)
+
+                # Record step manifest for incremental runs
+                write_manifest(
+                    env.storage,
+                    manufacturer,
+                    product_type,
+                    "extract_pdf_data",
+                    {file_name: digest_mutable_data(env.storage, step_name, file_name)},
+                    complete=not failed_pdfs,
+                )
+            else:
+                # Shards are merged by merge_pdf_shards
+                file_name = shard_file_name(product_type, shard_index)
+                env.storage.save_df(step_name, file_name, df)
+
+            return {
+                "success": True,
+                "manufacturer": manufacturer,
+                "product_type": product_type,
+                "shard_index": shard_index,
+                "processed_pdfs": len(extracted_data),
+                "failures": len(failed_pdfs),
+                "failed_pdfs": pack_payload(
+                    env.storage, failed_pdfs, count=len(failed_pdfs)
+                ),
+                "step_name": step_name,
+                "file_name": file_name,
+            }
+        else:
+            return {
+                "success": False,
+                "error": "No data extracted from PDFs",
+                "manufacturer": manufacturer,
+                "product_type": product_type,
+            }
+    except Exception as e:
+        logging.error(f"Error in extract_pdf_data: {str(e)}")
+        return {
+            "success": False,
+            "error": str(e),
+            "manufacturer": input.get("manufacturer", "recom"),
+            "product_type": input.get("product_type", "dc-dc-converters"),
+        }
+
+
+# --------------- Merge PDF Shards Activity Function ---------------
+@bp.activity_trigger(input_name="input")
+@track_activity(items_key="processed_pdfs")
+def merge_pdf_shards(input: dict) -> dict:
+    """Activity function to merge streamed download and extraction shards"""
+    try:
+        # Get parameters
+        manufacturer = input.get("manufacturer", "recom")
+        product_type = input.get("product_type", "dc-dc-converters")
+        download_shards = input.get("download_shards", [])
+        extract_shards = input.get("extract_shards", [])
+        download_complete = input.get("download_complete", True)
+        extract_complete = input.get("extract_complete", True)
+
+        # Initialize environment
+        env = AzureEnvironment()
+
+        # Failed items of every shard, each list inline or by reference
+        failed_products = [
+            item
+            for shard_failures in input.get("failed_products", [])
+            for item in resolve_payload(env.storage, shard_failures)
+        ]
+        failed_pdfs = [
+            item
+            for shard_failures in input.get("failed_pdfs", [])
+            for item in resolve_payload(env.storage, shard_failures)
+        ]
+
+        # Concatenate the product to document tables into the download output
+        pdf_step_name = f"{manufacturer}3_download_pdfs"
+        datasheets_df = pd.concat(
+            [
+                env.storage.load_df(
+                    pdf_step_name, shard_file_name(product_type, shard_index)
+                )
+                for shard_index in download_shards
+            ]
+            or [pd.DataFrame(columns=DATASHEET_COLUMNS)],
+            ignore_index=True,
+        )
+        file_name = f"{product_type}.csv"
+        env.storage.save_df(pdf_step_name, file_name, datasheets_df)
+        write_manifest(
+            env.storage,
+            manufacturer,
+            product_type,
+            "download_pdfs",
+            {file_name: digest_mutable_data(env.storage, pdf_step_name, file_name)},
+            complete=download_complete,
+        )
+
+        # Concatenate extracted text shards in shard order; a document shared
+        # across shards is kept once
+        step_name = f"{manufacturer}4_extract_pdf_data"
+        frames = [
+            env.storage.load_df(step_name, shard_file_name(product_type, shard_index))
+            for shard_index in extract_shards
+        ]
+        df = (
+            pd.concat(frames, ignore_index=True).drop_duplicates(subset="pdf_digest")
+            if frames
+            else pd.DataFrame()
+        )
+
+        env.storage.save_df(step_name, file_name, df)
+        write_manifest(
+            env.storage,
+            manufacturer,
+            product_type,
+            "extract_pdf_data",
+            {file_name: digest_mutable_data(env.storage, step_name, file_name)},
+            complete=extract_complete,
+        )
+
+        return {
+            "success": True,
+            "manufacturer": manufacturer,
+            "product_type": product_type,
+            "downloaded": datasheets_df["pdf_digest"].nunique(),
+            "processed_pdfs": len(df),
+            "download_failures": len(failed_products),
+            "extract_failures": len(failed_pdfs),
+            "failed_products": pack_payload(
+                env.storage, failed_products, count=len(failed_products)
+            ),
+            "failed_pdfs": pack_payload(
+                env.storage, failed_pdfs, count=len(failed_pdfs)
+            ),
+            "step_name": step_name,
+            "file_name": file_name,
+        }
+    except Exception as e:
+        logging.error(f"Error in merge_pdf_shards: {str(e)}")
+        return {
+            "success": False,
+            "error": str(e),
+            "manufacturer": input.get("manufacturer", "recom"),
+            "product_type": input.get("product_type", "dc-dc-converters"),
+        }
@@ -1,10 +1,22 @@
 import logging
-import asyncio
 import azure.functions as func
 import pandas as pd
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
+from manufacturers import get_plugin
+from shared.browser_pool import browser_pool
+from shared.checkpoints import CrawlCheckpoint
 from shared.environment import AzureEnvironment
+from shared.http_cache import HttpCache, open_cache
+from shared.json_endpoints import open_endpoints, use_endpoints
+from shared.manifest import (
+    digest_mutable_data,
+    load_manifest,
+    step_version,
+    write_manifest,
+)
+from shared.shards import shard_file_name
+from shared.singleton import DEFAULT_SHARD_SIZE
+from shared.snapshots import open_archive, use_archive
+from shared.telemetry import track_activity
 
 # Create blueprint instance
 bp = func.Blueprint()
@@ -12,327 +24,324 @@ bp = func.Blueprint()
 
 # --------------- Scrape Products Activity Function ---------------
 @bp.activity_trigger(input_name="input")
+@track_activity(items_key="count")
 def scrape_products(input: dict) -> dict:
     """Activity function to scrape detailed product data"""
-    # logging.info(
-    #     f"Scraping products for {input['manufacturer']} {input['product_type']}"
-    # )
-    #
-    # try:
-    #     # Get parameters
-    #     manufacturer = input.get("manufacturer", "recom")
-    #     product_type = input.get("product_type", "dc-dc-converters")
-    #
-    #     # Initialize environment
-    #     env = AzureEnvironment()
-    #
-    #     # Choose scraper based on manufacturer
-    #     if manufacturer == "recom":
-    #         products_data = asyncio.run(scrape_recom_products(env, product_type))
-    #     elif manufacturer == "traco":
-    #         products_data = asyncio.run(scrape_traco_products(env, product_type))
-    #     elif manufacturer == "xppower":
-    #         products_data = asyncio.run(scrape_xppower_products(env, product_type))
-    #     else:
-    #         raise ValueError(f"Unsupported manufacturer: {manufacturer}")
-    #
-    #     # Convert to DataFrame and save
-    #     df = pd.DataFrame(products_data)
-    #
-    #     step_name = f"{manufacturer}2_scrape_products"
-    #     file_name = f"{product_type}.csv"
-    #     env.storage.save_df(step_name, file_name, df)
-    #
-    #     return {
-    #         "success": True,
-    #         "manufacturer": manufacturer,
-    #         "product_type": product_type,
-    #         "count": len(products_data),
-    #         "step_name": step_name,
-    #         "file_name": file_name,
-    #     }
-    # except Exception as e:
-    #     logging.error(f"Error in scrape_products: {str(e)}")
-    #     return {
-    #         "success": False,
-    #         "error": str(e),
-    #         "manufacturer": input.get("manufacturer", "recom"),
-    #         "product_type": input.get("product_type", "dc-dc-converters"),
-    #     }
-
-
-async def scrape_recom_products(env, product_type):
-    """Scrape RECOM products from series data"""
-    # Load series data
-    # step_name = "recom1_scrape_series"
-    # file_name = f"{product_type}.csv"
-    # series_df = env.storage.load_df(step_name, file_name)
-    #
-    # all_products = []
-    # async with async_playwright() as p:
-    #     browser = await p.chromium.launch(headless=True)
-    #
-    #     for _, series in series_df.iterrows():
-    #         page = await browser.new_page()
-    #         try:
-    #             # Navigate to series page
-    #             url = series["product_link"]
-    #             await page.goto(url, wait_until="networkidle")
-    #
-    #             # Wait for products table
-    #             await page.wait_for_selector("table.productTable", timeout=10000)
-    #
-    #             # Get all product rows
-    #             rows = await page.query_selector_all("table.productTable tbody tr")
-    #
-    #             series_products = []
-    #             for row in rows:
-    #                 try:
-    #                     # Extract product data
-    #                     cells = await row.query_selector_all("td")
-    #
-    #                     if len(cells) < 5:  # Skip header or invalid rows
-    #                         continue
-    #
-    #                     product_code = await cells[0].inner_text()
-    #                     description = await cells[1].inner_text()
-    #                     input_voltage = await cells[2].inner_text()
-    #                     output_voltage = await cells[3].inner_text()
-    #                     current = await cells[4].inner_text()
-    #
-    #                     # Get datasheet link
-    #                     datasheet_cell = await row.query_selector(
-    #                         "td.additional-column"
-    #                     )
-    #                     datasheet_link = ""
-    #                     if datasheet_cell:
-    #                         link_elem = await datasheet_cell.query_selector("a.btn")
-    #                         if link_elem:
-    #                             datasheet_link = await link_elem.get_attribute("href")
-    #
-    #                     product = {
-    #                         "series_name": series["product_name"],
-    #                         "product_code": product_code,
-    #                         "description": description,
-    #                         "input_voltage": input_voltage,
-    #                         "output_voltage": output_voltage,
-    #                         "current": current,
-    #                         "datasheet_link": datasheet_link,
-    #                         "series_power": series["power"],
-    #                         "series_mounting_type": series["mounting_type"],
-    #                         "series_package_style": series["package_style"],
-    #                     }
-    #
-    #                     series_products.append(product)
-    #                 except Exception as e:
-    #                     logging.warning(f"Error processing product row: {str(e)}")
-    #                     continue
-    #
-    #             all_products.extend(series_products)
-    #             logging.info(
-    #                 f"Scraped {len(series_products)} products from {series['product_name']}"
-    #             )
-    #
-    #         except Exception as e:
-    #             logging.error(
-    #                 f"Error scraping series {series.get('product_name', 'unknown')}: {str(e)}"
-    #             )
-    #         finally:
-    #             await page.close()
-    #
-    #     await browser.close()
-    #
-    # return all_products
-
-
-async def scrape_traco_products(env, product_type):
-    """Scrape Traco products from series data"""
-    # Load series data
-    step_name = "traco1_scrape_series"
-    file_name = f"{product_type}.csv"
-    series_df = env.storage.load_df(step_name, file_name)
-
-    all_products = []
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-
-        for _, series in series_df.iterrows():
-            if not series.get("series_url"):
-                continue
-
-            page = await browser.new_page()
+    logging.info(
+        f"Scraping products for {input['manufacturer']} {input['product_type']}"
+    )
+
+    try:
+        # Get parameters
+        manufacturer = input.get("manufacturer", "recom")
+        product_type = input.get("product_type", "dc-dc-converters")
+
+        # Initialize environment
+        env = AzureEnvironment()
+
+        # Run scraper
+        # Replays of archived pages rebuild every product row; a retry of this
+        # run resumes from the crawl checkpoint
+        run_id = input.get("run_id", "manual")
+        archive = open_archive(env.storage, input, "scrape_products")
+        checkpoint = CrawlCheckpoint(env.storage, manufacturer, product_type, run_id)
+        force = input.get("force", False) or archive.replaying
+        cache = open_cache(env.storage, bypass=force)
+        with use_archive(archive):
+            products_data, failed_series = run_product_scraper(
+                env,
+                manufacturer,
+                product_type,
+                force=force,
+                checkpoint=checkpoint,
+                cache=cache,
+            )
+        archive.save_index(run_id)
+
+        # Convert to DataFrame and save
+        df = pd.DataFrame(products_data)
+
+        step_name = f"{manufacturer}2_scrape_products"
+        file_name = f"{product_type}.csv"
+        env.storage.save_df(step_name, file_name, df)
+
+        # Record step manifest for incremental runs
+        write_manifest(
+            env.storage,
+            manufacturer,
+            product_type,
+            "scrape_products",
+            {file_name: digest_mutable_data(env.storage, step_name, file_name)},
+            complete=not failed_series,
+        )
+        if cache is not None:
+            cache.commit()
+
+        return {
+            "success": True,
+            "manufacturer": manufacturer,
+            "product_type": product_type,
+            "count": len(products_data),
+            "failed_series": failed_series,
+            "step_name": step_name,
+            "file_name": file_name,
+        }
+    except Exception as e:
+        logging.error(f"Error in scrape_products: {str(e)}")
+        return {
+            "success": False,
+            "error": str(e),
+            "manufacturer": input.get("manufacturer", "recom"),
+            "product_type": input.get("product_type", "dc-dc-converters"),
+        }
+
+
+# --------------- Plan Product Shards Activity Function ---------------
+@bp.activity_trigger(input_name="input")
+@track_activity(items_key="series_count")
+def plan_product_shards(input: dict) -> dict:
+    """Activity function to split the series list into shards"""
+    try:
+        # Get parameters
+        manufacturer = input.get("manufacturer", "recom")
+        product_type = input.get("product_type", "dc-dc-converters")
+        shard_size = max(1, int(input.get("shard_size", DEFAULT_SHARD_SIZE)))
+
+        # Initialize environment
+        env = AzureEnvironment()
+
+        # Count series scraped in step 1
+        series_df = load_series(env, manufacturer, product_type)
+        series_count = len(series_df)
+
+        return {
+            "success": True,
+            "manufacturer": manufacturer,
+            "product_type": product_type,
+            "series_count": series_count,
+            "shard_size": shard_size,
+        }
+    except Exception as e:
+        logging.error(f"Error in plan_product_shards: {str(e)}")
+        return {
+            "success": False,
+            "error": str(e),
+            "manufacturer": input.get("manufacturer", "recom"),
+            "product_type": input.get("product_type", "dc-dc-converters"),
+        }
+
+
+# --------------- Scrape Products Shard Activity Function ---------------
+@bp.activity_trigger(input_name="input")
+@track_activity(items_key="count")
+def scrape_products_shard(input: dict) -> dict:
+    """Activity function to scrape products for a slice of the series list"""
+    logging.info(
+        f"Scraping products shard {input['shard_index']} for "
+        f"{input['manufacturer']} {input['product_type']}"
+    )
+
+    try:
+        # Get parameters
+        manufacturer = input.get("manufacturer", "recom")
+        product_type = input.get("product_type", "dc-dc-converters")
+        shard_index = input["shard_index"]
+        series_range = (input["series_start"], input["series_stop"])
+
+        # Initialize environment
+        env = AzureEnvironment()
+
+        # Run scraper on the series slice
+        run_id = input.get("run_id", "manual")
+        part = f"shard-{shard_index:04d}"
+        archive = open_archive(env.storage, input, "scrape_products")
+        checkpoint = CrawlCheckpoint(
+            env.storage, manufacturer, product_type, run_id, part
+        )
+        force = input.get("force", False) or archive.replaying
+        cache = open_cache(env.storage, bypass=force)
+        with use_archive(archive):
+            products_data, failed_series = run_product_scraper(
+                env,
+                manufacturer,
+                product_type,
+                series_range,
+                force=force,
+                checkpoint=checkpoint,
+                cache=cache,
+            )
+        archive.save_index(run_id, part)
+
+        # Save shard output next to the merged dataset
+        df = pd.DataFrame(products_data)
+
+        step_name = f"{manufacturer}2_scrape_products"
+        file_name = shard_file_name(product_type, shard_index)
+        env.storage.save_df(step_name, file_name, df)
+
+        # Cache entries are committed by merge_product_shards, after the merged
+        # output their unchanged pages are carried forward from
+        env.storage.save_json(
+            step_name,
+            shard_file_name(product_type, shard_index, "json"),
+            cache.pending if cache is not None else {},
+        )
+
+        return {
+            "success": True,
+            "manufacturer": manufacturer,
+            "product_type": product_type,
+            "shard_index": shard_index,
+            "count": len(products_data),
+            "failed_series": failed_series,
+            "step_name": step_name,
+            "file_name": file_name,
+        }
+    except Exception as e:
+        logging.error(f"Error in scrape_products_shard: {str(e)}")
+        return {
+            "success": False,
+            "error": str(e),
+            "manufacturer": input.get("manufacturer", "recom"),
+            "product_type": input.get("product_type", "dc-dc-converters"),
+            "shard_index": input.get("shard_index"),
+        }
+
+
+# --------------- Merge Product Shards Activity Function ---------------
+@bp.activity_trigger(input_name="input")
+@track_activity(items_key="count")
+def merge_product_shards(input: dict) -> dict:
+    """Activity function to merge shard outputs into the products dataset"""
+    try:
+        # Get parameters
+        manufacturer = input.get("manufacturer", "recom")
+        product_type = input.get("product_type", "dc-dc-converters")
+        shard_indexes = input.get("shard_indexes", [])
+        failed_shards = input.get("failed_shards", [])
+        failed_series = input.get("failed_series", [])
+
+        # Initialize environment
+        env = AzureEnvironment()
+
+        # Concatenate shards in shard order so the CSV stays deterministic
+        step_name = f"{manufacturer}2_scrape_products"
+        frames = []
+        for shard_index in shard_indexes:
             try:
-                # Navigate to series page
-                url = series["series_url"]
-                await page.goto(url, wait_until="networkidle")
-
-                # Get HTML content
-                html_content = await page.content()
-                soup = BeautifulSoup(html_content, "html.parser")
-
-                # Find the products table
-                product_table = soup.select_one("table.models")
-                if not product_table:
-                    continue
-
-                # Get all product rows
-                rows = product_table.select("tbody tr")
-
-                series_products = []
-                for row in rows:
-                    try:
-                        cells = row.select("td")
-                        if len(cells) < 5:
-                            continue
-
-                        part_number = cells[0].select_one("a")
-                        part_number_text = (
-                            part_number.text.strip() if part_number else ""
-                        )
-
-                        input_voltage = cells[1].text.strip() if len(cells) > 1 else ""
-                        output_voltage = cells[2].text.strip() if len(cells) > 2 else ""
-                        power = cells[3].text.strip() if len(cells) > 3 else ""
-                        efficiency = cells[4].text.strip() if len(cells) > 4 else ""
-
-                        datasheet_link = ""
-                        datasheets = soup.select(".field--name-field-datasheets a")
-                        if datasheets:
-                            datasheet_link = (
-                                "https://www.tracopower.com" + datasheets[0]["href"]
-                            )
-
-                        product = {
-                            "series_name": series.get("product_series", ""),
-                            "product_code": part_number_text,
-                            "input_voltage": input_voltage,
-                            "output_voltage": output_voltage,
-                            "power": power,
-                            "efficiency": efficiency,
-                            "datasheet_link": datasheet_link,
-                            "series_power_variants": series.get(
-                                "series_power_variants", ""
-                            ),
-                            "series_input_voltage_variants": series.get(
-                                "series_input_voltage_variants", ""
-                            ),
-                            "series_output_voltage_variants": series.get(
-                                "series_output_voltage_variants", ""
-                            ),
-                            "series_description": series.get(
-                                "series_short_description", ""
-                            ),
-                        }
-
-                        series_products.append(product)
-                    except Exception as e:
-                        logging.warning(f"Error processing Traco product row: {str(e)}")
-                        continue
-
-                all_products.extend(series_products)
-                logging.info(
-                    f"Scraped {len(series_products)} products from {series.get('product_series', 'unknown')}"
+                frames.append(
+                    env.storage.load_df(
+                        step_name, shard_file_name(product_type, shard_index)
+                    )
                 )
+            except pd.errors.EmptyDataError:
+                # Shards without products are written as empty CSVs
+                continue
 
-            except Exception as e:
-                logging.error(
-                    f"Error scraping Traco series {series.get('product_series', 'unknown')}: {str(e)}"
-                )
-            finally:
-                await page.close()
-
-        await browser.close()
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
-    return all_products
+        file_name = f"{product_type}.csv"
+        env.storage.save_df(step_name, file_name, df)
 
+        # Commit the cache entries of the pages the merged shards were parsed from
+        cache = HttpCache(env.storage)
+        for shard_index in shard_indexes:
+            pending_file_name = shard_file_name(product_type, shard_index, "json")
+            if env.storage.mutable_data_exists(step_name, pending_file_name):
+                cache.pending.update(
+                    env.storage.load_json(step_name, pending_file_name)
+                )
 
-async def scrape_xppower_products(env, product_type):
-    """Scrape XP Power products from series data"""
-    # Load series data
-    step_name = "xppower1_scrape_series"
+        # Record step manifest for incremental runs
+        write_manifest(
+            env.storage,
+            manufacturer,
+            product_type,
+            "scrape_products",
+            {file_name: digest_mutable_data(env.storage, step_name, file_name)},
+            complete=not failed_shards and not failed_series,
+        )
+        cache.commit()
+
+        return {
+            "success": True,
+            "manufacturer": manufacturer,
+            "product_type": product_type,
+            "count": len(df),
+            "shards": len(shard_indexes),
+            "failed_series": failed_series,
+            "step_name": step_name,
+            "file_name": file_name,
+        }
+    except Exception as e:
+        logging.error(f"Error in merge_product_shards: {str(e)}")
+        return {
+            "success": False,
+            "error": str(e),
+            "manufacturer": input.get("manufacturer", "recom"),
+            "product_type": input.get("product_type", "dc-dc-converters"),
+        }
+
+
+def run_product_scraper(
+    env,
+    manufacturer,
+    product_type,
+    series_range=None,
+    force=False,
+    checkpoint=None,
+    cache=None,
+):
+    """Run the product scraper for a manufacturer, optionally on a series slice
+
+    Series whose listing fingerprint is unchanged keep their products of the
+    last run; force rescrapes every series page in full. With a cache, series
+    pages are fetched with conditional requests; the caller commits it once
+    the products are saved. Tables with a captured JSON endpoint are read
+    without a browser. With a checkpoint, progress is saved every few series
+    and cleared once the scrape finishes. Returns the products and the names
+    of the series that failed.
+    """
+    plugin = get_plugin(manufacturer)
+    series_df = load_series(env, manufacturer, product_type, series_range)
+
+    previous_products = None
+    if not force:
+        previous_products = load_previous_products(env, manufacturer, product_type)
+
+    with use_endpoints(open_endpoints(env.storage)):
+        products, failed_series = browser_pool.run(
+            plugin.scrape_products(series_df, cache, previous_products, checkpoint)
+        )
+    if checkpoint is not None:
+        checkpoint.clear()
+    return products, failed_series
+
+
+def load_previous_products(env, manufacturer, product_type):
+    """Load the products of the last run, unless the step's code changed since"""
+    manifest = load_manifest(env.storage, manufacturer, product_type, "scrape_products")
+    if manifest is None or manifest["version"] != step_version("scrape_products"):
+        return None
+
+    step_name = f"{manufacturer}2_scrape_products"
     file_name = f"{product_type}.csv"
-    series_df = env.storage.load_df(step_name, file_name)
-
-    all_products = []
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
+    if not env.storage.mutable_data_exists(step_name, file_name):
+        return None
+    try:
+        return env.storage.load_df(step_name, file_name)
+    except pd.errors.EmptyDataError:
+        return None
 
-        for _, series in series_df.iterrows():
-            if not series.get("url"):
-                continue
 
-            page = await browser.new_page()
-            try:
-                # Navigate to series page
-                url = (
-                    "https://www.xppower.com" + series["url"]
-                    if not series["url"].startswith("http")
-                    else series["url"]
-                )
-                await page.goto(url, wait_until="networkidle")
-
-                # Wait for products table
-                await page.wait_for_selector("table.variations-table", timeout=10000)
-
-                # Get HTML content
-                html_content = await page.content()
-                soup = BeautifulSoup(html_content, "html.parser")
-
-                # Find the products table
-                product_table = soup.select_one("table.variations-table")
-                if not product_table:
-                    continue
-
-                # Get all product rows
-                rows = product_table.select("tbody tr")
-
-                series_products = []
-                for row in rows:
-                    try:
-                        cells = row.select("td")
-                        if len(cells) < 3:
-                            continue
-
-                        model = cells[0].text.strip() if len(cells) > 0 else ""
-                        input_voltage = cells[1].text.strip() if len(cells) > 1 else ""
-                        output_voltage = cells[2].text.strip() if len(cells) > 2 else ""
-
-                        # Use series datasheet for all products
-                        datasheet_link = series.get("datasheet", "")
-                        if datasheet_link and not datasheet_link.startswith("http"):
-                            datasheet_link = "https://www.xppower.com" + datasheet_link
-
-                        product = {
-                            "series_name": series.get("productCode", ""),
-                            "product_code": model,
-                            "input_voltage": input_voltage,
-                            "output_voltage": output_voltage,
-                            "power": series.get("power", ""),
-                            "phase": series.get("phase", ""),
-                            "voltage": series.get("voltage", ""),
-                            "current": series.get("current", ""),
-                            "datasheet_link": datasheet_link,
-                        }
-
-                        series_products.append(product)
-                    except Exception as e:
-                        logging.warning(
-                            f"Error processing XP Power product row: {str(e)}"
-                        )
-                        continue
-
-                all_products.extend(series_products)
-                logging.info(
-                    f"Scraped {len(series_products)} products from {series.get('productCode', 'unknown')}"
-                )
-
-            except Exception as e:
-                logging.error(
-                    f"Error scraping XP Power series {series.get('productCode', 'unknown')}: {str(e)}"
-                )
-            finally:
-                await page.close()
+def load_series(env, manufacturer, product_type, series_range=None):
+    """Load series scraped in step 1, optionally limited to a (start, stop) slice"""
+    step_name = f"{manufacturer}1_scrape_series"
+    file_name = f"{product_type}.csv"
+    series_df = env.storage.load_df(step_name, file_name)
 
-        await browser.close()
+    if series_range is not None:
+        series_start, series_stop = series_range
+        series_df = series_df.iloc[series_start:series_stop]
 
-    return all_products
+    return series_df
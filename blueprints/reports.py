@@ -0,0 +1,68 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict
+import azure.functions as func
+from shared.environment import AzureEnvironment
+from shared.telemetry import combine_metrics
+
+# Create blueprint instance
+bp = func.Blueprint()
+
+REPORT_STEP_NAME = "_runs"
+
+
+# --------------- Write Run Report Activity Function ---------------
+@bp.activity_trigger(input_name="input")
+def write_run_report(input: dict) -> dict:
+    """Activity function to store and log the resource report of a run"""
+    try:
+        # Get parameters
+        instance_id = input["instance_id"]
+        run_id = input.get("run_id", "manual")
+        chain_metrics = input.get("metrics", {})
+
+        # Initialize environment
+        env = AzureEnvironment()
+
+        # Totals per stage across all chains
+        stage_metrics: Dict[str, list] = {}
+        for metrics in chain_metrics.values():
+            for stage, stage_metric in metrics.items():
+                stage_metrics.setdefault(stage, []).append(stage_metric)
+        stages = {
+            stage: combine_metrics(stage, metrics_list)
+            for stage, metrics_list in stage_metrics.items()
+        }
+
+        report = {
+            "instance_id": instance_id,
+            "run_id": run_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "stages": stages,
+            "chains": chain_metrics,
+        }
+        file_name = f"{instance_id}-{run_id}.json"
+        env.storage.save_json(REPORT_STEP_NAME, file_name, report)
+
+        # Emit one custom metric record per stage for Application Insights
+        for stage, metrics in stages.items():
+            logging.info(
+                f"Stage {stage}: {metrics['wall_seconds']}s wall, "
+                f"{metrics['items_per_second']} items/s",
+                extra={
+                    "custom_dimensions": {
+                        "instance_id": instance_id,
+                        **{f"pipeline.{key}": value for key, value in metrics.items()},
+                    }
+                },
+            )
+
+        return {
+            "success": True,
+            "instance_id": instance_id,
+            "step_name": REPORT_STEP_NAME,
+            "file_name": file_name,
+        }
+    except Exception as e:
+        logging.error(f"Error in write_run_report: {str(e)}")
+        return {"success": False, "error": str(e)}
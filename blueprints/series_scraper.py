@@ -1,284 +1,134 @@
 import logging
-import asyncio
 import azure.functions as func
 import pandas as pd
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
+from manufacturers import get_plugin
+from shared.browser_pool import browser_pool
 from shared.environment import AzureEnvironment
+from shared.http_cache import open_cache
+from shared.json_endpoints import open_endpoints, use_endpoints
+from shared.manifest import write_manifest, digest_mutable_data
+from shared.snapshots import open_archive, use_archive
+from shared.telemetry import track_activity
 
 # Create blueprint instance
 bp = func.Blueprint()
 
-# URL templates for different manufacturers
-MANUFACTURER_URLS = {
-    "recom": {
-        "dc-dc-converters": "https://recom-power.com/en/products/dc-dc-converters/rec-c-dc-dc-converters.html",
-        "ac-dc-power-supplies": "https://recom-power.com/en/products/ac-dc-power-supplies/rec-c-ac-dc-power-supplies.html",
-    },
-    "traco": {
-        "dc-dc-converters": "https://www.tracopower.com/product-finder/dc-dc",
-        "ac-dc-power-supplies": "https://www.tracopower.com/product-finder/ac-dc",
-    },
-    "xppower": {
-        "dc-dc-converters": "https://www.xppower.com/products/dc-dc-converters",
-        "ac-dc-power-supplies": "https://www.xppower.com/products/ac-dc-power-supplies",
-    },
-}
-
-
-async def parse_recom_series(page):
-    """Parse RECOM power series from webpage"""
-    # Wait for series items to load
-    # await page.wait_for_selector(
-    #     'tr[itemscope][itemtype="https://schema.org/ListItem"]', timeout=10000
-    # )
-    #
-    # # Get all series rows
-    # rows = await page.query_selector_all(
-    #     'tr[itemscope][itemtype="https://schema.org/ListItem"]'
-    # )
-    # series_list = []
-    #
-    # for row in rows:
-    #     try:
-    #         # Extract data from each row
-    #         image_url = await (
-    #             await row.query_selector(".productSeriesImage img")
-    #         ).get_attribute("src")
-    #         product_link = await (
-    #             await row.query_selector("td:nth-child(3) a")
-    #         ).get_attribute("href")
-    #         product_name = await (
-    #             await row.query_selector("td:nth-child(3) a span")
-    #         ).inner_text()
-    #         power = await (await row.query_selector("td:nth-child(4)")).inner_text()
-    #         vin = await (await row.query_selector("td:nth-child(5)")).inner_text()
-    #         main_vout = await (await row.query_selector("td:nth-child(6)")).inner_text()
-    #         mounting_type = await (
-    #             await row.query_selector("td:nth-child(7)")
-    #         ).inner_text()
-    #         package_style = await (
-    #             await row.query_selector("td:nth-child(8)")
-    #         ).inner_text()
-    #         datasheet_link = await (
-    #             await row.query_selector("td.additional-column a.btn")
-    #         ).get_attribute("href")
-    #
-    #         series_list.append(
-    #             {
-    #                 "image_url": image_url,
-    #                 "product_link": product_link,
-    #                 "product_name": product_name,
-    #                 "power": power,
-    #                 "vin": vin,
-    #                 "main_vout": main_vout,
-    #                 "mounting_type": mounting_type,
-    #                 "package_style": package_style,
-    #                 "datasheet_link": datasheet_link,
-    #             }
-    #         )
-    #     except Exception as e:
-    #         logging.warning(f"Error processing a row: {str(e)}")
-    #         continue
-    #
-    # return series_list
 
+async def scrape_series_async(manufacturer, product_type, cache=None):
+    """Scrape product series data from manufacturer website"""
+    plugin = get_plugin(manufacturer)
+    url = plugin.series_urls.get(product_type)
+    if not url:
+        raise ValueError(
+            f"Unsupported manufacturer/product type: {manufacturer}/{product_type}"
+        )
 
-async def parse_traco_series(page):
-    """Parse Traco Power series from webpage"""
-    # html_content = await page.content()
-    # soup = BeautifulSoup(html_content, "html.parser")
-    #
-    # articles = soup.select("div.series-container article.series")
-    # series_list = []
-    #
-    # for article in articles:
-    #     data = {}
-    #
-    #     # Product Series
-    #     product_series = article.select_one(".col-1 .product-title a")
-    #     if product_series:
-    #         data["product_series"] = product_series.text
-    #         data["series_url"] = (
-    #             "https://www.tracopower.com" + product_series["href"]
-    #             if "/series/" in product_series["href"]
-    #             else None
-    #         )
-    #
-    #     # Power
-    #     power = article.select_one(
-    #         ".col-2 .field--name-field-power"
-    #     ) or article.select_one(".col-2 .field--name-field-power-superseries")
-    #     data["series_power_variants"] = power.text if power else None
-    #
-    #     # Input/Output voltages and other info
-    #     input_voltage = article.select_one(".col-3 .field--name-field-input-voltage")
-    #     data["series_input_voltage_variants"] = (
-    #         input_voltage.text if input_voltage else None
-    #     )
-    #
-    #     output_voltage = article.select_one(".col-4 .field--name-field-output-voltage")
-    #     data["series_output_voltage_variants"] = (
-    #         output_voltage.text if output_voltage else None
-    #     )
-    #
-    #     short_description = article.select_one(
-    #         ".col-5 .field--name-field-short-description"
-    #     )
-    #     data["series_short_description"] = (
-    #         short_description.text.strip() if short_description else None
-    #     )
-    #
-    #     datasheet = article.select_one(".col-6 .field--name-field-datasheets a")
-    #     data["datasheet_link"] = (
-    #         "https://www.tracopower.com" + datasheet["href"] if datasheet else None
-    #     )
-    #
-    #     # Images
-    #     dimensions_img = article.select_one(".image-dimensions img")
-    #     data["dimensions_image"] = (
-    #         "https://www.tracopower.com" + dimensions_img["src"]
-    #         if dimensions_img
-    #         else None
-    #     )
-    #
-    #     pinout_img = article.select_one(".image-pinout img")
-    #     data["pinout_image"] = (
-    #         "https://www.tracopower.com" + pinout_img["src"] if pinout_img else None
-    #     )
-    #
-    #     series_list.append(data)
-    #
-    # return series_list
+    return await plugin.scrape_series(url, cache)
 
 
-async def parse_xppower_series(page):
-    """Parse XP Power series from webpage"""
-    # Wait for products table
-    # await page.wait_for_selector("#products-table__table tbody tr", timeout=10000)
-    #
-    # # Get all series rows
-    # rows = await page.query_selector_all("#products-table__table tbody tr")
-    # series_list = []
-    #
-    # for row in rows:
-    #     try:
-    #         html = await row.inner_html()
-    #         soup = BeautifulSoup(html, "html.parser")
-    #
-    #         img_elem = soup.find("img")
-    #         name_elem = soup.find_all("a")[1] if len(soup.find_all("a")) > 1 else None
-    #         power_elem = (
-    #             soup.find_all("td")[2] if len(soup.find_all("td")) > 2 else None
-    #         )
-    #         phase_elem = (
-    #             soup.find_all("td")[3] if len(soup.find_all("td")) > 3 else None
-    #         )
-    #         voltage_elem = (
-    #             soup.find_all("td")[4] if len(soup.find_all("td")) > 4 else None
-    #         )
-    #         current_elem = (
-    #             soup.find_all("td")[5] if len(soup.find_all("td")) > 5 else None
-    #         )
-    #         datasheet_elem = soup.find(
-    #             lambda tag: tag.name == "a" and "Datasheet" in tag.text
-    #         )
-    #
-    #         series_list.append(
-    #             {
-    #                 "image": img_elem["src"]
-    #                 if img_elem and img_elem.has_attr("src")
-    #                 else "",
-    #                 "productCode": name_elem.get_text(strip=True) if name_elem else "",
-    #                 "url": name_elem["href"]
-    #                 if name_elem and name_elem.has_attr("href")
-    #                 else "",
-    #                 "power": power_elem.get_text(strip=True) if power_elem else "",
-    #                 "phase": phase_elem.get_text(strip=True) if phase_elem else "",
-    #                 "voltage": voltage_elem.get_text(strip=True)
-    #                 if voltage_elem
-    #                 else "",
-    #                 "current": current_elem.get_text(strip=True)
-    #                 if current_elem
-    #                 else "",
-    #                 "datasheet": datasheet_elem["href"]
-    #                 if datasheet_elem and datasheet_elem.has_attr("href")
-    #                 else "",
-    #             }
-    #         )
-    #     except Exception as e:
-    #         logging.warning(f"Error processing row: {str(e)}")
-    #         continue
-    #
-    # return series_list
+def series_changes(
+    previous_df: pd.DataFrame, df: pd.DataFrame, name_column: str
+) -> pd.DataFrame:
+    """Series added, changed or discontinued since the previous listing"""
+    previous = {}
+    if name_column in previous_df and "fingerprint" in previous_df:
+        previous = dict(
+            zip(previous_df[name_column].astype(str), previous_df["fingerprint"])
+        )
+    current = {}
+    if name_column in df:
+        current = dict(zip(df[name_column].astype(str), df["fingerprint"]))
 
+    changes = []
+    for series_name, fingerprint in current.items():
+        if series_name not in previous:
+            changes.append((series_name, "added", fingerprint, None))
+        elif str(previous[series_name]) != str(fingerprint):
+            changes.append((series_name, "changed", fingerprint, previous[series_name]))
+    for series_name, fingerprint in previous.items():
+        if series_name not in current:
+            changes.append((series_name, "discontinued", None, fingerprint))
 
-async def scrape_series_async(manufacturer, product_type):
-    """Scrape product series data from manufacturer website"""
-    # url = MANUFACTURER_URLS.get(manufacturer, {}).get(product_type)
-    # if not url:
-    #     raise ValueError(
-    #         f"Unsupported manufacturer/product type: {manufacturer}/{product_type}"
-    #     )
-    #
-    # async with async_playwright() as p:
-    #     browser = await p.chromium.launch(headless=True)
-    #     page = await browser.new_page()
-    #
-    #     # Navigate to the URL
-    #     await page.goto(url, wait_until="networkidle")
-    #
-    #     series_data = []
-    #
-    #     # Extract series data using appropriate parser for the manufacturer
-    #     if manufacturer == "recom":
-    #         series_data = await parse_recom_series(page)
-    #     elif manufacturer == "traco":
-    #         series_data = await parse_traco_series(page)
-    #     elif manufacturer == "xppower":
-    #         series_data = await parse_xppower_series(page)
-    #
-    #     await browser.close()
-    #     return series_data
+    return pd.DataFrame(
+        changes,
+        columns=["series_name", "change", "fingerprint", "previous_fingerprint"],
+    )
 
 
 @bp.activity_trigger(input_name="input")
+@track_activity(items_key="count")
 def scrape_series(input: dict) -> dict:
     """Activity function to scrape series data"""
-    # logging.info("Scrape series function processing a request.")
-    #
-    # try:
-    #     # Get parameters from input
-    #     manufacturer = input.get("manufacturer", "recom")
-    #     product_type = input.get("product_type", "dc-dc-converters")
-    #
-    #     # Initialize environment
-    #     env = AzureEnvironment()
-    #
-    #     # Run scraper
-    #     series_data = asyncio.run(scrape_series_async(manufacturer, product_type))
-    #
-    #     # Convert to DataFrame
-    #     df = pd.DataFrame(series_data)
-    #
-    #     # Save to storage
-    #     step_name = f"{manufacturer}1_scrape_series"
-    #     file_name = f"{product_type}.csv"
-    #     env.storage.save_df(step_name, file_name, df)
-    #
-    #     return {
-    #         "success": True,
-    #         "manufacturer": manufacturer,
-    #         "product_type": product_type,
-    #         "count": len(series_data),
-    #         "step_name": step_name,
-    #         "file_name": file_name,
-    #     }
-    # except Exception as e:
-    #     logging.error(f"Error in scrape_series: {str(e)}")
-    #     return {
-    #         "success": False,
-    #         "error": str(e),
-    #         "manufacturer": input.get("manufacturer", "recom"),
-    #         "product_type": input.get("product_type", "dc-dc-converters"),
-    #     }
+    logging.info("Scrape series function processing a request.")
+
+    try:
+        # Get parameters from input
+        manufacturer = input.get("manufacturer", "recom")
+        product_type = input.get("product_type", "dc-dc-converters")
+
+        # Initialize environment
+        env = AzureEnvironment()
+
+        # Run scraper, with conditional requests for pages fetched before and
+        # every page archived, or on the archived pages of an earlier run;
+        # tables with a captured JSON endpoint are read without a browser
+        archive = open_archive(env.storage, input, "scrape_series")
+        cache = open_cache(env.storage, bypass=archive.replaying)
+        with use_archive(archive), use_endpoints(open_endpoints(env.storage)):
+            series_data = browser_pool.run(
+                scrape_series_async(manufacturer, product_type, cache)
+            )
+        archive.save_index(input.get("run_id", "manual"))
+
+        # Convert to DataFrame, fingerprinting the fields products depend on
+        plugin = get_plugin(manufacturer)
+        df = pd.DataFrame(series_data)
+        df["fingerprint"] = [plugin.series_fingerprint(row) for row in series_data]
+
+        # Compare with the previous listing before it is overwritten
+        step_name = f"{manufacturer}1_scrape_series"
+        file_name = f"{product_type}.csv"
+        previous_df = pd.DataFrame()
+        if env.storage.mutable_data_exists(step_name, file_name):
+            try:
+                previous_df = env.storage.load_df(step_name, file_name)
+            except pd.errors.EmptyDataError:
+                pass
+        changes_df = series_changes(previous_df, df, plugin.series_name_column)
+        changes_file_name = f"{product_type}_changes.csv"
+        env.storage.save_df(step_name, changes_file_name, changes_df)
+
+        # Save to storage
+        env.storage.save_df(step_name, file_name, df)
+
+        # Record step manifest for incremental runs
+        write_manifest(
+            env.storage,
+            manufacturer,
+            product_type,
+            "scrape_series",
+            {file_name: digest_mutable_data(env.storage, step_name, file_name)},
+        )
+        if cache is not None:
+            cache.commit()
+
+        return {
+            "success": True,
+            "manufacturer": manufacturer,
+            "product_type": product_type,
+            "count": len(series_data),
+            "added": int((changes_df["change"] == "added").sum()),
+            "changed": int((changes_df["change"] == "changed").sum()),
+            "discontinued": int((changes_df["change"] == "discontinued").sum()),
+            "step_name": step_name,
+            "file_name": file_name,
+            "changes_file_name": changes_file_name,
+        }
+    except Exception as e:
+        logging.error(f"Error in scrape_series: {str(e)}")
+        return {
+            "success": False,
+            "error": str(e),
+            "manufacturer": input.get("manufacturer", "recom"),
+            "product_type": input.get("product_type", "dc-dc-converters"),
+        }
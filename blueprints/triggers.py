@@ -1,11 +1,47 @@
 import logging
 import json
+import os
+from datetime import datetime, timezone
 import azure.functions as func
 import azure.durable_functions as df
+from shared.progress import estimate_progress, merge_progress, output_links
+from shared.singleton import debounce_start, start_singleton
 
 # Create blueprint instance
 bp = func.Blueprint()
 
+# Queue carrying merged configs from the debouncer to start_queued_pipeline
+START_QUEUE_NAME = "pipeline-starts"
+
+# Optional pipeline settings passed through from the trigger config
+PIPELINE_OPTIONS = [
+    "manufacturers",
+    "force",
+    "shard_products",
+    "streaming",
+    "product_shard_size",
+    "max_concurrent_shards",
+    "queue_pdfs",
+    "datasheet_poll_seconds",
+    "datasheet_timeout_seconds",
+    "replay_snapshots",
+]
+
+
+def build_orchestrator_input(config: dict) -> dict:
+    """Build orchestrator input from a trigger config"""
+    orchestrator_input = {
+        "manufacturer": config.get("manufacturer", "recom"),
+        "product_types": config.get(
+            "product_types", ["dc-dc-converters", "ac-dc-power-supplies"]
+        ),
+        "parallel": config.get("parallel", False),
+    }
+    for option in PIPELINE_OPTIONS:
+        if config.get(option) is not None:
+            orchestrator_input[option] = config[option]
+    return orchestrator_input
+
 
 # --------------- Blob Trigger Function ---------------
 @bp.blob_trigger(arg_name="myblob", path="recom-data", connection="AzureWebJobsStorage")
@@ -14,34 +50,24 @@ async def blob_trigger(
     myblob: func.InputStream, starter: df.DurableOrchestrationClient
 ):
     """Blob trigger function that starts the orchestrator when a new blob is uploaded"""
-    # logging.info(f"Python blob trigger function processed blob: {myblob.name}")
-    #
-    # try:
-    #     # Read the blob content as JSON
-    #     blob_content = myblob.read().decode("utf-8")
-    #     config = json.loads(blob_content)
-    #
-    #     # Extract parameters from blob
-    #     manufacturer = config.get("manufacturer", "recom")
-    #     product_types = config.get(
-    #         "product_types", ["dc-dc-converters", "ac-dc-power-supplies"]
-    #     )
-    #
-    #     # Prepare input for orchestrator
-    #     orchestrator_input = {
-    #         "manufacturer": manufacturer,
-    #         "product_types": product_types,
-    #     }
-    #
-    #     # Start the orchestration
-    #     instance_id = await starter.start_new("orchestrator", None, orchestrator_input)
-    #
-    #     logging.info(f"Started orchestration with ID: {instance_id}")
-    #     return instance_id
-    #
-    # except Exception as e:
-    #     logging.error(f"Error starting orchestration from blob trigger: {str(e)}")
-    #     raise
+    logging.info(f"Python blob trigger function processed blob: {myblob.name}")
+
+    try:
+        # Read the blob content as JSON
+        blob_content = myblob.read().decode("utf-8")
+        config = json.loads(blob_content)
+
+        # Prepare input for orchestrator
+        orchestrator_input = build_orchestrator_input(config)
+
+        # Bursts of uploads are merged into one run by the debouncer
+        instance_id = await debounce_start(starter, orchestrator_input)
+
+        logging.info(f"Queued config for debouncer with ID: {instance_id}")
+
+    except Exception as e:
+        logging.error(f"Error starting orchestration from blob trigger: {str(e)}")
+        raise
 
 
 # --------------- HTTP Trigger to Start Orchestrator ---------------
@@ -51,33 +77,119 @@ async def start_orchestrator(
     req: func.HttpRequest, starter: df.DurableOrchestrationClient
 ) -> func.HttpResponse:
     """HTTP trigger function that starts the orchestrator"""
-    # logging.info("Python HTTP trigger function processed a request.")
-    #
-    # try:
-    #     # Get request body
-    #     req_body = req.get_json()
-    #     manufacturer = req_body.get("manufacturer", "recom")
-    #     product_types = req_body.get(
-    #         "product_types", ["dc-dc-converters", "ac-dc-power-supplies"]
-    #     )
-    #
-    #     # Prepare input for orchestrator
-    #     orchestrator_input = {
-    #         "manufacturer": manufacturer,
-    #         "product_types": product_types,
-    #     }
-    #
-    #     # Start the orchestration
-    #     instance_id = await starter.start_new("orchestrator", None, orchestrator_input)
-    #
-    #     logging.info(f"Started orchestration with ID: {instance_id}")
-    #
-    #     # Return HTTP response with instance ID
-    #     return func.HttpResponse(
-    #         body=json.dumps({"id": instance_id}),
-    #         mimetype="application/json",
-    #         status_code=202,
-    #     )
-    # except Exception as e:
-    #     logging.error(f"Error starting orchestration: {str(e)}")
-    #     return func.HttpResponse(body=f"Error: {str(e)}", status_code=500)
+    logging.info("Python HTTP trigger function processed a request.")
+
+    try:
+        # Get request body
+        req_body = req.get_json()
+
+        # Prepare input for orchestrator
+        orchestrator_input = build_orchestrator_input(req_body)
+
+        # Start the orchestration, or join the run of an identical config
+        result = await start_singleton(starter, orchestrator_input)
+        result["status_url"] = (
+            req.url.split("/startOrchestrator")[0] + f"/pipelineStatus/{result['id']}"
+        )
+
+        logging.info(
+            f"{'Joined' if result['joined'] else 'Started'} orchestration "
+            f"with ID: {result['id']}"
+        )
+
+        # Return HTTP response with instance ID and progress link
+        return func.HttpResponse(
+            body=json.dumps(result),
+            mimetype="application/json",
+            status_code=202,
+        )
+    except Exception as e:
+        logging.error(f"Error starting orchestration: {str(e)}")
+        return func.HttpResponse(body=f"Error: {str(e)}", status_code=500)
+
+
+# --------------- HTTP Trigger Reporting Pipeline Progress ---------------
+@bp.route(
+    route="pipelineStatus/{instance_id}",
+    methods=["GET"],
+    auth_level=func.AuthLevel.FUNCTION,
+)
+@bp.durable_client_input(client_name="starter")
+async def pipeline_status(
+    req: func.HttpRequest, starter: df.DurableOrchestrationClient
+) -> func.HttpResponse:
+    """HTTP trigger function reporting per-stage progress of a pipeline run"""
+    try:
+        # Get parameters
+        instance_id = req.route_params.get("instance_id")
+
+        status = await starter.get_status(instance_id)
+        if status.runtime_status is None:
+            return func.HttpResponse(
+                body=f"Unknown instance: {instance_id}", status_code=404
+            )
+
+        # Parallel runs publish chain progress from their sub-orchestrations
+        progress = status.custom_status or {}
+        sub_statuses = []
+        for sub_instance in progress.get("sub_instances", []):
+            sub_status = await starter.get_status(sub_instance)
+            sub_statuses.append(sub_status.custom_status)
+        progress = merge_progress(progress, sub_statuses)
+
+        container_name = os.environ.get("STORAGE_CONTAINER", "power-converter-data")
+        body = {
+            "id": instance_id,
+            "runtime_status": getattr(
+                status.runtime_status, "value", status.runtime_status
+            ),
+            "created_time": status.created_time.isoformat()
+            if status.created_time
+            else None,
+            "last_updated_time": status.last_updated_time.isoformat()
+            if status.last_updated_time
+            else None,
+            **estimate_progress(progress, datetime.now(timezone.utc)),
+            "chains": progress["chains"],
+            "outputs": output_links(progress, container_name),
+        }
+
+        return func.HttpResponse(
+            body=json.dumps(body),
+            mimetype="application/json",
+            status_code=200,
+        )
+    except Exception as e:
+        logging.error(f"Error reading pipeline status: {str(e)}")
+        return func.HttpResponse(body=f"Error: {str(e)}", status_code=500)
+
+
+# --------------- Queue Pipeline Start Activity Function ---------------
+@bp.queue_output(
+    arg_name="message", queue_name=START_QUEUE_NAME, connection="AzureWebJobsStorage"
+)
+@bp.activity_trigger(input_name="input")
+def queue_pipeline_start(input: dict, message: func.Out[str]) -> dict:
+    """Activity function queueing the merged run collected by the debouncer"""
+    message.set(json.dumps(input))
+    return {"success": True, "queue_name": START_QUEUE_NAME}
+
+
+# --------------- Queue Trigger to Start Orchestrator ---------------
+@bp.queue_trigger(
+    arg_name="msg", queue_name=START_QUEUE_NAME, connection="AzureWebJobsStorage"
+)
+@bp.durable_client_input(client_name="starter")
+async def start_queued_pipeline(
+    msg: func.QueueMessage, starter: df.DurableOrchestrationClient
+):
+    """Queue trigger function that starts a run queued by the debouncer"""
+    orchestrator_input = json.loads(msg.get_body().decode("utf-8"))
+
+    # Start the orchestration, or join the run of an identical config
+    result = await start_singleton(starter, orchestrator_input)
+
+    logging.info(
+        f"{'Joined' if result['joined'] else 'Started'} orchestration "
+        f"with ID: {result['id']}"
+    )
@@ -9,6 +9,10 @@ from blueprints.series_scraper import bp as series_bp
 from blueprints.product_scraper import bp as products_bp
 from blueprints.pdf_handler import bp as pdf_bp
 from blueprints.data_processor import bp as data_bp
+from blueprints.manifests import bp as manifests_bp
+from blueprints.reports import bp as reports_bp
+from blueprints.datasheet_queue import bp as datasheet_queue_bp
+from blueprints.governor import bp as governor_bp
 
 # Create the main function app
 # app = df.DFApp()
@@ -21,3 +25,7 @@ app.register_functions(series_bp)
 app.register_functions(products_bp)
 app.register_functions(pdf_bp)
 app.register_functions(data_bp)
+app.register_functions(manifests_bp)
+app.register_functions(reports_bp)
+app.register_functions(datasheet_queue_bp)
+app.register_functions(governor_bp)
@@ -0,0 +1,24 @@
+import importlib
+from typing import Dict
+
+from .plugin import ManufacturerPlugin
+
+# Modules of the manufacturer plugins, imported on first use so an activity only
+# loads the scrapers of the manufacturer it works on
+PLUGIN_MODULES = {
+    "recom": "manufacturers.recom",
+    "traco": "manufacturers.traco",
+    "xppower": "manufacturers.xppower",
+}
+
+_plugins: Dict[str, ManufacturerPlugin] = {}
+
+
+def get_plugin(manufacturer: str) -> ManufacturerPlugin:
+    """Load the plugin of a manufacturer by name"""
+    if manufacturer not in _plugins:
+        module_name = PLUGIN_MODULES.get(manufacturer)
+        if module_name is None:
+            raise ValueError(f"Unsupported manufacturer: {manufacturer}")
+        _plugins[manufacturer] = importlib.import_module(module_name).plugin
+    return _plugins[manufacturer]
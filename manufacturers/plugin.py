@@ -0,0 +1,419 @@
+import abc
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from shared.checkpoints import CrawlCheckpoint
+from shared.snapshots import current_archive
+
+# The fetchers, parsers and the browser are imported where they are used, so
+# activities that only extract datasheets do not load the scraping stack
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+    from playwright.async_api import Page
+
+    from shared.fetcher import FetchedPage
+    from shared.http_cache import HttpCache
+    from shared.json_endpoints import JsonCapture
+
+
+class ManufacturerPlugin(abc.ABC):
+    """Scraping and extraction rules of one manufacturer
+
+    Subclasses declare where the series lists live, how pages are fetched and
+    how hard the site may be hit, and implement the parsers. A plugin missing
+    one of the abstract hooks cannot be created. Limits can be tuned per
+    deployment with environment variables suffixed by the upper-case plugin
+    name.
+    """
+
+    # Plugin name, also the manufacturer prefix of step names
+    name: str = ""
+
+    # Series list URL per product type
+    series_urls: Dict[str, str] = {}
+
+    # "http" tries plain HTTP before rendering in the browser, "browser" always
+    # renders
+    fetch_strategy: str = "http"
+
+    # Content that must be present before a series list can be parsed
+    series_selector: str = ""
+
+    # Content that must be present before a series page can be parsed
+    product_selector: str = ""
+
+    # Series column holding the series_name of the scraped products
+    series_name_column: str = ""
+
+    # Series columns whose change means the series' products must be rescraped
+    fingerprint_columns: List[str] = []
+
+    # Series pages scraped at once, overridable with SERIES_CONCURRENCY_<NAME>
+    series_concurrency: int = 1
+
+    # Seconds between two series page loads, overridable with
+    # SERIES_DELAY_SECONDS_<NAME>
+    series_delay_seconds: float = 1.0
+
+    # Milliseconds a browser page load waits for the content, overridable with
+    # NAVIGATION_TIMEOUT_MS_<NAME>
+    navigation_timeout_ms: int = 30000
+
+    # BeautifulSoup tree builder of the HTML parsers, overridable with
+    # HTML_PARSER_<NAME>, e.g. "lxml" when it is installed
+    html_parser: str = "html.parser"
+
+    def setting(self, prefix: str, default):
+        """Environment override of a plugin setting"""
+        return os.environ.get(f"{prefix}_{self.name.upper()}", default)
+
+    def concurrency(self) -> int:
+        """Series pages scraped at once"""
+        return max(1, int(self.setting("SERIES_CONCURRENCY", self.series_concurrency)))
+
+    def delay_seconds(self) -> float:
+        """Politeness delay between two series page loads"""
+        return float(self.setting("SERIES_DELAY_SECONDS", self.series_delay_seconds))
+
+    def navigation_timeout(self) -> int:
+        """Milliseconds to wait for page content in the browser"""
+        return int(self.setting("NAVIGATION_TIMEOUT_MS", self.navigation_timeout_ms))
+
+    def series_fingerprint(self, series: dict) -> str:
+        """Digest of the listing fields of a series that products depend on"""
+        values = [
+            "" if pd.isna(series.get(column)) else str(series.get(column))
+            for column in self.fingerprint_columns
+        ]
+        return hashlib.sha256(json.dumps(values).encode("utf-8")).hexdigest()[:16]
+
+    def soup(self, html_content: str) -> "BeautifulSoup":
+        """Parse HTML with the plugin's tree builder"""
+        from bs4 import BeautifulSoup
+
+        return BeautifulSoup(
+            html_content, self.setting("HTML_PARSER", self.html_parser)
+        )
+
+    async def fetch_page(
+        self,
+        url: str,
+        selector: str,
+        cache: Optional["HttpCache"] = None,
+        capture: Optional["JsonCapture"] = None,
+        conditional: bool = True,
+    ) -> "FetchedPage":
+        """Fetch a page with the plugin's fetch strategy
+
+        Fetched bodies are recorded in the current snapshot archive, and served
+        from it when the archive replays an earlier run. capture collects the
+        JSON responses of a page rendered in the browser; conditional=False
+        fetches a cached page in full.
+        """
+        from shared import fetcher
+
+        archive = current_archive()
+        if archive is not None and archive.replaying:
+            return fetcher.FetchedPage(url, archive.lookup(url))
+
+        timeout = self.navigation_timeout()
+        if self.fetch_strategy == "browser":
+            html = await fetcher.fetch_browser(url, selector, timeout, capture)
+            page = fetcher.FetchedPage(url, html)
+        else:
+            page = await fetcher.fetch_page(
+                url, selector, timeout, cache, capture, conditional
+            )
+
+        if archive is not None:
+            await archive.record(url, page.text)
+        return page
+
+    @asynccontextmanager
+    async def browser_page(
+        self, url: str, selector: str, capture: Optional["JsonCapture"] = None
+    ) -> AsyncIterator["Page"]:
+        """Lease a browser page showing url, for parsers reading the live DOM
+
+        Like fetch_page, the rendered HTML is recorded in or replayed from the
+        current snapshot archive. capture collects the JSON responses of a live
+        page load.
+        """
+        from shared.browser_pool import browser_pool
+        from shared.navigation import navigate, show_snapshot
+
+        archive = current_archive()
+        async with browser_pool.page() as page:
+            if archive is not None and archive.replaying:
+                await show_snapshot(page, archive.lookup(url))
+            else:
+                if capture is not None:
+                    capture.attach(page)
+                await navigate(page, url, selector, self.navigation_timeout())
+                if archive is not None:
+                    await archive.record(url, await page.content())
+            yield page
+
+    async def table_rows(
+        self, url: str, selector: str, rows_selector: str, rows_js: str
+    ) -> List[Optional[dict]]:
+        """Rows of a table filled in client-side, read with rows_js in the page
+
+        With an endpoint catalog current, a JSON endpoint that held exactly the
+        table rows on an earlier render is fetched over plain HTTP instead,
+        without a browser. Otherwise the page is rendered and its JSON
+        responses are matched against the rows to capture the endpoint.
+        """
+        from shared.json_endpoints import JsonCapture, current_endpoints
+
+        endpoints = current_endpoints()
+        entry = endpoints.load(url) if endpoints is not None else None
+        fetched_rows = await self.endpoint_table(url, entry)
+        if fetched_rows is not None:
+            return list(fetched_rows)
+
+        capture = JsonCapture() if endpoints is not None else None
+        async with self.browser_page(url, selector, capture) as page:
+            rows = await page.eval_on_selector_all(rows_selector, rows_js)
+
+        await self.learn_table_endpoint(
+            url, [row for row in rows if row is not None], capture, entry
+        )
+        return rows
+
+    async def endpoint_table(
+        self, url: str, entry: Optional[dict]
+    ) -> Optional[List[dict]]:
+        """Table rows of a page from its captured JSON endpoint, if that works"""
+        archive = current_archive()
+
+        # Archived renders are replayed as they were recorded
+        if entry is None or (archive is not None and archive.has(url)):
+            return None
+        try:
+            rows = await self.fetch_endpoint_rows(entry)
+            if rows:
+                return rows
+            logging.warning(f"JSON endpoint of {url} returned no rows")
+        except Exception as e:
+            logging.warning(f"JSON endpoint of {url} failed: {str(e)}")
+        return None
+
+    async def learn_table_endpoint(
+        self,
+        url: str,
+        rows: List[dict],
+        capture: Optional["JsonCapture"],
+        entry: Optional[dict],
+    ) -> None:
+        """Capture the endpoint holding the rows of a rendered table
+
+        An earlier endpoint of the page that no longer holds its rows is
+        dropped.
+        """
+        from shared.json_endpoints import current_endpoints, learn_endpoint
+
+        archive = current_archive()
+        endpoints = current_endpoints()
+        if endpoints is None or capture is None:
+            return
+        if archive is not None and archive.replaying:
+            return
+
+        captured = learn_endpoint(url, rows, await capture.responses())
+        if captured is not None:
+            endpoints.save(captured)
+        elif entry is not None:
+            endpoints.forget(url)
+
+    async def fetch_endpoint_rows(self, entry: dict) -> List[dict]:
+        """Table rows from the captured JSON endpoint of a page"""
+        from shared.json_endpoints import endpoint_rows, fetch_json
+
+        archive = current_archive()
+        endpoint_url = entry["endpoint_url"]
+        if archive is not None and archive.replaying:
+            text = archive.lookup(endpoint_url)
+        else:
+            text = await asyncio.to_thread(fetch_json, endpoint_url)
+            if archive is not None:
+                await archive.record(endpoint_url, text)
+        return endpoint_rows(entry, text)
+
+    async def scrape_series(
+        self, url: str, cache: Optional["HttpCache"] = None
+    ) -> List[dict]:
+        """Scrape the series list of a product type
+
+        Like table_rows, a series list the plain HTTP fetch cannot read is
+        taken from its captured JSON endpoint, or rendered with its JSON
+        responses captured to learn the endpoint from the parsed series.
+        """
+        from shared.json_endpoints import JsonCapture, current_endpoints
+
+        endpoints = current_endpoints()
+        entry = endpoints.load(url) if endpoints is not None else None
+        series_list = await self.endpoint_table(url, entry)
+        if series_list is not None:
+            return series_list
+
+        capture = JsonCapture() if endpoints is not None else None
+        page = await self.fetch_page(url, self.series_selector, cache, capture)
+        series_list = self.parse_series(page.text)
+        await self.learn_table_endpoint(url, series_list, capture, entry)
+        return series_list
+
+    @abc.abstractmethod
+    def parse_series(self, html_content: str) -> List[dict]:
+        """Parse a series list page"""
+
+    @abc.abstractmethod
+    def series_page_url(self, series: pd.Series) -> Optional[str]:
+        """URL of the page listing the products of a series"""
+
+    @abc.abstractmethod
+    def parse_series_page(self, html_content: str, series: pd.Series) -> List[dict]:
+        """Parse the products of one series"""
+
+    async def scrape_series_page(
+        self,
+        series: pd.Series,
+        cache: Optional["HttpCache"] = None,
+        previous_rows: Optional[List[dict]] = None,
+    ) -> List[dict]:
+        """Scrape the products of one series
+
+        previous_rows, the series' products of the last run, are kept as they
+        are when the cache reports the series page as not modified. Without
+        them there is nothing to keep, so the page is fetched in full. Fetch
+        and parse errors are raised, for scrape_products to count.
+        """
+        url = self.series_page_url(series)
+        if not url:
+            return []
+
+        page = await self.fetch_page(
+            url, self.product_selector, cache, conditional=bool(previous_rows)
+        )
+        if page.not_modified and previous_rows:
+            logging.info(f"Series page {url} not modified, keeping its products")
+            return previous_rows
+        return self.parse_series_page(page.text, series)
+
+    async def scrape_products(
+        self,
+        series_df: pd.DataFrame,
+        cache: Optional["HttpCache"] = None,
+        previous_products: Optional[pd.DataFrame] = None,
+        checkpoint: Optional[CrawlCheckpoint] = None,
+    ) -> Tuple[List[dict], List[str]]:
+        """Scrape series pages concurrently, returning products in series order
+
+        The names of the series whose page failed are returned alongside, so
+        the caller can record the products as incomplete. With a checkpoint,
+        series scraped by an interrupted earlier attempt are taken from it and
+        newly scraped series are added to it; failed series are not, so a
+        retry scrapes them again.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency())
+        delay_seconds = self.delay_seconds()
+        start_lock = asyncio.Lock()
+        last_start = [0.0]
+
+        # Products of the last run per series, reused for unchanged series
+        previous_rows = {}
+        if previous_products is not None and "series_name" in previous_products:
+            for series_name, rows in previous_products.groupby("series_name"):
+                previous_rows[str(series_name)] = rows.to_dict("records")
+
+        # Series scraped before an earlier attempt was interrupted, by index
+        resumed = checkpoint.load() if checkpoint is not None else {}
+
+        carried = [0]
+        failed_series: List[str] = []
+
+        async def scrape_limited(key, series):
+            if key in resumed:
+                return resumed[key]
+
+            rows = previous_rows.get(str(series.get(self.series_name_column)))
+            fingerprint = series.get("fingerprint")
+            if rows and fingerprint is not None:
+                previous_fingerprints = {
+                    str(row.get("series_fingerprint")) for row in rows
+                }
+                if previous_fingerprints == {str(fingerprint)}:
+                    carried[0] += 1
+                    return rows
+                # The listing changed, so the rows must be rebuilt from the page
+                # and an unchanged page is of no use: it is fetched in full.
+                # Only series listed without a fingerprint rely on the cache.
+                rows = None
+
+            async with semaphore:
+                # Space page loads out even when several slots are free
+                async with start_lock:
+                    loop = asyncio.get_running_loop()
+                    wait_seconds = last_start[0] + delay_seconds - loop.time()
+                    if wait_seconds > 0:
+                        await asyncio.sleep(wait_seconds)
+                    last_start[0] = loop.time()
+                try:
+                    products = await self.scrape_series_page(series, cache, rows)
+                except Exception as e:
+                    series_name = str(series.get(self.series_name_column, key))
+                    logging.error(
+                        f"Error scraping {self.name} series {series_name}: {str(e)}"
+                    )
+                    failed_series.append(series_name)
+                    return []
+
+            if fingerprint is not None:
+                for product in products:
+                    product["series_fingerprint"] = fingerprint
+            if checkpoint is not None:
+                await checkpoint.add(key, products)
+            return products
+
+        if resumed:
+            logging.info(
+                f"Resuming {self.name} crawl with {len(resumed)} series from the "
+                "last checkpoint"
+            )
+
+        # gather keeps input order, so the CSV does not depend on page timings
+        results = await asyncio.gather(
+            *(
+                scrape_limited(str(index), series)
+                for index, series in series_df.iterrows()
+            )
+        )
+        if carried[0]:
+            logging.info(
+                f"Kept products of {carried[0]} unchanged {self.name} series, "
+                f"scraped {len(series_df) - carried[0]}"
+            )
+        if failed_series:
+            logging.warning(
+                f"Failed to scrape {len(failed_series)} of {len(series_df)} "
+                f"{self.name} series"
+            )
+        products = [
+            product for series_products in results for product in series_products
+        ]
+        return products, failed_series
+
+    @abc.abstractmethod
+    def extract_document_data(self, text: str) -> dict:
+        """Extract the fields of a datasheet, shared by every product it covers"""
+
+    def product_details(self, product_info: pd.DataFrame) -> dict:
+        """Fields of a product taken from its scraped row, if any"""
+        return {}
@@ -0,0 +1,259 @@
+import logging
+import re
+from typing import TYPE_CHECKING, List, Optional
+
+import pandas as pd
+
+from .plugin import ManufacturerPlugin
+
+if TYPE_CHECKING:
+    from shared.http_cache import HttpCache
+
+# Series table rows of RECOM pages
+SERIES_ROW_SELECTOR = 'tr[itemscope][itemtype="https://schema.org/ListItem"]'
+
+# Reads all series rows in one round trip; rows missing a field become null
+SERIES_ROWS_JS = """
+rows => rows.map(row => {
+    const q = selector => row.querySelector(selector);
+    const fields = {
+        image_url: q(".productSeriesImage img")?.getAttribute("src"),
+        product_link: q("td:nth-child(3) a")?.getAttribute("href"),
+        product_name: q("td:nth-child(3) a span")?.innerText,
+        power: q("td:nth-child(4)")?.innerText,
+        vin: q("td:nth-child(5)")?.innerText,
+        main_vout: q("td:nth-child(6)")?.innerText,
+        mounting_type: q("td:nth-child(7)")?.innerText,
+        package_style: q("td:nth-child(8)")?.innerText,
+        datasheet_link: q("td.additional-column a.btn")?.getAttribute("href"),
+    };
+    return Object.values(fields).some(value => value == null) ? null : fields;
+})
+"""
+
+# Reads all product rows in one round trip; rows with fewer than five cells
+# become null
+PRODUCT_ROWS_JS = """
+rows => rows.map(row => {
+    const cells = Array.from(row.querySelectorAll("td"), cell => cell.innerText);
+    if (cells.length < 5) {
+        return null;
+    }
+    const link = row.querySelector("td.additional-column a.btn");
+    return {
+        product_code: cells[0],
+        description: cells[1],
+        input_voltage: cells[2],
+        output_voltage: cells[3],
+        current: cells[4],
+        datasheet_link: link ? link.getAttribute("href") : "",
+    };
+})
+"""
+
+
+class RecomPlugin(ManufacturerPlugin):
+    """RECOM Power, whose tables are read inside the rendered page"""
+
+    name = "recom"
+    series_urls = {
+        "dc-dc-converters": "https://recom-power.com/en/products/dc-dc-converters/rec-c-dc-dc-converters.html",
+        "ac-dc-power-supplies": "https://recom-power.com/en/products/ac-dc-power-supplies/rec-c-ac-dc-power-supplies.html",
+    }
+    fetch_strategy = "browser"
+    series_selector = SERIES_ROW_SELECTOR
+    product_selector = "table.productTable"
+    series_concurrency = 4
+    series_name_column = "product_name"
+    fingerprint_columns = [
+        "power",
+        "vin",
+        "main_vout",
+        "mounting_type",
+        "package_style",
+        "datasheet_link",
+        "product_link",
+    ]
+    series_delay_seconds = 0.5
+    navigation_timeout_ms = 30000
+
+    async def scrape_series(
+        self, url: str, cache: Optional["HttpCache"] = None
+    ) -> List[dict]:
+        """Scrape RECOM power series, extracting all rows at once in the page"""
+        rows = await self.table_rows(
+            url, self.series_selector, self.series_selector, SERIES_ROWS_JS
+        )
+        return self.complete_series(rows)
+
+    def parse_series(self, html_content: str) -> List[dict]:
+        """Parse RECOM series from a rendered page, like SERIES_ROWS_JS"""
+        rows = []
+        for row in self.soup(html_content).select(self.series_selector):
+            image = row.select_one(".productSeriesImage img")
+            link = row.select_one("td:nth-child(3) a")
+            name = row.select_one("td:nth-child(3) a span")
+            datasheet = row.select_one("td.additional-column a.btn")
+            fields = {
+                "image_url": image.get("src") if image else None,
+                "product_link": link.get("href") if link else None,
+                "product_name": name.get_text(strip=True) if name else None,
+                **{
+                    column: cell.get_text(strip=True) if cell else None
+                    for column, cell in [
+                        ("power", row.select_one("td:nth-child(4)")),
+                        ("vin", row.select_one("td:nth-child(5)")),
+                        ("main_vout", row.select_one("td:nth-child(6)")),
+                        ("mounting_type", row.select_one("td:nth-child(7)")),
+                        ("package_style", row.select_one("td:nth-child(8)")),
+                    ]
+                },
+                "datasheet_link": datasheet.get("href") if datasheet else None,
+            }
+            rows.append(
+                None if any(value is None for value in fields.values()) else fields
+            )
+        return self.complete_series(rows)
+
+    def complete_series(self, rows: List[Optional[dict]]) -> List[dict]:
+        """Series rows with every field, skipping the incomplete ones"""
+        series_list = [row for row in rows if row is not None]
+        if len(series_list) < len(rows):
+            logging.warning(
+                f"Skipped {len(rows) - len(series_list)} incomplete RECOM series rows"
+            )
+        return series_list
+
+    def series_page_url(self, series: pd.Series) -> Optional[str]:
+        """URL of the page listing the products of a series"""
+        url = series.get("product_link")
+        return url if isinstance(url, str) and url else None
+
+    async def scrape_series_page(
+        self,
+        series: pd.Series,
+        cache: Optional["HttpCache"] = None,
+        previous_rows: Optional[List[dict]] = None,
+    ) -> List[dict]:
+        """Scrape RECOM products of one series"""
+        # The product table is filled in by scripts, so the HTML shell the
+        # cache validates tells nothing about changes and every page is rendered
+        url = self.series_page_url(series)
+        if not url:
+            return []
+
+        # Extract all product rows of the series page at once
+        rows = await self.table_rows(
+            url,
+            self.product_selector,
+            f"{self.product_selector} tbody tr",
+            PRODUCT_ROWS_JS,
+        )
+        return self.series_products(rows, series)
+
+    def parse_series_page(self, html_content: str, series: pd.Series) -> List[dict]:
+        """Parse RECOM products of one series from a rendered page, like
+        PRODUCT_ROWS_JS"""
+        product_table = self.soup(html_content).select_one(self.product_selector)
+        if not product_table:
+            return []
+
+        rows: List[Optional[dict]] = []
+        for row in product_table.select("tbody tr"):
+            cells = [cell.get_text(strip=True) for cell in row.select("td")]
+            if len(cells) < 5:
+                rows.append(None)
+                continue
+            link = row.select_one("td.additional-column a.btn")
+            rows.append(
+                {
+                    "product_code": cells[0],
+                    "description": cells[1],
+                    "input_voltage": cells[2],
+                    "output_voltage": cells[3],
+                    "current": cells[4],
+                    "datasheet_link": link.get("href") if link else "",
+                }
+            )
+        return self.series_products(rows, series)
+
+    def series_products(
+        self, rows: List[Optional[dict]], series: pd.Series
+    ) -> List[dict]:
+        """Products of a series from its product table rows"""
+        series_products = []
+        for row in rows:
+            try:
+                # Skip header or invalid rows
+                if row is None:
+                    continue
+
+                product = {
+                    "series_name": series["product_name"],
+                    "product_code": row["product_code"],
+                    "description": row["description"],
+                    "input_voltage": row["input_voltage"],
+                    "output_voltage": row["output_voltage"],
+                    "current": row["current"],
+                    "datasheet_link": row["datasheet_link"] or "",
+                    "series_power": series["power"],
+                    "series_mounting_type": series["mounting_type"],
+                    "series_package_style": series["package_style"],
+                }
+
+                series_products.append(product)
+            except Exception as e:
+                logging.warning(f"Error processing product row: {str(e)}")
+                continue
+
+        logging.info(
+            f"Scraped {len(series_products)} products from {series['product_name']}"
+        )
+        return series_products
+
+    def extract_document_data(self, text: str) -> dict:
+        """Extract structured data from RECOM PDF text"""
+        data = {}
+
+        # Extract common specifications
+        input_voltage_pattern = (
+            r"Input voltage range\s*[:]\s*([\d\.\-]+)\s*to\s*([\d\.]+)\s*V"
+        )
+        output_voltage_pattern = r"Output voltage\s*[:]\s*([\d\.]+)\s*V"
+        efficiency_pattern = r"Efficiency\s*[:]\s*([\d\.]+)\s*%"
+        isolation_pattern = r"I/O isolation\s*[:]\s*([\d\.]+)\s*V"
+
+        input_match = re.search(input_voltage_pattern, text)
+        if input_match:
+            data["input_voltage_min"] = input_match.group(1)
+            data["input_voltage_max"] = input_match.group(2)
+
+        output_match = re.search(output_voltage_pattern, text)
+        if output_match:
+            data["output_voltage"] = output_match.group(1)
+
+        efficiency_match = re.search(efficiency_pattern, text)
+        if efficiency_match:
+            data["efficiency"] = efficiency_match.group(1)
+
+        isolation_match = re.search(isolation_pattern, text)
+        if isolation_match:
+            data["isolation"] = isolation_match.group(1)
+
+        return data
+
+    def product_details(self, product_info: pd.DataFrame) -> dict:
+        """Basic info of a product from its scraped row, if available"""
+        data = {}
+        if not product_info.empty:
+            product = product_info.iloc[0]
+            data["series_name"] = product.get("series_name", "")
+            data["description"] = product.get("description", "")
+            data["series_power"] = product.get("series_power", "")
+            data["series_mounting_type"] = product.get("series_mounting_type", "")
+            data["series_package_style"] = product.get("series_package_style", "")
+
+        return data
+
+
+plugin = RecomPlugin()
@@ -0,0 +1,226 @@
+import logging
+import re
+from typing import List, Optional
+
+import pandas as pd
+
+from .plugin import ManufacturerPlugin
+
+
+class TracoPlugin(ManufacturerPlugin):
+    """Traco Power, whose pages are rendered on the server"""
+
+    name = "traco"
+    series_urls = {
+        "dc-dc-converters": "https://www.tracopower.com/product-finder/dc-dc",
+        "ac-dc-power-supplies": "https://www.tracopower.com/product-finder/ac-dc",
+    }
+    fetch_strategy = "http"
+    series_selector = "div.series-container article.series"
+    product_selector = "table.models"
+    series_concurrency = 2
+    series_name_column = "product_series"
+    fingerprint_columns = [
+        "series_power_variants",
+        "series_input_voltage_variants",
+        "series_output_voltage_variants",
+        "series_short_description",
+        "datasheet_link",
+        "series_url",
+    ]
+    series_delay_seconds = 1.0
+    navigation_timeout_ms = 20000
+
+    def parse_series(self, html_content: str) -> List[dict]:
+        """Parse Traco Power series from webpage"""
+        soup = self.soup(html_content)
+
+        articles = soup.select(self.series_selector)
+        series_list = []
+
+        for article in articles:
+            data: dict = {}
+
+            # Product Series
+            product_series = article.select_one(".col-1 .product-title a")
+            if product_series:
+                data["product_series"] = product_series.text
+                href = str(product_series["href"])
+                data["series_url"] = (
+                    "https://www.tracopower.com" + href if "/series/" in href else None
+                )
+
+            # Power
+            power = article.select_one(
+                ".col-2 .field--name-field-power"
+            ) or article.select_one(".col-2 .field--name-field-power-superseries")
+            data["series_power_variants"] = power.text if power else None
+
+            # Input/Output voltages and other info
+            input_voltage = article.select_one(
+                ".col-3 .field--name-field-input-voltage"
+            )
+            data["series_input_voltage_variants"] = (
+                input_voltage.text if input_voltage else None
+            )
+
+            output_voltage = article.select_one(
+                ".col-4 .field--name-field-output-voltage"
+            )
+            data["series_output_voltage_variants"] = (
+                output_voltage.text if output_voltage else None
+            )
+
+            short_description = article.select_one(
+                ".col-5 .field--name-field-short-description"
+            )
+            data["series_short_description"] = (
+                short_description.text.strip() if short_description else None
+            )
+
+            datasheet = article.select_one(".col-6 .field--name-field-datasheets a")
+            data["datasheet_link"] = (
+                "https://www.tracopower.com" + str(datasheet["href"])
+                if datasheet
+                else None
+            )
+
+            # Images
+            dimensions_img = article.select_one(".image-dimensions img")
+            data["dimensions_image"] = (
+                "https://www.tracopower.com" + str(dimensions_img["src"])
+                if dimensions_img
+                else None
+            )
+
+            pinout_img = article.select_one(".image-pinout img")
+            data["pinout_image"] = (
+                "https://www.tracopower.com" + str(pinout_img["src"])
+                if pinout_img
+                else None
+            )
+
+            series_list.append(data)
+
+        return series_list
+
+    def series_page_url(self, series: pd.Series) -> Optional[str]:
+        """URL of the page listing the products of a series"""
+        url = series.get("series_url")
+        return url if isinstance(url, str) and url else None
+
+    def parse_series_page(self, html_content: str, series: pd.Series) -> List[dict]:
+        """Parse Traco products of one series"""
+        soup = self.soup(html_content)
+
+        # Find the products table
+        product_table = soup.select_one(self.product_selector)
+        if not product_table:
+            return []
+
+        # Get all product rows
+        rows = product_table.select("tbody tr")
+
+        series_products = []
+        for row in rows:
+            try:
+                cells = row.select("td")
+                if len(cells) < 5:
+                    continue
+
+                part_number = cells[0].select_one("a")
+                part_number_text = part_number.text.strip() if part_number else ""
+
+                input_voltage = cells[1].text.strip() if len(cells) > 1 else ""
+                output_voltage = cells[2].text.strip() if len(cells) > 2 else ""
+                power = cells[3].text.strip() if len(cells) > 3 else ""
+                efficiency = cells[4].text.strip() if len(cells) > 4 else ""
+
+                datasheet_link = ""
+                datasheets = soup.select(".field--name-field-datasheets a")
+                if datasheets:
+                    datasheet_link = "https://www.tracopower.com" + str(
+                        datasheets[0]["href"]
+                    )
+
+                product = {
+                    "series_name": series.get("product_series", ""),
+                    "product_code": part_number_text,
+                    "input_voltage": input_voltage,
+                    "output_voltage": output_voltage,
+                    "power": power,
+                    "efficiency": efficiency,
+                    "datasheet_link": datasheet_link,
+                    "series_power_variants": series.get("series_power_variants", ""),
+                    "series_input_voltage_variants": series.get(
+                        "series_input_voltage_variants", ""
+                    ),
+                    "series_output_voltage_variants": series.get(
+                        "series_output_voltage_variants", ""
+                    ),
+                    "series_description": series.get("series_short_description", ""),
+                }
+
+                series_products.append(product)
+            except Exception as e:
+                logging.warning(f"Error processing Traco product row: {str(e)}")
+                continue
+
+        logging.info(
+            f"Scraped {len(series_products)} products from {series.get('product_series', 'unknown')}"
+        )
+        return series_products
+
+    def extract_document_data(self, text: str) -> dict:
+        """Extract structured data from Traco PDF text"""
+        data = {}
+
+        # Extract common specifications
+        input_voltage_pattern = (
+            r"Input voltage range\s*[:]\s*([\d\.\-]+)\s*to\s*([\d\.]+)\s*V"
+        )
+        output_voltage_pattern = r"Output voltage\s*[:]\s*([\d\.]+)\s*V"
+        max_power_pattern = r"Maximum output power\s*[:]\s*([\d\.]+)\s*W"
+        isolation_pattern = r"Isolation test voltage\s*[:]\s*([\d\.]+)\s*V"
+        temperature_pattern = (
+            r"Operating temperature range\s*[:]\s*([\-\d\.]+)\s*to\s*([\d\.]+)\s*°C"
+        )
+
+        input_match = re.search(input_voltage_pattern, text)
+        if input_match:
+            data["input_voltage_min"] = input_match.group(1)
+            data["input_voltage_max"] = input_match.group(2)
+
+        output_match = re.search(output_voltage_pattern, text)
+        if output_match:
+            data["output_voltage"] = output_match.group(1)
+
+        power_match = re.search(max_power_pattern, text)
+        if power_match:
+            data["max_power"] = power_match.group(1)
+
+        isolation_match = re.search(isolation_pattern, text)
+        if isolation_match:
+            data["isolation"] = isolation_match.group(1)
+
+        temp_match = re.search(temperature_pattern, text)
+        if temp_match:
+            data["operating_temp_min"] = temp_match.group(1)
+            data["operating_temp_max"] = temp_match.group(2)
+
+        return data
+
+    def product_details(self, product_info: pd.DataFrame) -> dict:
+        """Basic info of a product from its scraped row, if available"""
+        data = {}
+        if not product_info.empty:
+            product = product_info.iloc[0]
+            data["series_name"] = product.get("series_name", "")
+            data["efficiency"] = product.get("efficiency", "")
+            data["power"] = product.get("power", "")
+            data["series_description"] = product.get("series_description", "")
+
+        return data
+
+
+plugin = TracoPlugin()
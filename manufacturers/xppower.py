@@ -0,0 +1,188 @@
+import logging
+import re
+from typing import List, Optional
+
+import pandas as pd
+
+from .plugin import ManufacturerPlugin
+
+
+class XPPowerPlugin(ManufacturerPlugin):
+    """XP Power, whose pages are rendered on the server"""
+
+    name = "xppower"
+    series_urls = {
+        "dc-dc-converters": "https://www.xppower.com/products/dc-dc-converters",
+        "ac-dc-power-supplies": "https://www.xppower.com/products/ac-dc-power-supplies",
+    }
+    fetch_strategy = "http"
+    series_selector = "#products-table__table tbody tr"
+    product_selector = "table.variations-table"
+    series_concurrency = 4
+    series_name_column = "productCode"
+    fingerprint_columns = ["power", "phase", "voltage", "current", "datasheet", "url"]
+    series_delay_seconds = 0.5
+    navigation_timeout_ms = 30000
+
+    def parse_series(self, html_content: str) -> List[dict]:
+        """Parse XP Power series from webpage"""
+        # Get all series rows
+        rows = self.soup(html_content).select(self.series_selector)
+        series_list = []
+
+        for soup in rows:
+            try:
+                img_elem = soup.find("img")
+                name_elem = (
+                    soup.find_all("a")[1] if len(soup.find_all("a")) > 1 else None
+                )
+                power_elem = (
+                    soup.find_all("td")[2] if len(soup.find_all("td")) > 2 else None
+                )
+                phase_elem = (
+                    soup.find_all("td")[3] if len(soup.find_all("td")) > 3 else None
+                )
+                voltage_elem = (
+                    soup.find_all("td")[4] if len(soup.find_all("td")) > 4 else None
+                )
+                current_elem = (
+                    soup.find_all("td")[5] if len(soup.find_all("td")) > 5 else None
+                )
+                datasheet_elem = soup.find(
+                    lambda tag: tag.name == "a" and "Datasheet" in tag.text
+                )
+
+                series_list.append(
+                    {
+                        "image": img_elem["src"]
+                        if img_elem and img_elem.has_attr("src")
+                        else "",
+                        "productCode": name_elem.get_text(strip=True)
+                        if name_elem
+                        else "",
+                        "url": name_elem["href"]
+                        if name_elem and name_elem.has_attr("href")
+                        else "",
+                        "power": power_elem.get_text(strip=True) if power_elem else "",
+                        "phase": phase_elem.get_text(strip=True) if phase_elem else "",
+                        "voltage": voltage_elem.get_text(strip=True)
+                        if voltage_elem
+                        else "",
+                        "current": current_elem.get_text(strip=True)
+                        if current_elem
+                        else "",
+                        "datasheet": datasheet_elem["href"]
+                        if datasheet_elem and datasheet_elem.has_attr("href")
+                        else "",
+                    }
+                )
+            except Exception as e:
+                logging.warning(f"Error processing row: {str(e)}")
+                continue
+
+        return series_list
+
+    def series_page_url(self, series: pd.Series) -> Optional[str]:
+        """URL of the page listing the products of a series"""
+        # Series without a link are read back from the CSV as NaN
+        url = series.get("url")
+        if not isinstance(url, str) or not url:
+            return None
+        return "https://www.xppower.com" + url if not url.startswith("http") else url
+
+    def parse_series_page(self, html_content: str, series: pd.Series) -> List[dict]:
+        """Parse XP Power products of one series"""
+        soup = self.soup(html_content)
+
+        # Find the products table
+        product_table = soup.select_one(self.product_selector)
+        if not product_table:
+            return []
+
+        # Get all product rows
+        rows = product_table.select("tbody tr")
+
+        series_products = []
+        for row in rows:
+            try:
+                cells = row.select("td")
+                if len(cells) < 3:
+                    continue
+
+                model = cells[0].text.strip() if len(cells) > 0 else ""
+                input_voltage = cells[1].text.strip() if len(cells) > 1 else ""
+                output_voltage = cells[2].text.strip() if len(cells) > 2 else ""
+
+                # Use series datasheet for all products
+                datasheet_link = series.get("datasheet", "")
+                if datasheet_link and not datasheet_link.startswith("http"):
+                    datasheet_link = "https://www.xppower.com" + datasheet_link
+
+                product = {
+                    "series_name": series.get("productCode", ""),
+                    "product_code": model,
+                    "input_voltage": input_voltage,
+                    "output_voltage": output_voltage,
+                    "power": series.get("power", ""),
+                    "phase": series.get("phase", ""),
+                    "voltage": series.get("voltage", ""),
+                    "current": series.get("current", ""),
+                    "datasheet_link": datasheet_link,
+                }
+
+                series_products.append(product)
+            except Exception as e:
+                logging.warning(f"Error processing XP Power product row: {str(e)}")
+                continue
+
+        logging.info(
+            f"Scraped {len(series_products)} products from {series.get('productCode', 'unknown')}"
+        )
+        return series_products
+
+    def extract_document_data(self, text: str) -> dict:
+        """Extract structured data from XP Power PDF text"""
+        data = {}
+
+        # Extract common specifications
+        input_voltage_pattern = (
+            r"Input Voltage Range\s*[:]\s*([\d\.\-]+)\s*to\s*([\d\.]+)\s*V"
+        )
+        output_voltage_pattern = r"Output Voltage\s*[:]\s*([\d\.]+)\s*V"
+        power_pattern = r"Output Power\s*[:]\s*([\d\.]+)\s*W"
+        efficiency_pattern = r"Efficiency\s*[:]\s*([\d\.]+)\s*%"
+
+        input_match = re.search(input_voltage_pattern, text)
+        if input_match:
+            data["input_voltage_min"] = input_match.group(1)
+            data["input_voltage_max"] = input_match.group(2)
+
+        output_match = re.search(output_voltage_pattern, text)
+        if output_match:
+            data["output_voltage"] = output_match.group(1)
+
+        power_match = re.search(power_pattern, text)
+        if power_match:
+            data["output_power"] = power_match.group(1)
+
+        efficiency_match = re.search(efficiency_pattern, text)
+        if efficiency_match:
+            data["efficiency"] = efficiency_match.group(1)
+
+        return data
+
+    def product_details(self, product_info: pd.DataFrame) -> dict:
+        """Basic info of a product from its scraped row, if available"""
+        data = {}
+        if not product_info.empty:
+            product = product_info.iloc[0]
+            data["series_name"] = product.get("series_name", "")
+            data["power"] = product.get("power", "")
+            data["phase"] = product.get("phase", "")
+            data["voltage"] = product.get("voltage", "")
+            data["current"] = product.get("current", "")
+
+        return data
+
+
+plugin = XPPowerPlugin()
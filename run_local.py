@@ -0,0 +1,323 @@
+"""Run the extraction pipeline in-process, without the Durable Functions host.
+
+The orchestrator generators from blueprints/orchestrator.py are driven by a local
+context that executes every activity synchronously on a filesystem or in-memory
+storage backend, and a timing breakdown per stage is printed at the end.
+
+Examples:
+    uv run run_local.py --manufacturer traco --product-types dc-dc-converters
+    uv run run_local.py --memory --fixtures recorded/ --replay scrape_series
+    uv run run_local.py --manufacturer traco --replay-snapshots
+"""
+
+import argparse
+import json
+import logging
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from shared.environment import AzureEnvironment
+from shared.governor import GOVERNOR_ENTITY_NAME, governor_entity_operation
+from shared.manifest import MANIFEST_STEP_NAME, PIPELINE_STEPS, manifest_file_name
+from shared.storage import AzureStorage, LocalStorage, MemoryStorage
+
+# Stage each activity is accounted to in the timing breakdown
+ACTIVITY_STAGES = {
+    "plan_product_shards": "scrape_products",
+    "scrape_products_shard": "scrape_products",
+    "merge_product_shards": "scrape_products",
+    "merge_pdf_shards": "extract_pdf_data",
+    "check_step_manifest": "manifests",
+    "write_run_report": "reports",
+}
+
+# Operations of the entities, applied to state kept by the runner
+ENTITY_OPERATIONS = {GOVERNOR_ENTITY_NAME: governor_entity_operation}
+
+
+def load_activities() -> Dict[str, Any]:
+    """Collect activity functions from all blueprints by function name"""
+    import function_app  # noqa: F401 - registers all blueprints
+    from blueprints import (
+        data_processor,
+        manifests,
+        pdf_handler,
+        product_scraper,
+        reports,
+        series_scraper,
+    )
+
+    activities = {}
+    for module in [
+        series_scraper,
+        product_scraper,
+        pdf_handler,
+        data_processor,
+        manifests,
+        reports,
+    ]:
+        for builder in module.bp._function_builders:
+            function = builder._function
+            if type(function.get_trigger()).__name__ == "ActivityTrigger":
+                activities[function.get_function_name()] = function.get_user_function()
+    return activities
+
+
+class LocalTask:
+    """Completed task returned by the local orchestration context"""
+
+    def __init__(self, result: Any):
+        self.result = result
+
+
+class LocalOrchestrationContext:
+    """Executes orchestrator calls synchronously in the current process"""
+
+    def __init__(self, runner: "LocalRunner", input: Any, instance_id: str):
+        self.runner = runner
+        self._input = input
+        self.instance_id = instance_id
+        self.custom_status = None
+
+    @property
+    def current_utc_datetime(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    def get_input(self) -> Any:
+        return self._input
+
+    def call_activity(self, name: str, input_: Any = None) -> LocalTask:
+        return LocalTask(self.runner.run_activity(name, input_))
+
+    def call_activity_with_retry(
+        self, name: str, retry_options: Any, input_: Any = None
+    ) -> LocalTask:
+        # Retries run at once, there is no host whose recycle they would wait for
+        for _ in range(1, retry_options.max_number_of_attempts):
+            try:
+                return self.call_activity(name, input_)
+            except Exception:
+                continue
+        return self.call_activity(name, input_)
+
+    def call_entity(self, entity_id: Any, operation: str, input_: Any = None):
+        return LocalTask(self.runner.run_entity(entity_id, operation, input_))
+
+    def signal_entity(self, entity_id: Any, operation: str, input_: Any = None):
+        self.runner.run_entity(entity_id, operation, input_)
+
+    def call_sub_orchestrator(
+        self, name: str, input_: Any = None, instance_id: Optional[str] = None
+    ) -> LocalTask:
+        return LocalTask(
+            self.runner.run_orchestration(
+                name, input_, instance_id or str(uuid.uuid4())
+            )
+        )
+
+    def task_all(self, tasks: List[LocalTask]) -> LocalTask:
+        return LocalTask([task.result for task in tasks])
+
+    def task_any(self, tasks: List[LocalTask]) -> LocalTask:
+        return LocalTask(tasks[0])
+
+    def set_custom_status(self, status: Any) -> None:
+        self.custom_status = status
+
+
+class LocalRunner:
+    """Runs the pipeline orchestration in-process and records activity timings"""
+
+    def __init__(
+        self,
+        storage: AzureStorage,
+        fixtures: Optional[AzureStorage] = None,
+        replay_steps: Optional[List[str]] = None,
+    ):
+        from blueprints.orchestrator import ORCHESTRATIONS
+
+        self.storage = storage
+        self.fixtures = fixtures
+        self.replay_steps = set(replay_steps or [])
+        self.orchestrations = ORCHESTRATIONS
+        self.activities = load_activities()
+        self.timings: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"calls": 0, "seconds": 0.0}
+        )
+        self.entity_states: Dict[tuple, dict] = {}
+
+        # Activities create their own AzureEnvironment, so share the storage
+        AzureEnvironment.default_storage = storage
+
+    def run_orchestration(self, name: str, input: Any, instance_id: str) -> Any:
+        """Drive an orchestrator generator to completion"""
+        context = LocalOrchestrationContext(self, input, instance_id)
+        generator = self.orchestrations[name](context)
+
+        value = None
+        try:
+            while True:
+                task = generator.send(value)
+                value = task.result
+        except StopIteration as stop:
+            return stop.value
+
+    def run_entity(self, entity_id: Any, operation: str, input: Any) -> Any:
+        """Apply an entity operation to state kept for the lifetime of the runner"""
+        key = (entity_id.name, entity_id.key)
+        state, result = ENTITY_OPERATIONS[entity_id.name](
+            self.entity_states.get(key, {}), operation, input
+        )
+        self.entity_states[key] = state
+        return result
+
+    def run_activity(self, name: str, input: Any) -> Any:
+        """Run an activity function, or replay its recorded outputs"""
+        stage = ACTIVITY_STAGES.get(name, name)
+        start = time.perf_counter()
+
+        if stage in self.replay_steps:
+            result = self.replay_step(stage, input)
+        else:
+            result = self.activities[name](input)
+
+        timing = self.timings[stage]
+        timing["calls"] += 1
+        timing["seconds"] += time.perf_counter() - start
+        return result
+
+    def replay_step(self, step: str, input: dict) -> dict:
+        """Copy a step's recorded outputs and manifest from the fixtures storage"""
+        manufacturer = input["manufacturer"]
+        product_type = input["product_type"]
+        step_name = f"{manufacturer}{PIPELINE_STEPS.index(step) + 1}_{step}"
+        if self.fixtures is None:
+            raise ValueError(f"Replaying {step} needs a fixtures storage")
+
+        copied = 0
+        for file_name in self.fixtures.list_files(step_name, product_type):
+            with self.fixtures.read_mutable_data(step_name, file_name) as f:
+                self.storage.write_mutable_data(step_name, file_name, f.read())
+            copied += 1
+
+        manifest_file = manifest_file_name(manufacturer, product_type, step)
+        if self.fixtures.mutable_data_exists(MANIFEST_STEP_NAME, manifest_file):
+            self.storage.save_json(
+                MANIFEST_STEP_NAME,
+                manifest_file,
+                self.fixtures.load_json(MANIFEST_STEP_NAME, manifest_file),
+            )
+
+        return {
+            "success": copied > 0,
+            "replayed": True,
+            "manufacturer": manufacturer,
+            "product_type": product_type,
+            "count": copied,
+            "step_name": step_name,
+        }
+
+    def print_timings(self) -> None:
+        """Print the timing breakdown per stage"""
+        total = sum(timing["seconds"] for timing in self.timings.values()) or 1.0
+        print(f"{'stage':<26}{'calls':>7}{'seconds':>11}{'share':>8}")
+        for stage, timing in sorted(
+            self.timings.items(), key=lambda item: -item[1]["seconds"]
+        ):
+            print(
+                f"{stage:<26}{timing['calls']:>7}{timing['seconds']:>11.2f}"
+                f"{timing['seconds'] / total:>8.1%}"
+            )
+        print(f"{'total':<26}{'':>7}{total:>11.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--manufacturer", default="recom")
+    parser.add_argument("--manufacturers", nargs="+")
+    parser.add_argument(
+        "--product-types",
+        nargs="+",
+        default=["dc-dc-converters", "ac-dc-power-supplies"],
+    )
+    parser.add_argument(
+        "--storage", default=".local_storage", help="Filesystem storage root"
+    )
+    parser.add_argument(
+        "--memory", action="store_true", help="Use in-memory storage instead"
+    )
+    parser.add_argument(
+        "--fixtures", help="Filesystem storage root with recorded step outputs"
+    )
+    parser.add_argument(
+        "--replay",
+        action="append",
+        default=[],
+        choices=PIPELINE_STEPS,
+        help="Replace a step with its recorded outputs from --fixtures",
+    )
+    parser.add_argument(
+        "--replay-snapshots",
+        nargs="?",
+        const=True,
+        metavar="RUN_ID",
+        help="Parse the archived pages of a run (default: the latest) offline",
+    )
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--no-shards", action="store_true")
+    parser.add_argument("--product-shard-size", type=int)
+    parser.add_argument("--max-concurrent-shards", type=int)
+    parser.add_argument("--output", help="Write the orchestration result as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.replay and not args.fixtures:
+        parser.error("--replay requires --fixtures")
+
+    storage = MemoryStorage() if args.memory else LocalStorage(args.storage)
+    fixtures = LocalStorage(args.fixtures) if args.fixtures else None
+
+    orchestrator_input = {
+        "manufacturer": args.manufacturer,
+        "product_types": args.product_types,
+        "streaming": args.streaming,
+        "force": args.force,
+        "shard_products": not args.no_shards,
+    }
+    if args.manufacturers:
+        orchestrator_input["manufacturers"] = args.manufacturers
+    if args.product_shard_size:
+        orchestrator_input["product_shard_size"] = args.product_shard_size
+    if args.max_concurrent_shards:
+        orchestrator_input["max_concurrent_shards"] = args.max_concurrent_shards
+    if args.replay_snapshots:
+        orchestrator_input["replay_snapshots"] = args.replay_snapshots
+
+    # Recorded outputs replace whole steps, so steps 2-4 must not run as shards
+    if {"scrape_products", "download_pdfs", "extract_pdf_data"} & set(args.replay):
+        orchestrator_input["shard_products"] = False
+        orchestrator_input["streaming"] = False
+
+    runner = LocalRunner(storage, fixtures, args.replay)
+
+    start = time.perf_counter()
+    result = runner.run_orchestration(
+        "orchestrator", orchestrator_input, f"local-{uuid.uuid4().hex[:8]}"
+    )
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+    runner.print_timings()
+    print(f"wall time: {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import asyncio
+import atexit
+import contextvars
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional
+
+from playwright.async_api import (
+    Browser,
+    BrowserContext,
+    Page,
+    Playwright,
+    async_playwright,
+)
+
+# Pages open at once across all activities of a worker process
+MAX_PAGES = int(os.environ.get("BROWSER_POOL_MAX_PAGES", "4"))
+
+# Pages served by one context before it is closed, dropping cookies and cache
+MAX_CONTEXT_USES = int(os.environ.get("BROWSER_POOL_MAX_CONTEXT_USES", "20"))
+
+# Pages served by one browser before it is relaunched, bounding its memory
+MAX_BROWSER_USES = int(os.environ.get("BROWSER_POOL_MAX_BROWSER_USES", "500"))
+
+
+class PooledContext:
+    """Browser context handed out to one page lease at a time"""
+
+    def __init__(self, context: BrowserContext, browser: Browser):
+        self.context = context
+        self.browser = browser
+        self.uses = 0
+
+
+class BrowserPool:
+    """Warm Chromium shared by all activity invocations of a worker process
+
+    Playwright objects are bound to the event loop that created them, so the
+    pool runs its own loop in a background thread and activities submit their
+    scraping coroutines with run() instead of asyncio.run().
+    """
+
+    def __init__(
+        self,
+        max_pages: int = MAX_PAGES,
+        max_context_uses: int = MAX_CONTEXT_USES,
+        max_browser_uses: int = MAX_BROWSER_USES,
+    ):
+        self.max_pages = max_pages
+        self.max_context_uses = max_context_uses
+        self.max_browser_uses = max_browser_uses
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+        # Loop-bound state, only touched from the pool's loop; asyncio
+        # primitives bind to the loop that first waits on them
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._browser_uses = 0
+        self._browser_lock = asyncio.Lock()
+        self._page_slots = asyncio.Semaphore(self.max_pages)
+        self._idle_contexts: List[PooledContext] = []
+        # Pages leased per browser; a retired browser is closed with its last
+        self._leases: Dict[Browser, int] = {}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._thread_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="browser-pool", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def run(self, coroutine: Awaitable[Any]) -> Any:
+        """Run a coroutine on the pool's loop and wait for its result"""
+        loop = self._ensure_loop()
+
+        # Keep the caller's context variables, e.g. activity metrics
+        context = contextvars.copy_context()
+        future = asyncio.run_coroutine_threadsafe(
+            self._run_in_context(coroutine, context), loop
+        )
+        return future.result()
+
+    @staticmethod
+    async def _run_in_context(coroutine, context: contextvars.Context):
+        return await asyncio.get_running_loop().create_task(coroutine, context=context)
+
+    async def _get_browser(self) -> Browser:
+        async with self._browser_lock:
+            if self._browser is not None and not self._browser.is_connected():
+                logging.warning("Pooled browser disconnected, relaunching")
+                self._browser = None
+                self._idle_contexts = []
+
+            if self._browser is None:
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                self._browser_uses = 0
+                logging.info("Launched pooled browser")
+
+            return self._browser
+
+    def _retire_browser(self, browser: Browser) -> None:
+        """Stop leasing a browser once it has served its share of pages"""
+        if self._browser is browser:
+            self._browser = None
+            self._idle_contexts = []
+
+    async def _release_browser(self, browser: Browser) -> None:
+        """Drop a lease, closing a retired browser once no page is left on it"""
+        self._leases[browser] -= 1
+        if self._leases[browser] > 0 or browser is self._browser:
+            return
+        del self._leases[browser]
+        try:
+            await browser.close()
+        except Exception as e:
+            logging.warning(f"Error closing retired browser: {str(e)}")
+
+    async def _acquire_context(self) -> PooledContext:
+        browser = await self._get_browser()
+        self._leases[browser] = self._leases.get(browser, 0) + 1
+        try:
+            while self._idle_contexts:
+                pooled = self._idle_contexts.pop()
+                if pooled.browser is browser:
+                    return pooled
+            return PooledContext(await browser.new_context(), browser)
+        except BaseException:
+            await self._release_browser(browser)
+            raise
+
+    async def _release_context(self, pooled: PooledContext) -> None:
+        pooled.uses += 1
+
+        # Contexts of a retired browser are closed along with it
+        if pooled.browser is self._browser:
+            self._browser_uses += 1
+            if self._browser_uses >= self.max_browser_uses:
+                self._retire_browser(pooled.browser)
+            elif pooled.uses >= self.max_context_uses:
+                await pooled.context.close()
+            else:
+                self._idle_contexts.append(pooled)
+        await self._release_browser(pooled.browser)
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """Lease a fresh page in an isolated, reused context"""
+        await self._get_browser()
+        async with self._page_slots:
+            pooled = await self._acquire_context()
+            try:
+                page = await pooled.context.new_page()
+                try:
+                    yield page
+                finally:
+                    await page.close()
+            finally:
+                await self._release_context(pooled)
+
+    async def _close(self) -> None:
+        # Retired browsers still leased are closed too
+        browsers = set(self._leases)
+        if self._browser is not None:
+            browsers.add(self._browser)
+        for browser in browsers:
+            await browser.close()
+        self._browser = None
+        self._leases = {}
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        self._idle_contexts = []
+
+    def close(self) -> None:
+        """Close the browser and stop the pool's loop"""
+        if self._loop is None or self._thread is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), self._loop).result(30)
+        except Exception as e:
+            logging.warning(f"Error closing browser pool: {str(e)}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+        self._browser_lock = asyncio.Lock()
+        self._page_slots = asyncio.Semaphore(self.max_pages)
+
+
+# Pool of the current worker process, kept warm between activity invocations
+browser_pool = BrowserPool()
+atexit.register(browser_pool.close)
@@ -0,0 +1,72 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from .storage import AzureStorage
+
+# Step name under which the progress of product crawls is stored
+CHECKPOINT_STEP_NAME = "_checkpoints"
+
+# Series scraped between two checkpoint writes
+CHECKPOINT_EVERY_SERIES = int(os.environ.get("CRAWL_CHECKPOINT_SERIES", "10"))
+
+
+class CrawlCheckpoint:
+    """Product rows of the series a crawl has scraped so far
+
+    Rows are saved every few series per run and part (the whole series list or
+    one shard), so a retried activity of the same run resumes where the
+    interrupted attempt stopped instead of at the first series.
+    """
+
+    def __init__(
+        self,
+        storage: AzureStorage,
+        manufacturer: str,
+        product_type: str,
+        run_id: str,
+        part: str = "all",
+        every: int = CHECKPOINT_EVERY_SERIES,
+    ):
+        self.storage = storage
+        self.file_name = f"{manufacturer}/{product_type}/{run_id}/{part}.json"
+        self.every = max(1, every)
+        self.series: Dict[str, List[dict]] = {}
+        self.pending = 0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def load(self) -> Dict[str, List[dict]]:
+        """Rows per series key saved by an earlier attempt, if any"""
+        if self.storage.mutable_data_exists(CHECKPOINT_STEP_NAME, self.file_name):
+            self.series = self.storage.load_json(CHECKPOINT_STEP_NAME, self.file_name)[
+                "series"
+            ]
+        return dict(self.series)
+
+    async def add(self, key: str, rows: List[dict]) -> None:
+        """Record the rows of a scraped series, saving every few series"""
+        self.series[key] = rows
+        self.pending += 1
+        if self.pending < self.every:
+            return
+
+        self.pending = 0
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # Writes are serialized so an older state never overwrites a newer one
+        async with self._lock:
+            await asyncio.to_thread(self.save, dict(self.series))
+
+    def save(self, series: Dict[str, List[dict]]) -> None:
+        self.storage.save_json(
+            CHECKPOINT_STEP_NAME,
+            self.file_name,
+            {"series": series, "saved_at": datetime.now(timezone.utc).isoformat()},
+        )
+
+    def clear(self) -> None:
+        """Drop the saved rows once the crawl has completed"""
+        self.series = {}
+        self.pending = 0
+        self.save({})
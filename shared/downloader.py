@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlsplit, urlunsplit
+
+import httpx
+
+from .fetcher import USER_AGENT
+from .governor import (
+    RETRY_ATTEMPTS,
+    acquire_async,
+    governor,
+    request_outcome,
+    retry_delay,
+)
+from .storage import AzureStorage
+from .telemetry import record_http_request
+
+# Downloads running at once per host, and in total
+DOWNLOADS_PER_HOST = int(os.environ.get("DOWNLOADS_PER_HOST", "4"))
+MAX_DOWNLOADS = int(os.environ.get("MAX_CONCURRENT_DOWNLOADS", "16"))
+
+# Seconds to wait for a connection or for the next chunk of a response
+DOWNLOAD_TIMEOUT_SECONDS = 30
+
+# Bytes of a response collected before they are written to storage as a block
+BLOCK_SIZE = 4 * 1024 * 1024
+
+# Ports left out of normalized URLs
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a link, so spellings of the same URL share a download
+
+    Lowercases scheme and host, drops default ports and fragments and sorts
+    the query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port is not None and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+class Download:
+    """A document to fetch into the CAS, and its outcome"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.digest: Optional[str] = None
+        self.size = 0
+        self.error: Optional[str] = None
+
+
+def create_client() -> httpx.AsyncClient:
+    """Pooled HTTP/2 client; requests to a host share its connections"""
+    return httpx.AsyncClient(
+        http2=True,
+        follow_redirects=True,
+        headers={"User-Agent": USER_AGENT},
+        timeout=httpx.Timeout(DOWNLOAD_TIMEOUT_SECONDS),
+        limits=httpx.Limits(
+            max_connections=MAX_DOWNLOADS, max_keepalive_connections=MAX_DOWNLOADS
+        ),
+    )
+
+
+async def stream_to_storage(
+    response: httpx.Response, storage: AzureStorage, download: Download
+) -> None:
+    """Write a response body to the CAS in blocks"""
+    writer = storage.open_cas_writer()
+    try:
+        block = bytearray()
+        async for chunk in response.aiter_bytes():
+            block.extend(chunk)
+            if len(block) >= BLOCK_SIZE:
+                await asyncio.to_thread(writer.write_block, bytes(block))
+                block.clear()
+        if block:
+            await asyncio.to_thread(writer.write_block, bytes(block))
+
+        download.digest = await asyncio.to_thread(writer.commit)
+    except BaseException:
+        # Interrupted bodies, e.g. a dropped connection, leave no upload behind
+        writer.abort()
+        raise
+    download.size = writer.size
+
+
+async def fetch_download(
+    client: httpx.AsyncClient, storage: AzureStorage, download: Download
+) -> None:
+    """Fetch one file through its host's governor, retrying 429/5xx responses"""
+    host = governor.for_url(download.url)
+    for attempt in range(RETRY_ATTEMPTS):
+        await acquire_async(host)
+        start = time.monotonic()
+        try:
+            async with client.stream("GET", download.url) as response:
+                record_http_request()
+                outcome = request_outcome(response.status_code)
+                if outcome == "ok":
+                    if response.status_code != 200:
+                        raise ValueError(f"HTTP {response.status_code}")
+                    await stream_to_storage(response, storage, download)
+                retry_after = response.headers.get("Retry-After")
+        except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError):
+            host.release(time.monotonic() - start, "failed")
+            if attempt == RETRY_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(retry_delay(attempt))
+            continue
+        except httpx.RequestError:
+            # Malformed URLs and redirect loops fail the same way every time
+            host.cancel()
+            raise
+        except Exception:
+            # Missing files and storage errors say nothing about the host
+            host.release(time.monotonic() - start, "ok")
+            raise
+
+        host.release(time.monotonic() - start, outcome)
+        if outcome == "ok":
+            return
+        if attempt == RETRY_ATTEMPTS - 1:
+            raise ValueError(f"HTTP {response.status_code}")
+
+        delay = retry_delay(attempt, retry_after)
+        if outcome == "throttled":
+            host.pause(delay)
+        logging.warning(
+            f"Download of {download.url} returned {response.status_code}, "
+            f"retrying in {delay:.1f}s"
+        )
+        await asyncio.sleep(delay)
+
+
+async def download_all(
+    storage: AzureStorage, downloads: List[Download]
+) -> List[Download]:
+    """Fetch documents concurrently, at most DOWNLOADS_PER_HOST per host
+
+    Failures are recorded on the download instead of raised.
+    """
+    total = asyncio.Semaphore(MAX_DOWNLOADS)
+    per_host: Dict[str, asyncio.Semaphore] = defaultdict(
+        lambda: asyncio.Semaphore(DOWNLOADS_PER_HOST)
+    )
+
+    async with create_client() as client:
+
+        async def fetch_limited(download: Download):
+            async with total, per_host[urlparse(download.url).netloc]:
+                try:
+                    await fetch_download(client, storage, download)
+                except Exception as e:
+                    download.error = str(e) or type(e).__name__
+
+        await asyncio.gather(*(fetch_limited(download) for download in downloads))
+    return downloads
@@ -2,12 +2,16 @@ import os
 import logging
 from typing import Optional, Dict, Any, List
 
-from .storage import AzureStorage
+from .storage import AzureStorage, LocalStorage
 
 
 class AzureEnvironment:
     """Environment configuration for Azure Functions"""
 
+    # Storage shared by all environments created in this process, e.g. by the
+    # local pipeline runner
+    default_storage: Optional[AzureStorage] = None
+
     def __init__(
         self,
         storage: Optional[AzureStorage] = None,
@@ -22,6 +26,13 @@ class AzureEnvironment:
 
     def _create_default_storage(self) -> AzureStorage:
         """Create default Azure Storage from environment variables"""
+        if AzureEnvironment.default_storage is not None:
+            return AzureEnvironment.default_storage
+
+        local_storage_path = os.environ.get("LOCAL_STORAGE_PATH")
+        if local_storage_path:
+            return LocalStorage(local_storage_path)
+
         connection_string = os.environ["AzureWebJobsStorage"]
         container_name = os.environ.get("STORAGE_CONTAINER", "power-converter-data")
         return AzureStorage(connection_string, container_name)
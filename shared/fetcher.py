@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from .browser_pool import browser_pool
+from .governor import governed_get
+from .navigation import DEFAULT_NAVIGATION_TIMEOUT_MS, navigate
+from .telemetry import record_http_request
+
+# Seconds to wait for a plain HTTP response
+HTTP_TIMEOUT_SECONDS = float(os.environ.get("FETCHER_HTTP_TIMEOUT_SECONDS", "20"))
+
+# Consecutive plain HTTP pages of a host missing the expected content before the
+# host goes straight to the browser, and the seconds after its last miss until
+# the misses expire and one plain request may try the host again
+HTTP_MISS_LIMIT = 3
+HTTP_MISS_TTL_SECONDS = float(os.environ.get("FETCHER_HTTP_MISS_TTL_SECONDS", "900"))
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+# Connection pool shared by all fetches of the worker process
+session = requests.Session()
+session.headers.update({"User-Agent": USER_AGENT})
+session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=16))
+session.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=16))
+
+# Consecutive misses and the monotonic time of the last miss, by host
+_http_misses: Dict[str, Tuple[int, float]] = {}
+
+
+class FetchedPage:
+    """HTML of a page, flagged when it is unchanged since the previous fetch"""
+
+    def __init__(self, url: str, text: str, not_modified: bool = False):
+        self.url = url
+        self.text = text
+        self.not_modified = not_modified
+
+
+def has_selector(html: str, selector: str) -> bool:
+    """Check whether server-rendered HTML already contains the expected content"""
+    return BeautifulSoup(html, "html.parser").select_one(selector) is not None
+
+
+def http_misses(host: str) -> int:
+    """Consecutive plain HTTP misses of a host that have not expired yet"""
+    misses, last_miss = _http_misses.get(host, (0, 0.0))
+    if time.monotonic() - last_miss < HTTP_MISS_TTL_SECONDS:
+        return misses
+    # Sites change how they render, so a host sent to the browser gets a trial
+    return HTTP_MISS_LIMIT - 1 if misses >= HTTP_MISS_LIMIT else 0
+
+
+def fetch_http(url: str) -> str:
+    """Fetch a page over plain HTTP"""
+    response = governed_get(session, url, timeout=HTTP_TIMEOUT_SECONDS)
+    record_http_request()
+    response.raise_for_status()
+    return response.text
+
+
+async def fetch_browser(
+    url: str,
+    selector: str,
+    timeout: int = DEFAULT_NAVIGATION_TIMEOUT_MS,
+    capture=None,
+) -> str:
+    """Render a page in the pooled browser and return its HTML
+
+    capture, a JsonCapture, collects the JSON responses of the page load.
+    """
+    async with browser_pool.page() as page:
+        if capture is not None:
+            capture.attach(page)
+        # Parsers handle pages without the content, e.g. empty series
+        await navigate(page, url, selector, timeout)
+        return await page.content()
+
+
+async def fetch_page(
+    url: str,
+    selector: str,
+    timeout: int = DEFAULT_NAVIGATION_TIMEOUT_MS,
+    cache=None,
+    capture=None,
+    conditional: bool = True,
+) -> FetchedPage:
+    """Fetch a page over plain HTTP, falling back to the browser
+
+    The plain response is used when it already contains selector, i.e. the
+    content is rendered on the server. With an HttpCache the plain request is
+    conditional, unless conditional is false, and the page reports whether it
+    changed since the last run. capture collects the JSON responses of a
+    browser fallback.
+    """
+    host = urlparse(url).netloc
+    misses = http_misses(host)
+    if misses < HTTP_MISS_LIMIT:
+        try:
+            if cache is not None:
+                page = await asyncio.to_thread(cache.get, url, conditional)
+            else:
+                page = FetchedPage(url, await asyncio.to_thread(fetch_http, url))
+            if has_selector(page.text, selector):
+                _http_misses.pop(host, None)
+                return page
+        except Exception as e:
+            logging.warning(f"Plain HTTP fetch of {url} failed: {str(e)}")
+        # Read again, as other fetches of the host may have missed meanwhile
+        _http_misses[host] = (http_misses(host) + 1, time.monotonic())
+
+    return FetchedPage(url, await fetch_browser(url, selector, timeout, capture))
@@ -0,0 +1,392 @@
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+# Requests per second and burst size of the token bucket of every host
+RATE_PER_SECOND = float(os.environ.get("GOVERNOR_RATE_PER_SECOND", "4"))
+BURST = int(os.environ.get("GOVERNOR_BURST", "8"))
+
+# Requests in flight per host: the limit starts at INITIAL_CONCURRENCY, grows
+# by one per window of fast responses up to MAX_CONCURRENCY, shrinks when
+# responses slow down and halves on throttling or errors
+INITIAL_CONCURRENCY = 4
+MAX_CONCURRENCY = int(os.environ.get("GOVERNOR_MAX_CONCURRENCY", "8"))
+TARGET_LATENCY_SECONDS = float(os.environ.get("GOVERNOR_TARGET_LATENCY_SECONDS", "5"))
+
+# Consecutive failures that open the circuit of a host, and the seconds it
+# stays open before a single trial request may probe the host again
+BREAKER_FAILURES = int(os.environ.get("GOVERNOR_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN_SECONDS = float(
+    os.environ.get("GOVERNOR_BREAKER_COOLDOWN_SECONDS", "60")
+)
+
+# Attempts per request, and the exponential backoff between them before jitter
+RETRY_ATTEMPTS = 4
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 30.0
+
+# Request errors worth another attempt; any other error, e.g. a malformed URL
+# or a redirect loop, fails the same way every time and says nothing about
+# the health of the host
+TRANSIENT_REQUEST_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+# Browser network errors that fail the same way on every attempt
+PERMANENT_NAVIGATION_ERRORS = [
+    "ERR_INVALID_URL",
+    "ERR_UNKNOWN_URL_SCHEME",
+    "ERR_TOO_MANY_REDIRECTS",
+]
+
+# Seconds between two checks for a free concurrency slot
+SLOT_POLL_SECONDS = 0.05
+
+# Entity sharing the limits of every host across activities
+GOVERNOR_ENTITY_NAME = "host_governor"
+
+# Counters of a host report that are summed when reports are merged
+REPORT_COUNTERS = ["requests", "throttled", "failed", "latency_seconds"]
+
+# Counters per host of the requests sent by the current activity, so that
+# activities running at once in the worker each report only their own requests
+_activity_counts: contextvars.ContextVar[Optional[Dict[str, Dict[str, float]]]] = (
+    contextvars.ContextVar("governor_activity_counts", default=None)
+)
+
+
+def count_request(host: str, latency_seconds: float, outcome: str) -> None:
+    """Add a finished request to the counters of the current activity"""
+    activity_counts = _activity_counts.get()
+    if activity_counts is None:
+        return
+    counts = activity_counts.setdefault(
+        host, {counter: 0 for counter in REPORT_COUNTERS}
+    )
+    counts["requests"] += 1
+    counts["latency_seconds"] += latency_seconds
+    if outcome != "ok":
+        counts[outcome] += 1
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+
+def request_outcome(status: int) -> str:
+    if status == 429:
+        return "throttled"
+    if status >= 500:
+        return "failed"
+    return "ok"
+
+
+def is_transient_navigation_error(error: Exception) -> bool:
+    """Whether a failed page load is a timeout or a network error to retry"""
+    message = str(error)
+    if any(code in message for code in PERMANENT_NAVIGATION_ERRORS):
+        return False
+    return type(error).__name__ == "TimeoutError" or "net::ERR_" in message
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Full-jitter exponential backoff, at least the server's Retry-After"""
+    delay = random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2**attempt))
+    if retry_after and retry_after.strip().isdigit():
+        delay = max(delay, min(float(retry_after), RETRY_MAX_SECONDS * 4))
+    return delay
+
+
+class HostGovernor:
+    """Token bucket, adaptive concurrency limit and circuit breaker of one host
+
+    Shared by the HTTP clients (in worker threads) and the browser (on the
+    pool's event loop), so its state is guarded by a thread lock and callers
+    wait for a reservation in their own way.
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        self.tokens = float(BURST)
+        self.limit = float(INITIAL_CONCURRENCY)
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and a concurrency slot, or return the seconds to wait
+
+        Raises CircuitOpenError while the circuit of the host is open.
+        """
+        with self._lock:
+            if time.time() < self.open_until:
+                raise CircuitOpenError(
+                    f"Circuit open for {self.host} after "
+                    f"{self.consecutive_failures} consecutive failures"
+                )
+
+            # A host that failed before the cooldown gets one trial request
+            limit = (
+                1 if self.consecutive_failures >= BREAKER_FAILURES else int(self.limit)
+            )
+            if self.in_flight >= limit:
+                return SLOT_POLL_SECONDS
+
+            now = time.monotonic()
+            self.tokens = min(
+                BURST, self.tokens + (now - self._refilled) * RATE_PER_SECOND
+            )
+            self._refilled = now
+            if self.tokens < 1:
+                return (1 - self.tokens) / RATE_PER_SECOND
+
+            self.tokens -= 1
+            self.in_flight += 1
+            return 0.0
+
+    def release(self, latency_seconds: float, outcome: str) -> None:
+        """Return a slot and adapt the limits to the outcome of the request"""
+        count_request(self.host, latency_seconds, outcome)
+        with self._lock:
+            self.in_flight -= 1
+
+            if outcome == "ok":
+                self.consecutive_failures = 0
+                if latency_seconds <= TARGET_LATENCY_SECONDS:
+                    self.limit = min(MAX_CONCURRENCY, self.limit + 1 / self.limit)
+                else:
+                    self.limit = max(1.0, self.limit * 0.9)
+                return
+
+            self.limit = max(1.0, self.limit / 2)
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= BREAKER_FAILURES:
+                self.open_until = time.time() + BREAKER_COOLDOWN_SECONDS
+                logging.warning(
+                    f"Opened circuit for {self.host} for "
+                    f"{BREAKER_COOLDOWN_SECONDS:.0f}s after "
+                    f"{self.consecutive_failures} consecutive failures"
+                )
+
+    def cancel(self) -> None:
+        """Return the slot of a request whose error says nothing about the host"""
+        with self._lock:
+            self.in_flight -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every request to the host, e.g. for a Retry-After"""
+        with self._lock:
+            self.tokens = min(self.tokens, 1 - seconds * RATE_PER_SECOND)
+
+    def seed(self, limits: dict) -> None:
+        """Adopt the limits other activities have learned for the host"""
+        with self._lock:
+            self.limit = min(
+                MAX_CONCURRENCY, max(1.0, float(limits.get("concurrency", self.limit)))
+            )
+            self.open_until = max(self.open_until, limits.get("open_until", 0.0))
+
+    def report(self, counts: Dict[str, float]) -> dict:
+        """Current limits of the host along with an activity's counters"""
+        with self._lock:
+            report = {
+                "concurrency": round(self.limit, 2),
+                "open_until": self.open_until,
+                **counts,
+            }
+        report["latency_seconds"] = round(report["latency_seconds"], 3)
+        return report
+
+
+class Governor:
+    """Host governors of the worker process, shared by all outbound requests"""
+
+    def __init__(self) -> None:
+        self.hosts: Dict[str, HostGovernor] = {}
+        self._lock = threading.Lock()
+
+    def host(self, name: str) -> HostGovernor:
+        with self._lock:
+            if name not in self.hosts:
+                self.hosts[name] = HostGovernor(name)
+            return self.hosts[name]
+
+    def for_url(self, url: str) -> HostGovernor:
+        return self.host(urlparse(url).hostname or "")
+
+    def seed(self, host_limits: Optional[dict]) -> None:
+        """Adopt the shared limits passed to an activity"""
+        for name, limits in (host_limits or {}).items():
+            self.host(name).seed(limits)
+
+    def track(self) -> contextvars.Token:
+        """Start counting the requests of the current activity"""
+        return _activity_counts.set({})
+
+    def report(self, token: contextvars.Token) -> Dict[str, dict]:
+        """Reports of the hosts the current activity used, by host"""
+        activity_counts = _activity_counts.get() or {}
+        _activity_counts.reset(token)
+        return {
+            name: self.host(name).report(counts)
+            for name, counts in activity_counts.items()
+        }
+
+
+governor = Governor()
+
+
+def acquire(host: HostGovernor) -> None:
+    """Wait for a reservation with the host's governor"""
+    while True:
+        wait_seconds = host.reserve()
+        if not wait_seconds:
+            return
+        time.sleep(wait_seconds)
+
+
+async def acquire_async(host: HostGovernor) -> None:
+    """Wait for a reservation without blocking the event loop"""
+    while True:
+        wait_seconds = host.reserve()
+        if not wait_seconds:
+            return
+        await asyncio.sleep(wait_seconds)
+
+
+def governed_get(client, url: str, **kwargs) -> requests.Response:
+    """GET a URL through its host's governor
+
+    client is a requests session (or the requests module). Connection errors,
+    timeouts, 429 and 5xx responses are retried with jittered backoff; the last
+    response is returned as it is. Other errors are raised at once, without
+    counting toward the host's circuit breaker.
+    """
+    host = governor.for_url(url)
+    for attempt in range(RETRY_ATTEMPTS):
+        acquire(host)
+        start = time.monotonic()
+        try:
+            response = client.get(url, **kwargs)
+        except TRANSIENT_REQUEST_ERRORS:
+            host.release(time.monotonic() - start, "failed")
+            if attempt == RETRY_ATTEMPTS - 1:
+                raise
+            time.sleep(retry_delay(attempt))
+            continue
+        except Exception:
+            host.cancel()
+            raise
+
+        outcome = request_outcome(response.status_code)
+        host.release(time.monotonic() - start, outcome)
+        if outcome == "ok" or attempt == RETRY_ATTEMPTS - 1:
+            return response
+
+        delay = retry_delay(attempt, response.headers.get("Retry-After"))
+        if outcome == "throttled":
+            host.pause(delay)
+        logging.warning(
+            f"GET {url} returned {response.status_code}, retrying in {delay:.1f}s"
+        )
+        time.sleep(delay)
+
+    # Every attempt returns or raises, the last one whatever its outcome
+    raise RuntimeError(f"GET {url} was not attempted")
+
+
+async def governed_goto(page, url: str, **kwargs):
+    """Navigate a browser page through the host's governor, like governed_get"""
+    host = governor.for_url(url)
+    for attempt in range(RETRY_ATTEMPTS):
+        await acquire_async(host)
+        start = time.monotonic()
+        try:
+            response = await page.goto(url, **kwargs)
+        except Exception as e:
+            if not is_transient_navigation_error(e):
+                host.cancel()
+                raise
+            host.release(time.monotonic() - start, "failed")
+            if attempt == RETRY_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(retry_delay(attempt))
+            continue
+
+        outcome = request_outcome(response.status if response is not None else 200)
+        host.release(time.monotonic() - start, outcome)
+        if outcome == "ok" or attempt == RETRY_ATTEMPTS - 1:
+            return response
+
+        retry_after = await response.header_value("retry-after")
+        delay = retry_delay(attempt, retry_after)
+        if outcome == "throttled":
+            host.pause(delay)
+        logging.warning(
+            f"Loading {url} returned {response.status}, retrying in {delay:.1f}s"
+        )
+        await asyncio.sleep(delay)
+
+
+def combine_host_reports(results: Any) -> Dict[str, dict]:
+    """Merge the host reports found anywhere in activity results"""
+    combined: Dict[str, dict] = {}
+
+    def walk(value):
+        if isinstance(value, dict):
+            for name, report in (value.get("host_stats") or {}).items():
+                merged = combined.setdefault(
+                    name, {"concurrency": report["concurrency"], "open_until": 0.0}
+                )
+                # The most cautious limit of the reporting activities wins
+                merged["concurrency"] = min(
+                    merged["concurrency"], report["concurrency"]
+                )
+                merged["open_until"] = max(merged["open_until"], report["open_until"])
+                for counter in REPORT_COUNTERS:
+                    merged[counter] = merged.get(counter, 0) + report.get(counter, 0)
+            for key, child in value.items():
+                if key != "host_stats":
+                    walk(child)
+        elif isinstance(value, list):
+            for child in value:
+                walk(child)
+
+    walk(results)
+    return combined
+
+
+def governor_entity_operation(
+    state: dict, operation: str, operation_input: Any = None
+) -> Tuple[dict, Any]:
+    """Apply an operation of the host_governor entity, returning state and result
+
+    "report" merges the host reports of finished activities into the shared
+    limits, "get" returns the shared limits of every host.
+    """
+    if operation == "get":
+        return state, state
+    if operation != "report":
+        raise ValueError(f"Unknown {GOVERNOR_ENTITY_NAME} operation: {operation}")
+
+    for name, report in (operation_input or {}).items():
+        host = state.setdefault(name, {"open_until": 0.0})
+        host["concurrency"] = report["concurrency"]
+        host["open_until"] = max(host["open_until"], report["open_until"])
+        for counter in REPORT_COUNTERS:
+            host[counter] = round(host.get(counter, 0) + report.get(counter, 0), 3)
+        host["updated_at"] = datetime.now(timezone.utc).isoformat()
+    return state, None
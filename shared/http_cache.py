@@ -0,0 +1,104 @@
+import hashlib
+import io
+import os
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from .fetcher import HTTP_TIMEOUT_SECONDS, FetchedPage, session
+from .governor import governed_get
+from .storage import AzureStorage
+from .telemetry import record_http_request
+
+# Step name under which the validators of cached pages are stored
+HTTP_CACHE_STEP_NAME = "_http_cache"
+
+
+def http_cache_enabled() -> bool:
+    """Conditional requests are on unless HTTP_CACHE_ENABLED is false"""
+    return os.environ.get("HTTP_CACHE_ENABLED", "true").lower() not in ("0", "false")
+
+
+def cache_file_name(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json"
+
+
+class HttpCache:
+    """Conditional GET cache of manufacturer pages backed by AzureStorage
+
+    Per URL the ETag, Last-Modified and the digest of the body are stored in
+    HTTP_CACHE_STEP_NAME, the body itself in the CAS. A page is not modified
+    when the server answers 304 or returns the same body as last time.
+
+    Entries of fetched pages are pending until commit, which the activity
+    calls once the output parsed from them is saved: an activity dying in
+    between must not leave the next run finding the pages unchanged and
+    carrying forward rows of an older version.
+    """
+
+    def __init__(self, storage: AzureStorage):
+        self.storage = storage
+        self.pending: Dict[str, dict] = {}
+
+    def load_entry(self, url: str) -> Optional[dict]:
+        """Validators and body digest of the last fetch of a URL, if any"""
+        file_name = cache_file_name(url)
+        if not self.storage.mutable_data_exists(HTTP_CACHE_STEP_NAME, file_name):
+            return None
+        return self.storage.load_json(HTTP_CACHE_STEP_NAME, file_name)
+
+    def get(self, url: str, conditional: bool = True) -> FetchedPage:
+        """Fetch a page, with a conditional request unless told otherwise
+
+        Callers with nothing to keep for an unchanged page fetch it in full,
+        while its entry is still refreshed for the next run.
+        """
+        entry = self.load_entry(url)
+        headers = {}
+        if (
+            conditional
+            and entry is not None
+            and self.storage.cas_exists(entry["digest"])
+        ):
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = governed_get(
+            session, url, headers=headers, timeout=HTTP_TIMEOUT_SECONDS
+        )
+        record_http_request()
+
+        if response.status_code == 304 and entry is not None and headers:
+            content = self.storage.read_cas(entry["digest"]).read()
+            text = content.decode(entry.get("encoding") or "utf-8", errors="replace")
+            return FetchedPage(url, text, not_modified=True)
+
+        response.raise_for_status()
+        if response.status_code == 304:
+            raise ValueError(f"Unexpected 304 without a cached body for {url}")
+        content = response.content
+        digest = self.storage.save_cas(io.BytesIO(content))
+        self.pending[url] = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "digest": digest,
+            "encoding": response.encoding,
+            "fetched_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+        # Servers without validators still resend the same page
+        not_modified = entry is not None and entry["digest"] == digest
+        return FetchedPage(url, response.text, not_modified=not_modified)
+
+    def commit(self) -> None:
+        """Save the pending entries, once the output of their pages is saved"""
+        for url, entry in self.pending.items():
+            self.storage.save_json(HTTP_CACHE_STEP_NAME, cache_file_name(url), entry)
+        self.pending = {}
+
+
+def open_cache(storage: AzureStorage, bypass: bool = False) -> Optional[HttpCache]:
+    """Page cache of a scraping activity, unless disabled or bypassed by the run"""
+    return HttpCache(storage) if http_cache_enabled() and not bypass else None
@@ -0,0 +1,227 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from playwright.async_api import Page, Response
+
+from .fetcher import HTTP_TIMEOUT_SECONDS, session
+from .governor import governed_get
+from .storage import AzureStorage
+from .telemetry import record_http_request
+
+# Step name under which the JSON endpoints feeding page tables are stored
+ENDPOINT_STEP_NAME = "_json_endpoints"
+
+# Resource types of the requests a page makes from its scripts
+SCRIPT_RESOURCE_TYPES = {"xhr", "fetch"}
+
+# Endpoint catalog of the scraping activity running in the current context, if any
+_current_endpoints: contextvars.ContextVar = contextvars.ContextVar(
+    "json_endpoints", default=None
+)
+
+
+def json_endpoints_enabled() -> bool:
+    """Endpoint capture is on unless JSON_ENDPOINTS_ENABLED is false"""
+    return os.environ.get("JSON_ENDPOINTS_ENABLED", "true").lower() not in (
+        "0",
+        "false",
+    )
+
+
+def endpoint_file_name(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json"
+
+
+def normalize(value: Any) -> str:
+    """Text of a value as a rendered table cell shows it"""
+    if value is None:
+        return ""
+    return re.sub(r"\s+", " ", str(value)).strip()
+
+
+def flatten(record: dict, prefix: str = "") -> Dict[str, Any]:
+    """Scalar values of a JSON object keyed by dotted path"""
+    values = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{prefix}{key}."))
+        elif not isinstance(value, list):
+            values[f"{prefix}{key}"] = value
+    return values
+
+
+def record_lists(payload: Any, path: str = "") -> Iterator[Tuple[str, List[dict]]]:
+    """Every list of objects in a JSON payload, with its dotted path"""
+    if isinstance(payload, list):
+        if payload and all(isinstance(item, dict) for item in payload):
+            yield path, payload
+    elif isinstance(payload, dict):
+        for key, value in payload.items():
+            yield from record_lists(value, f"{path}.{key}" if path else key)
+
+
+def records_at(payload: Any, path: str) -> List[dict]:
+    for key in path.split(".") if path else []:
+        payload = payload[key]
+    return payload
+
+
+def learn_fields(
+    rows: List[dict], records: List[dict]
+) -> Optional[Dict[str, Optional[str]]]:
+    """Map every row field to the record key holding the same text in every row
+
+    Fields that are empty in all rows map to None. Returns None unless the
+    records are exactly the rows, in the same order.
+    """
+    if not rows or len(rows) != len(records):
+        return None
+
+    flat_records = [flatten(record) for record in records]
+    fields: Dict[str, Optional[str]] = {}
+    for field in rows[0]:
+        values = [normalize(row.get(field)) for row in rows]
+        if not any(values):
+            fields[field] = None
+            continue
+        key = next(
+            (
+                key
+                for key in flat_records[0]
+                if [normalize(record.get(key)) for record in flat_records] == values
+            ),
+            None,
+        )
+        if key is None:
+            return None
+        fields[field] = key
+    return fields
+
+
+def learn_endpoint(
+    page_url: str, rows: List[dict], responses: List[Tuple[str, Any]]
+) -> Optional[dict]:
+    """Endpoint entry of the first JSON response holding exactly the table rows"""
+    for endpoint_url, payload in responses:
+        for records_path, records in record_lists(payload):
+            fields = learn_fields(rows, records)
+            if fields is not None:
+                return {
+                    "url": page_url,
+                    "endpoint_url": endpoint_url,
+                    "records_path": records_path,
+                    "fields": fields,
+                    "captured_at": datetime.now(timezone.utc).isoformat(),
+                }
+    return None
+
+
+def endpoint_rows(entry: dict, text: str) -> List[dict]:
+    """Table rows built from the body of a captured endpoint"""
+    records = records_at(json.loads(text), entry["records_path"])
+    rows = []
+    for record in records:
+        values = flatten(record)
+        rows.append(
+            {
+                field: normalize(values.get(key)) if key else ""
+                for field, key in entry["fields"].items()
+            }
+        )
+    return rows
+
+
+def fetch_json(url: str) -> str:
+    """Fetch a JSON endpoint over plain HTTP"""
+    response = governed_get(
+        session,
+        url,
+        headers={"Accept": "application/json"},
+        timeout=HTTP_TIMEOUT_SECONDS,
+    )
+    record_http_request()
+    response.raise_for_status()
+    return response.text
+
+
+class JsonCapture:
+    """JSON responses a browser page loads from its scripts while it renders"""
+
+    def __init__(self) -> None:
+        self._reads: List[asyncio.Task] = []
+
+    def attach(self, page: Page) -> None:
+        """Start capturing, before the page navigates"""
+        page.on("response", self._on_response)
+
+    def _on_response(self, response: Response) -> None:
+        request = response.request
+        if (
+            request.method == "GET"
+            and request.resource_type in SCRIPT_RESOURCE_TYPES
+            and "json" in response.headers.get("content-type", "")
+        ):
+            self._reads.append(asyncio.ensure_future(self._read(response)))
+
+    @staticmethod
+    async def _read(response: Response) -> Tuple[str, Any]:
+        return response.url, await response.json()
+
+    async def responses(self) -> List[Tuple[str, Any]]:
+        """URL and payload of every JSON response read so far"""
+        results = await asyncio.gather(*self._reads, return_exceptions=True)
+        return [result for result in results if not isinstance(result, BaseException)]
+
+
+class JsonEndpoints:
+    """Catalog of the JSON endpoints feeding page tables, backed by AzureStorage
+
+    Per page URL the endpoint URL, the path of the record list in its payload
+    and the record key of every row field are stored in ENDPOINT_STEP_NAME.
+    """
+
+    def __init__(self, storage: AzureStorage):
+        self.storage = storage
+
+    def load(self, page_url: str) -> Optional[dict]:
+        """Captured endpoint of a page, if any"""
+        file_name = endpoint_file_name(page_url)
+        if not self.storage.mutable_data_exists(ENDPOINT_STEP_NAME, file_name):
+            return None
+        entry = self.storage.load_json(ENDPOINT_STEP_NAME, file_name)
+        return entry if entry.get("endpoint_url") else None
+
+    def save(self, entry: dict) -> None:
+        self.storage.save_json(
+            ENDPOINT_STEP_NAME, endpoint_file_name(entry["url"]), entry
+        )
+
+    def forget(self, page_url: str) -> None:
+        """Drop the endpoint of a page that no longer matches its table"""
+        self.save({"url": page_url, "endpoint_url": None})
+
+
+def open_endpoints(storage: AzureStorage) -> Optional[JsonEndpoints]:
+    """Endpoint catalog of a scraping activity, unless capture is disabled"""
+    return JsonEndpoints(storage) if json_endpoints_enabled() else None
+
+
+def current_endpoints() -> Optional[JsonEndpoints]:
+    return _current_endpoints.get()
+
+
+@contextmanager
+def use_endpoints(endpoints: Optional[JsonEndpoints]):
+    """Make an endpoint catalog current for the scraping code run inside the block"""
+    token = _current_endpoints.set(endpoints)
+    try:
+        yield endpoints
+    finally:
+        _current_endpoints.reset(token)
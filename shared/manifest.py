@@ -0,0 +1,129 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from .storage import AzureStorage
+
+# Pipeline steps in execution order
+PIPELINE_STEPS = [
+    "scrape_series",
+    "scrape_products",
+    "download_pdfs",
+    "extract_pdf_data",
+    "extract_structured_data",
+    "validate_data",
+]
+
+# Bump a step version whenever its code or prompt changes the output,
+# so that the next run does not skip it
+STEP_VERSIONS = {
+    "scrape_series": "1",
+    "scrape_products": "1",
+    "download_pdfs": "2",
+    "extract_pdf_data": "2",
+    "extract_structured_data": "1",
+    "validate_data": "1",
+}
+
+MANIFEST_STEP_NAME = "_manifests"
+
+
+def step_version(step: str) -> str:
+    """Code/prompt version of a step, including the global pipeline version"""
+    pipeline_version = os.environ.get("PIPELINE_VERSION", "")
+    return f"{STEP_VERSIONS[step]}:{pipeline_version}"
+
+
+def manifest_file_name(manufacturer: str, product_type: str, step: str) -> str:
+    return f"{manufacturer}/{product_type}/{step}.json"
+
+
+def digest_bytes(data: bytes) -> str:
+    """SHA-256 digest of raw content"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def digest_mutable_data(storage: AzureStorage, step_name: str, file_name: str) -> str:
+    """SHA-256 digest of a mutable data file"""
+    with storage.read_mutable_data(step_name, file_name) as f:
+        return digest_bytes(f.read())
+
+
+def load_manifest(
+    storage: AzureStorage, manufacturer: str, product_type: str, step: str
+) -> Optional[dict]:
+    """Load the last manifest written by a step, if any"""
+    file_name = manifest_file_name(manufacturer, product_type, step)
+    if not storage.mutable_data_exists(MANIFEST_STEP_NAME, file_name):
+        return None
+    return storage.load_json(MANIFEST_STEP_NAME, file_name)
+
+
+def current_inputs(
+    storage: AzureStorage, manufacturer: str, product_type: str, step: str
+) -> Optional[Dict[str, str]]:
+    """Input digests of a step, i.e. the outputs of the previous step's manifest"""
+    step_index = PIPELINE_STEPS.index(step)
+    if step_index == 0:
+        return {}
+
+    previous = load_manifest(
+        storage, manufacturer, product_type, PIPELINE_STEPS[step_index - 1]
+    )
+    if previous is None:
+        return None
+    return previous["outputs"]
+
+
+def write_manifest(
+    storage: AzureStorage,
+    manufacturer: str,
+    product_type: str,
+    step: str,
+    outputs: Dict[str, str],
+    inputs: Optional[Dict[str, str]] = None,
+    complete: bool = True,
+) -> dict:
+    """Record input digests, version and output digests of a finished step
+
+    A step that lost shards or items is recorded as incomplete: the next
+    steps still chain on its outputs, but the step itself is never skipped.
+    """
+    if inputs is None:
+        inputs = current_inputs(storage, manufacturer, product_type, step) or {}
+
+    manifest = {
+        "step": step,
+        "manufacturer": manufacturer,
+        "product_type": product_type,
+        "version": step_version(step),
+        "inputs": inputs,
+        "outputs": outputs,
+        "complete": complete,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+    storage.save_json(
+        MANIFEST_STEP_NAME,
+        manifest_file_name(manufacturer, product_type, step),
+        manifest,
+    )
+    return manifest
+
+
+def is_up_to_date(
+    storage: AzureStorage, manufacturer: str, product_type: str, step: str
+) -> bool:
+    """Check whether a step's inputs and version match its last manifest"""
+    manifest = load_manifest(storage, manufacturer, product_type, step)
+    if manifest is None or manifest["version"] != step_version(step):
+        return False
+    if not manifest.get("complete", True):
+        return False
+
+    inputs = current_inputs(storage, manufacturer, product_type, step)
+    if not inputs:
+        # Steps without recorded inputs (e.g. live scraping) always run
+        return False
+
+    return manifest["inputs"] == inputs
@@ -0,0 +1,63 @@
+import logging
+from urllib.parse import urlparse
+
+from playwright.async_api import Page, Route
+
+from .governor import governed_goto
+from .telemetry import record_http_request
+
+# Resources never read by the parsers
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+# Milliseconds to wait for page content unless the manufacturer plugin sets its
+# own timeout
+DEFAULT_NAVIGATION_TIMEOUT_MS = 30000
+
+
+def site_domain(url: str) -> str:
+    """Last two labels of a URL's host, e.g. tracopower.com"""
+    host = urlparse(url).hostname or ""
+    return ".".join(host.split(".")[-2:])
+
+
+async def block_resources(page: Page, url: str) -> None:
+    """Abort images, media, fonts and requests to third-party domains"""
+    domain = site_domain(url)
+
+    async def handle(route: Route):
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or (
+            site_domain(request.url) != domain
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await page.route("**/*", handle)
+
+
+async def navigate(
+    page: Page, url: str, selector: str, timeout: int = DEFAULT_NAVIGATION_TIMEOUT_MS
+) -> bool:
+    """Load a page until selector appears, without waiting for network idle
+
+    The load goes through the host's governor like plain HTTP requests do.
+    Returns False when selector did not appear within timeout milliseconds;
+    the page is still loaded as far as it got.
+    """
+    await block_resources(page, url)
+
+    await governed_goto(page, url, wait_until="domcontentloaded", timeout=timeout)
+    record_http_request()
+    try:
+        await page.wait_for_selector(selector, timeout=timeout)
+        return True
+    except Exception:
+        logging.warning(f"Selector {selector} not found on {url}")
+        return False
+
+
+async def show_snapshot(page: Page, html: str) -> None:
+    """Load archived HTML into a page without any network access"""
+    await page.route("**/*", lambda route: route.abort())
+    await page.set_content(html, wait_until="domcontentloaded")
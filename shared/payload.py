@@ -0,0 +1,42 @@
+import io
+import json
+import os
+from typing import Any
+
+from .storage import AzureStorage
+
+# Marker key of a payload stored by reference
+PAYLOAD_REF_KEY = "$ref"
+
+# Payloads up to this many bytes of JSON stay inline in the orchestration history
+DEFAULT_INLINE_LIMIT = 2048
+
+
+def inline_limit() -> int:
+    return int(os.environ.get("PAYLOAD_INLINE_LIMIT", DEFAULT_INLINE_LIMIT))
+
+
+def is_payload_ref(value: Any) -> bool:
+    """Check whether a value is a payload reference envelope"""
+    return isinstance(value, dict) and PAYLOAD_REF_KEY in value
+
+
+def store_payload(storage: AzureStorage, data: Any, **counters) -> dict:
+    """Store JSON data in the CAS and return a reference envelope"""
+    raw = json.dumps(data).encode("utf-8")
+    digest = storage.save_cas(io.BytesIO(raw))
+    return {PAYLOAD_REF_KEY: digest, "bytes": len(raw), **counters}
+
+
+def pack_payload(storage: AzureStorage, data: Any, **counters) -> Any:
+    """Keep small payloads inline and store large ones by reference"""
+    if len(json.dumps(data)) <= inline_limit():
+        return data
+    return store_payload(storage, data, **counters)
+
+
+def resolve_payload(storage: AzureStorage, value: Any) -> Any:
+    """Resolve a reference envelope, passing inline payloads through"""
+    if not is_payload_ref(value):
+        return value
+    return json.load(storage.read_cas(value[PAYLOAD_REF_KEY]))
@@ -0,0 +1,161 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .manifest import PIPELINE_STEPS
+
+# Result counters reported as step progress
+PROGRESS_COUNTERS = [
+    "count",
+    "series_count",
+    "total_pdfs",
+    "downloaded",
+    "processed_pdfs",
+    "processed_items",
+    "total_items",
+    "valid_items",
+    "invalid_items",
+    "failures",
+    "pending",
+]
+
+# Result fields naming files written by a step
+OUTPUT_FILE_KEYS = [
+    "file_name",
+    "changes_file_name",
+    "valid_file_name",
+    "invalid_file_name",
+    "json_file_name",
+]
+
+FINISHED_STATES = ["done", "skipped", "failed", "incomplete"]
+
+
+class PipelineProgress:
+    """Per-stage progress of an orchestration, published as its custom status"""
+
+    def __init__(self, context):
+        self.context = context
+        self.status = {
+            "started_at": context.current_utc_datetime.isoformat(),
+            "chains": {},
+        }
+
+    def chain(self, manufacturer: str, product_type: str) -> dict:
+        return self.status["chains"].setdefault(
+            f"{manufacturer}/{product_type}", {"stage": None, "steps": {}}
+        )
+
+    def step(self, manufacturer: str, product_type: str, step: str) -> dict:
+        return self.chain(manufacturer, product_type)["steps"].setdefault(step, {})
+
+    def start_step(self, manufacturer: str, product_type: str, step: str) -> None:
+        self.chain(manufacturer, product_type)["stage"] = step
+        self.step(manufacturer, product_type, step).update(
+            state="running",
+            started_at=self.context.current_utc_datetime.isoformat(),
+        )
+        self.publish()
+
+    def add_counts(
+        self, manufacturer: str, product_type: str, step: str, **counts: int
+    ) -> None:
+        """Add to the running counters of a step, e.g. when a shard finishes"""
+        step_progress = self.step(manufacturer, product_type, step)
+        for key, value in counts.items():
+            step_progress[key] = step_progress.get(key, 0) + (value or 0)
+        self.publish()
+
+    def finish_step(
+        self, manufacturer: str, product_type: str, step: str, result: dict
+    ) -> None:
+        step_progress = self.step(manufacturer, product_type, step)
+        if result.get("skipped"):
+            step_progress["state"] = "skipped"
+        elif result.get("success") and result.get("pending"):
+            # Items still queued when the step gave up waiting for them
+            step_progress["state"] = "incomplete"
+        elif result.get("success"):
+            step_progress["state"] = "done"
+        else:
+            step_progress["state"] = "failed"
+            step_progress["error"] = result.get("error")
+        step_progress["finished_at"] = self.context.current_utc_datetime.isoformat()
+
+        for key in PROGRESS_COUNTERS:
+            if isinstance(result.get(key), int):
+                step_progress[key] = result[key]
+
+        # Files already written, so partial results can be inspected mid-run
+        if result.get("step_name"):
+            step_progress["outputs"] = [
+                f"data/{result['step_name']}/{result[key]}"
+                for key in OUTPUT_FILE_KEYS
+                if result.get(key)
+            ]
+        self.publish()
+
+    def publish(self) -> None:
+        self.context.set_custom_status(self.status)
+
+
+def merge_progress(status: Optional[dict], sub_statuses: List[Optional[dict]]) -> dict:
+    """Merge the chain progress of sub-orchestrations into the parent's status"""
+    merged = dict(status or {})
+    merged["chains"] = dict(merged.get("chains", {}))
+    for sub_status in sub_statuses:
+        merged["chains"].update((sub_status or {}).get("chains", {}))
+    return merged
+
+
+def step_fraction(step_progress: dict) -> float:
+    """Completed fraction of a single step"""
+    if step_progress.get("state") in FINISHED_STATES:
+        return 1.0
+    for unit in ["series", "datasheets"]:
+        if step_progress.get(f"{unit}_total"):
+            return min(
+                1.0,
+                step_progress.get(f"{unit}_done", 0) / step_progress[f"{unit}_total"],
+            )
+    return 0.0
+
+
+def estimate_progress(status: dict, now: datetime) -> dict:
+    """Completed fraction of a run and a linear estimate of the remaining time"""
+    chains = status.get("chains", {})
+    chain_count = max(status.get("chain_count", 0), len(chains))
+    total_steps = chain_count * len(PIPELINE_STEPS)
+    done_steps = sum(
+        step_fraction(step_progress)
+        for chain in chains.values()
+        for step_progress in chain["steps"].values()
+    )
+    fraction = done_steps / total_steps if total_steps else 0.0
+
+    elapsed_seconds = None
+    eta_seconds = None
+    if status.get("started_at"):
+        started_at = datetime.fromisoformat(status["started_at"])
+        elapsed_seconds = round((now - started_at).total_seconds(), 1)
+        if fraction > 0:
+            eta_seconds = round(elapsed_seconds * (1 - fraction) / fraction, 1)
+
+    return {
+        "fraction_done": round(fraction, 3),
+        "elapsed_seconds": elapsed_seconds,
+        "eta_seconds": eta_seconds,
+    }
+
+
+def output_links(status: dict, container_name: str) -> Dict[str, List[str]]:
+    """Blob paths of the outputs written so far, per chain"""
+    return {
+        chain_name: list(
+            dict.fromkeys(
+                f"{container_name}/{output}"
+                for step_progress in chain["steps"].values()
+                for output in step_progress.get("outputs", [])
+            )
+        )
+        for chain_name, chain in status.get("chains", {}).items()
+    }
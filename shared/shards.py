@@ -0,0 +1,3 @@
+def shard_file_name(product_type: str, shard_index: int, extension: str = "csv") -> str:
+    """File name of a series shard's output within a pipeline step"""
+    return f"{product_type}/shard-{shard_index:04d}.{extension}"
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Set
+
+# Prefix of instance IDs derived from a pipeline config
+INSTANCE_ID_PREFIX = "pipeline-"
+
+# Fixed instance ID of the orchestrator collecting bursts of config uploads
+DEBOUNCER_INSTANCE_ID = "pipeline-debouncer"
+
+# External event carrying a config upload to the debouncer
+CONFIG_EVENT = "config"
+
+# Seconds without a new config upload before a collected burst is started
+DEBOUNCE_SECONDS = int(os.environ.get("PIPELINE_DEBOUNCE_SECONDS", "60"))
+
+# Upper bound of the debounce window, so a steady stream of uploads still runs
+MAX_DEBOUNCE_SECONDS = int(os.environ.get("PIPELINE_MAX_DEBOUNCE_SECONDS", "600"))
+
+# Runtime states in which an instance is joined instead of started again
+ACTIVE_STATUSES = ["Pending", "Running", "ContinuedAsNew", "Suspended"]
+
+# Product types of a config that lists none
+DEFAULT_PRODUCT_TYPES = ["dc-dc-converters", "ac-dc-power-supplies"]
+
+# Series scraped by one shard activity
+DEFAULT_SHARD_SIZE = 25
+
+# Upper bound of scrape_products_shard activities running at once per chain
+DEFAULT_MAX_CONCURRENT_SHARDS = 4
+
+# Seconds between completion checks of a datasheet batch, and until it is
+# merged with whatever has finished
+DEFAULT_DATASHEET_POLL_SECONDS = 30
+DEFAULT_DATASHEET_TIMEOUT_SECONDS = 3600
+
+# Value a run uses for an option its config leaves out; options set to it are
+# left out of the canonical config, as are other options that are false
+OPTION_DEFAULTS = {
+    "parallel": False,
+    "force": False,
+    "streaming": False,
+    "shard_products": True,
+    "queue_pdfs": False,
+    "product_shard_size": DEFAULT_SHARD_SIZE,
+    "max_concurrent_shards": DEFAULT_MAX_CONCURRENT_SHARDS,
+    "datasheet_poll_seconds": DEFAULT_DATASHEET_POLL_SECONDS,
+    "datasheet_timeout_seconds": DEFAULT_DATASHEET_TIMEOUT_SECONDS,
+}
+
+# Config lists whose order and duplicates do not change the run
+SET_OPTIONS = ["manufacturers", "product_types"]
+
+# Config flags a merged run enables as soon as one config enables them
+FLAG_OPTIONS = ["parallel", "force", "streaming"]
+
+
+def pipeline_chains(orchestrator_input: dict) -> List[dict]:
+    """Manufacturers of a config, each with the product types it runs for them"""
+    if orchestrator_input.get("chains"):
+        return orchestrator_input["chains"]
+
+    manufacturers = orchestrator_input.get("manufacturers") or [
+        orchestrator_input.get("manufacturer", "recom")
+    ]
+    product_types = orchestrator_input.get("product_types", DEFAULT_PRODUCT_TYPES)
+    return [
+        {"manufacturer": manufacturer, "product_types": product_types}
+        for manufacturer in manufacturers
+    ]
+
+
+def group_chains(chains: List[dict]) -> Dict[str, Set[str]]:
+    """Product types per manufacturer over a list of chains"""
+    grouped: Dict[str, Set[str]] = {}
+    for chain in chains:
+        grouped.setdefault(chain["manufacturer"], set()).update(chain["product_types"])
+    return grouped
+
+
+def is_default_option(option: str, value) -> bool:
+    """Whether a config option runs the same as leaving it out"""
+    if value is None:
+        return True
+    if option in OPTION_DEFAULTS:
+        return value == OPTION_DEFAULTS[option]
+    return value is False
+
+
+def normalize_orchestrator_input(orchestrator_input: dict) -> dict:
+    """Canonical form of an orchestrator input, equal for equivalent configs
+
+    Configs arriving over HTTP, through the debouncer or from the start queue
+    normalize alike, so they map to the same instance ID.
+    """
+    normalized = {
+        option: value
+        for option, value in orchestrator_input.items()
+        if not is_default_option(option, value)
+    }
+
+    # Chains sharing their product types are a plain manufacturers config
+    if normalized.get("chains"):
+        grouped = group_chains(normalized.pop("chains"))
+        for option in ["manufacturer", *SET_OPTIONS]:
+            normalized.pop(option, None)
+        if len({frozenset(product_types) for product_types in grouped.values()}) > 1:
+            normalized["chains"] = [
+                {"manufacturer": manufacturer, "product_types": sorted(product_types)}
+                for manufacturer, product_types in sorted(grouped.items())
+            ]
+            return normalized
+        normalized["manufacturers"] = sorted(grouped)
+        normalized["product_types"] = sorted(next(iter(grouped.values())))
+
+    normalized.setdefault("product_types", DEFAULT_PRODUCT_TYPES)
+    for option in SET_OPTIONS:
+        if normalized.get(option) is not None:
+            normalized[option] = sorted(set(normalized[option]))
+
+    # A single-entry manufacturers list is the same run as manufacturer alone
+    manufacturers = normalized.pop("manufacturers", None) or [
+        normalized.get("manufacturer", "recom")
+    ]
+    if len(manufacturers) == 1:
+        normalized["manufacturer"] = manufacturers[0]
+    else:
+        normalized["manufacturers"] = manufacturers
+        normalized.pop("manufacturer", None)
+    return normalized
+
+
+def pipeline_instance_id(orchestrator_input: dict) -> str:
+    """Deterministic orchestration instance ID of a pipeline config"""
+    canonical = json.dumps(
+        normalize_orchestrator_input(orchestrator_input),
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"{INSTANCE_ID_PREFIX}{digest[:16]}"
+
+
+def merge_orchestrator_inputs(orchestrator_inputs: List[dict]) -> dict:
+    """Merge several configs into one run covering all of their chains"""
+    normalized = [normalize_orchestrator_input(i) for i in orchestrator_inputs]
+
+    merged = {}
+    for orchestrator_input in normalized:
+        # Later uploads win for scalar options such as shard sizes
+        merged.update(orchestrator_input)
+
+    # Each config keeps its own product types, instead of running every
+    # manufacturer for the product types of all configs
+    merged["chains"] = [
+        chain
+        for orchestrator_input in normalized
+        for chain in pipeline_chains(orchestrator_input)
+    ]
+
+    for option in FLAG_OPTIONS:
+        if any(i.get(option, False) for i in normalized):
+            merged[option] = True
+
+    return normalize_orchestrator_input(merged)
+
+
+async def is_active(starter, instance_id: str) -> bool:
+    """Check whether an orchestration instance exists and has not finished"""
+    status = await starter.get_status(instance_id)
+    runtime_status = getattr(status.runtime_status, "value", status.runtime_status)
+    return runtime_status in ACTIVE_STATUSES
+
+
+async def start_singleton(starter, orchestrator_input: dict) -> dict:
+    """Start the pipeline for a config, or join the run already processing it"""
+    instance_id = pipeline_instance_id(orchestrator_input)
+
+    if await is_active(starter, instance_id):
+        return {"id": instance_id, "joined": True}
+
+    try:
+        await starter.start_new(
+            "orchestrator",
+            instance_id,
+            normalize_orchestrator_input(orchestrator_input),
+        )
+    except Exception:
+        # A concurrent request started the same instance in the meantime
+        if not await is_active(starter, instance_id):
+            raise
+        return {"id": instance_id, "joined": True}
+
+    return {"id": instance_id, "joined": False}
+
+
+async def debounce_start(starter, orchestrator_input: dict) -> str:
+    """Hand a config upload to the debouncer, starting it for a new burst"""
+    debouncer_input = {"configs": [orchestrator_input]}
+    if not await is_active(starter, DEBOUNCER_INSTANCE_ID):
+        try:
+            await starter.start_new(
+                "pipeline_debouncer", DEBOUNCER_INSTANCE_ID, debouncer_input
+            )
+            return DEBOUNCER_INSTANCE_ID
+        except Exception:
+            # Another upload of the same burst started the debouncer first
+            pass
+
+    try:
+        await starter.raise_event(
+            DEBOUNCER_INSTANCE_ID, CONFIG_EVENT, orchestrator_input
+        )
+    except Exception:
+        # The debouncer finished its burst since the status check
+        if await is_active(starter, DEBOUNCER_INSTANCE_ID):
+            raise
+        await starter.start_new(
+            "pipeline_debouncer", DEBOUNCER_INSTANCE_ID, debouncer_input
+        )
+    return DEBOUNCER_INSTANCE_ID
@@ -0,0 +1,129 @@
+import asyncio
+import contextvars
+import io
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional, Union
+
+from .storage import AzureStorage
+
+# Step name under which the URL -> digest indexes of archived pages are stored
+SNAPSHOT_STEP_NAME = "_snapshots"
+
+# Index name pointing at the run archived last for a chain and step
+LATEST_INDEX_NAME = "latest.json"
+
+# Archive of the scraping activity running in the current context, if any
+_current_archive: contextvars.ContextVar = contextvars.ContextVar(
+    "snapshot_archive", default=None
+)
+
+
+def index_prefix(manufacturer: str, product_type: str, step: str) -> str:
+    return f"{manufacturer}/{product_type}/{step}/"
+
+
+class SnapshotArchive:
+    """Bodies of the pages fetched by a scraping activity, stored in the CAS
+
+    While recording, every fetched page is saved with save_cas and indexed by
+    URL; the index is written per run. While replaying, pages are served from
+    the index of an earlier run without any network access.
+    """
+
+    def __init__(
+        self,
+        storage: AzureStorage,
+        manufacturer: str,
+        product_type: str,
+        step: str,
+        pages: Optional[Dict[str, str]] = None,
+    ):
+        self.storage = storage
+        self.prefix = index_prefix(manufacturer, product_type, step)
+        self.replaying = pages is not None
+        self.pages: Dict[str, str] = pages or {}
+
+    @classmethod
+    def for_replay(
+        cls,
+        storage: AzureStorage,
+        manufacturer: str,
+        product_type: str,
+        step: str,
+        run_id: Union[str, bool] = True,
+    ) -> "SnapshotArchive":
+        """Archive serving the pages of run_id, or of the latest run for True"""
+        prefix = index_prefix(manufacturer, product_type, step)
+        if run_id is True:
+            latest_name = prefix + LATEST_INDEX_NAME
+            if not storage.mutable_data_exists(SNAPSHOT_STEP_NAME, latest_name):
+                raise ValueError(f"No archived snapshots for {prefix}")
+            run_id = storage.load_json(SNAPSHOT_STEP_NAME, latest_name)["run_id"]
+
+        # Shard activities write one index each
+        pages = {}
+        for index_name in storage.list_files(SNAPSHOT_STEP_NAME, f"{prefix}{run_id}/"):
+            pages.update(storage.load_json(SNAPSHOT_STEP_NAME, index_name)["pages"])
+        if not pages:
+            raise ValueError(f"No archived snapshots for {prefix}{run_id}")
+        return cls(storage, manufacturer, product_type, step, pages)
+
+    async def record(self, url: str, html: str) -> None:
+        """Archive the body of a fetched page
+
+        The upload runs in a worker thread so concurrent series keep fetching.
+        """
+        body = io.BytesIO(html.encode("utf-8"))
+        self.pages[url] = await asyncio.to_thread(self.storage.save_cas, body)
+
+    def has(self, url: str) -> bool:
+        return url in self.pages
+
+    def lookup(self, url: str) -> str:
+        """Body of an archived page"""
+        if url not in self.pages:
+            raise ValueError(f"No archived snapshot of {url}")
+        return self.storage.read_cas(self.pages[url]).read().decode("utf-8")
+
+    def save_index(self, run_id: str, part: str = "all") -> None:
+        """Write the URL -> digest index of the pages recorded for a run"""
+        if self.replaying or not self.pages:
+            return
+        self.storage.save_json(
+            SNAPSHOT_STEP_NAME,
+            f"{self.prefix}{run_id}/{part}.json",
+            {
+                "run_id": run_id,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "pages": self.pages,
+            },
+        )
+        self.storage.save_json(
+            SNAPSHOT_STEP_NAME, self.prefix + LATEST_INDEX_NAME, {"run_id": run_id}
+        )
+
+
+def open_archive(storage: AzureStorage, input: dict, step: str) -> SnapshotArchive:
+    """Recording archive of a scraping activity, or a replaying one on request"""
+    manufacturer = input.get("manufacturer", "recom")
+    product_type = input.get("product_type", "dc-dc-converters")
+    if input.get("replay_snapshots"):
+        return SnapshotArchive.for_replay(
+            storage, manufacturer, product_type, step, input["replay_snapshots"]
+        )
+    return SnapshotArchive(storage, manufacturer, product_type, step)
+
+
+def current_archive() -> Optional[SnapshotArchive]:
+    return _current_archive.get()
+
+
+@contextmanager
+def use_archive(archive: SnapshotArchive):
+    """Make an archive current for the scraping code run inside the block"""
+    token = _current_archive.set(archive)
+    try:
+        yield archive
+    finally:
+        _current_archive.reset(token)
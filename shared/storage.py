@@ -1,9 +1,107 @@
+import base64
 import io
 import hashlib
 import json
-from typing import BinaryIO, Union, List
+import pathlib
+import time
+import uuid
+from typing import BinaryIO, Dict, Optional, Union, List
 import pandas as pd
-from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient
+from azure.storage.blob import BlobBlock, BlobServiceClient, BlobClient, ContainerClient
+
+from .telemetry import record_bytes_read, record_bytes_written
+
+# Seconds between two checks of a pending server-side blob copy
+COPY_POLL_SECONDS = 0.5
+
+
+class BlockWriter:
+    """Blob written block by block as data arrives, visible once committed"""
+
+    def __init__(self):
+        self.size = 0
+
+    def write_block(self, data: bytes) -> None:
+        self._write_block(data)
+        self.size += len(data)
+
+    def commit(self) -> None:
+        self._commit()
+        record_bytes_written(self.size)
+
+    def abort(self) -> None:
+        """Drop the blocks written so far, leaving no partial blob behind"""
+        self._abort()
+
+    def _write_block(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    def _commit(self) -> None:
+        raise NotImplementedError
+
+    def _abort(self) -> None:
+        raise NotImplementedError
+
+
+class StagedBlockWriter(BlockWriter):
+    """Stages every block on the blob service and commits the block list"""
+
+    def __init__(self, blob_client: BlobClient):
+        super().__init__()
+        self.blob_client = blob_client
+        self.blocks: List[BlobBlock] = []
+
+    def _write_block(self, data: bytes) -> None:
+        # Block IDs of a blob must all have the same length
+        block_id = base64.b64encode(f"{len(self.blocks):08d}".encode()).decode()
+        self.blob_client.stage_block(block_id, data)
+        self.blocks.append(BlobBlock(block_id=block_id))
+
+    def _commit(self) -> None:
+        self.blob_client.commit_block_list(self.blocks)
+
+    def _abort(self) -> None:
+        # Uncommitted blocks are garbage collected by the blob service
+        self.blocks = []
+
+
+class CasWriter:
+    """Streams content into the CAS, which names it by its digest once complete
+
+    Blocks go to an upload blob that is moved to the CAS path on commit, or
+    dropped if the CAS already holds the same content.
+    """
+
+    def __init__(self, storage: "AzureStorage"):
+        self.storage = storage
+        self.upload_path = f"_cas/_uploads/{uuid.uuid4().hex}"
+        self.writer = storage._open_blob_writer(self.upload_path)
+        self.sha256 = hashlib.sha256()
+
+    @property
+    def size(self) -> int:
+        return self.writer.size
+
+    def write_block(self, data: bytes) -> None:
+        self.sha256.update(data)
+        self.writer.write_block(data)
+
+    def commit(self) -> str:
+        """Store the content under its digest and return the digest"""
+        self.writer.commit()
+        digest = self.sha256.hexdigest()
+        blob_path = f"_cas/{self.storage.hex_to_path(digest)}"
+        if self.storage._blob_exists(blob_path):
+            self.storage._delete_blob(self.upload_path)
+        else:
+            self.storage._move_blob(self.upload_path, blob_path)
+        return digest
+
+    def abort(self) -> None:
+        """Drop the upload of content that could not be received completely"""
+        self.writer.abort()
+        if self.storage._blob_exists(self.upload_path):
+            self.storage._delete_blob(self.upload_path)
 
 
 class AzureStorage:
@@ -21,6 +119,41 @@ class AzureStorage:
         if not self.container_client.exists():
             self.container_client.create_container()
 
+    # Blob primitives
+    def _read_blob(self, blob_path: str) -> bytes:
+        blob_client = self.container_client.get_blob_client(blob_path)
+        return blob_client.download_blob().readall()
+
+    def _write_blob(self, blob_path: str, data: bytes, overwrite: bool = True) -> None:
+        blob_client = self.container_client.get_blob_client(blob_path)
+        blob_client.upload_blob(data, overwrite=overwrite)
+
+    def _blob_exists(self, blob_path: str) -> bool:
+        return self.container_client.get_blob_client(blob_path).exists()
+
+    def _list_blobs(self, prefix: str) -> List[str]:
+        blobs = self.container_client.list_blobs(name_starts_with=prefix)
+        return [blob.name for blob in blobs]
+
+    def _open_blob_writer(self, blob_path: str) -> BlockWriter:
+        return StagedBlockWriter(self.container_client.get_blob_client(blob_path))
+
+    def _delete_blob(self, blob_path: str) -> None:
+        self.container_client.delete_blob(blob_path)
+
+    def _move_blob(self, source_path: str, blob_path: str) -> None:
+        # Copies within the account run on the service, not through the worker
+        source = self.container_client.get_blob_client(source_path)
+        target = self.container_client.get_blob_client(blob_path)
+        copy = target.start_copy_from_url(source.url)
+        status: Optional[str] = str(copy["copy_status"])
+        while status == "pending":
+            time.sleep(COPY_POLL_SECONDS)
+            status = target.get_blob_properties().copy.status
+        if status != "success":
+            raise IOError(f"Copy of {source_path} to {blob_path} ended {status}")
+        source.delete_blob()
+
     @staticmethod
     def hex_to_path(digest: str) -> str:
         """Convert hash to path structure"""
@@ -42,67 +175,63 @@ class AzureStorage:
         digest = sha256.hexdigest()
         blob_path = f"_cas/{self.hex_to_path(digest)}"
 
-        # Check if blob exists
-        blob_client = self.container_client.get_blob_client(blob_path)
-        if not blob_client.exists():
-            # Upload if it doesn't exist
-            buffer.seek(0)
-            blob_client.upload_blob(buffer, overwrite=False)
+        # Upload if it doesn't exist
+        if not self._blob_exists(blob_path):
+            self._write_blob(blob_path, buffer.getvalue(), overwrite=False)
+            record_bytes_written(buffer.tell())
 
         return digest
 
     def read_cas(self, hash_digest: str) -> BinaryIO:
         """Read content from CAS by hash"""
         blob_path = f"_cas/{self.hex_to_path(hash_digest)}"
-        blob_client = self.container_client.get_blob_client(blob_path)
+        data = self._read_blob(blob_path)
+        record_bytes_read(len(data))
+        return io.BytesIO(data)
 
-        download_stream = io.BytesIO()
-        download_stream.write(blob_client.download_blob().readall())
-        download_stream.seek(0)
-        return download_stream
+    def open_cas_writer(self) -> CasWriter:
+        """Writer streaming content into the CAS; commit returns its hash"""
+        return CasWriter(self)
 
     def cas_exists(self, hash_digest: str) -> bool:
         """Check if hash exists in CAS"""
         blob_path = f"_cas/{self.hex_to_path(hash_digest)}"
-        return self.container_client.get_blob_client(blob_path).exists()
+        return self._blob_exists(blob_path)
 
     def read_mutable_data(self, step_name: str, file_name: str) -> BinaryIO:
         """Read mutable data by step and filename"""
         blob_path = f"data/{step_name}/{file_name}"
-        blob_client = self.container_client.get_blob_client(blob_path)
-
-        download_stream = io.BytesIO()
-        download_stream.write(blob_client.download_blob().readall())
-        download_stream.seek(0)
-        return download_stream
+        data = self._read_blob(blob_path)
+        record_bytes_read(len(data))
+        return io.BytesIO(data)
 
     def write_mutable_data(
         self, step_name: str, file_name: str, data: Union[BinaryIO, bytes, str]
     ) -> None:
         """Write mutable data"""
         blob_path = f"data/{step_name}/{file_name}"
-        blob_client = self.container_client.get_blob_client(blob_path)
 
-        if isinstance(data, bytes):
-            blob_client.upload_blob(data, overwrite=True)
-        elif isinstance(data, str):
-            blob_client.upload_blob(data.encode("utf-8"), overwrite=True)
-        else:
-            blob_client.upload_blob(data, overwrite=True)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        elif not isinstance(data, bytes):
+            data = data.read()
+
+        self._write_blob(blob_path, data)
+        record_bytes_written(len(data))
 
     def mutable_data_exists(self, step_name: str, file_name: str) -> bool:
         """Check if mutable data exists"""
         blob_path = f"data/{step_name}/{file_name}"
-        return self.container_client.get_blob_client(blob_path).exists()
+        return self._blob_exists(blob_path)
 
     def list_files(self, step_name: str, prefix: str) -> List[str]:
         """List files with prefix"""
         blob_prefix = f"data/{step_name}/{prefix}"
-        blobs = self.container_client.list_blobs(name_starts_with=blob_prefix)
+        blob_names = self._list_blobs(blob_prefix)
 
         # Strip prefix from blob names
         prefix_len = len(f"data/{step_name}/")
-        return [blob.name[prefix_len:] for blob in blobs]
+        return [blob_name[prefix_len:] for blob_name in blob_names]
 
     # DataFrame helpers
     def save_df(self, step_name: str, file_name: str, df: pd.DataFrame) -> None:
@@ -117,8 +246,10 @@ class AzureStorage:
             return pd.read_csv(io.BytesIO(f.read()))
 
     # JSON helpers
-    def save_json(self, step_name: str, file_name: str, data: dict) -> None:
-        """Save dictionary as JSON"""
+    def save_json(
+        self, step_name: str, file_name: str, data: Union[dict, list]
+    ) -> None:
+        """Save dictionary or list as JSON"""
         json_str = json.dumps(data)
         self.write_mutable_data(step_name, file_name, json_str)
 
@@ -131,3 +262,116 @@ class AzureStorage:
         """Load text content from a mutable file as a string"""
         with self.read_mutable_data(step_name, file_name) as f:
             return f.read().decode("utf-8")
+
+
+class LocalStorage(AzureStorage):
+    """Filesystem implementation for running the pipeline outside Azure"""
+
+    def __init__(self, root: Union[str, pathlib.Path]):
+        self.root = pathlib.Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _read_blob(self, blob_path: str) -> bytes:
+        return (self.root / blob_path).read_bytes()
+
+    def _write_blob(self, blob_path: str, data: bytes, overwrite: bool = True) -> None:
+        path = self.root / blob_path
+        if path.exists() and not overwrite:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+    def _blob_exists(self, blob_path: str) -> bool:
+        return (self.root / blob_path).is_file()
+
+    def _list_blobs(self, prefix: str) -> List[str]:
+        # Only walk the directory the prefix points into
+        base = self.root / prefix.rsplit("/", 1)[0] if "/" in prefix else self.root
+        if not base.is_dir():
+            return []
+        blob_paths = (
+            path.relative_to(self.root).as_posix()
+            for path in base.rglob("*")
+            if path.is_file()
+        )
+        return sorted(path for path in blob_paths if path.startswith(prefix))
+
+    def _open_blob_writer(self, blob_path: str) -> BlockWriter:
+        return FileBlockWriter(self.root / blob_path)
+
+    def _delete_blob(self, blob_path: str) -> None:
+        (self.root / blob_path).unlink()
+
+    def _move_blob(self, source_path: str, blob_path: str) -> None:
+        path = self.root / blob_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        (self.root / source_path).replace(path)
+
+
+class FileBlockWriter(BlockWriter):
+    """Appends blocks to a partial file that replaces the blob on commit"""
+
+    def __init__(self, path: pathlib.Path):
+        super().__init__()
+        self.path = path
+        self.partial_path = path.with_name(path.name + ".part")
+        self.partial_path.parent.mkdir(parents=True, exist_ok=True)
+        self.partial_path.write_bytes(b"")
+
+    def _write_block(self, data: bytes) -> None:
+        with self.partial_path.open("ab") as f:
+            f.write(data)
+
+    def _commit(self) -> None:
+        self.partial_path.replace(self.path)
+
+    def _abort(self) -> None:
+        self.partial_path.unlink(missing_ok=True)
+
+
+class MemoryStorage(AzureStorage):
+    """In-memory implementation for local runs and benchmarks"""
+
+    def __init__(self):
+        self.blobs: Dict[str, bytes] = {}
+
+    def _read_blob(self, blob_path: str) -> bytes:
+        return self.blobs[blob_path]
+
+    def _write_blob(self, blob_path: str, data: bytes, overwrite: bool = True) -> None:
+        if overwrite or blob_path not in self.blobs:
+            self.blobs[blob_path] = data
+
+    def _blob_exists(self, blob_path: str) -> bool:
+        return blob_path in self.blobs
+
+    def _list_blobs(self, prefix: str) -> List[str]:
+        return sorted(name for name in self.blobs if name.startswith(prefix))
+
+    def _open_blob_writer(self, blob_path: str) -> BlockWriter:
+        return MemoryBlockWriter(self, blob_path)
+
+    def _delete_blob(self, blob_path: str) -> None:
+        del self.blobs[blob_path]
+
+    def _move_blob(self, source_path: str, blob_path: str) -> None:
+        self.blobs[blob_path] = self.blobs.pop(source_path)
+
+
+class MemoryBlockWriter(BlockWriter):
+    """Collects blocks and stores the joined blob on commit"""
+
+    def __init__(self, storage: MemoryStorage, blob_path: str):
+        super().__init__()
+        self.storage = storage
+        self.blob_path = blob_path
+        self.blocks: List[bytes] = []
+
+    def _write_block(self, data: bytes) -> None:
+        self.blocks.append(data)
+
+    def _commit(self) -> None:
+        self.storage.blobs[self.blob_path] = b"".join(self.blocks)
+
+    def _abort(self) -> None:
+        self.blocks = []
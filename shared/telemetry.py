@@ -0,0 +1,194 @@
+import contextvars
+import functools
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .governor import governor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+# Metrics of the activity running in the current context, if any
+_current_metrics: contextvars.ContextVar = contextvars.ContextVar(
+    "activity_metrics", default=None
+)
+
+# Counters that are summed when metrics of several activities are combined
+SUMMED_METRICS = [
+    "calls",
+    "wall_seconds",
+    "cpu_seconds",
+    "storage_bytes_read",
+    "storage_bytes_written",
+    "http_requests",
+    "items",
+]
+
+
+class ActivityMetrics:
+    """Resource usage of a single activity invocation"""
+
+    def __init__(self, activity: str):
+        self.activity = activity
+        self.storage_bytes_read = 0
+        self.storage_bytes_written = 0
+        self.http_requests = 0
+        self.items = 0
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+
+    def finish(self) -> None:
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.cpu_seconds = time.process_time() - self._cpu_start
+
+    def to_dict(self) -> dict:
+        return {
+            "activity": self.activity,
+            "calls": 1,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "cpu_seconds": round(self.cpu_seconds, 3),
+            "peak_memory_mb": peak_memory_mb(),
+            "storage_bytes_read": self.storage_bytes_read,
+            "storage_bytes_written": self.storage_bytes_written,
+            "http_requests": self.http_requests,
+            "items": self.items,
+            "items_per_second": items_per_second(self.items, self.wall_seconds),
+        }
+
+
+def peak_memory_mb() -> Optional[float]:
+    """Peak resident memory of the worker process (high-water mark, not per call)"""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(max_rss / divisor, 1)
+
+
+def items_per_second(items: int, wall_seconds: float) -> Optional[float]:
+    if not wall_seconds:
+        return None
+    return round(items / wall_seconds, 2)
+
+
+def current_metrics() -> Optional[ActivityMetrics]:
+    return _current_metrics.get()
+
+
+def record_bytes_read(count: int) -> None:
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.storage_bytes_read += count
+
+
+def record_bytes_written(count: int) -> None:
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.storage_bytes_written += count
+
+
+def record_http_request(count: int = 1) -> None:
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.http_requests += count
+
+
+def track_activity(items_key: Optional[str] = None) -> Callable:
+    """Decorator adding resource metrics to an activity's result dict
+
+    items_key names the result field counting the items the activity processed,
+    used for the throughput figure. Shared host limits passed as host_limits
+    seed the outbound request governor, and the hosts the activity used are
+    reported back as host_stats.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(input, **bindings):
+            metrics = ActivityMetrics(func.__name__)
+            if isinstance(input, dict):
+                governor.seed(input.get("host_limits"))
+            token = _current_metrics.set(metrics)
+            governor_token = governor.track()
+            try:
+                result = func(input, **bindings)
+            finally:
+                _current_metrics.reset(token)
+                host_stats = governor.report(governor_token)
+                metrics.finish()
+
+            if isinstance(result, dict):
+                if items_key and isinstance(result.get(items_key), int):
+                    metrics.items = result[items_key]
+                result["metrics"] = metrics.to_dict()
+                if host_stats:
+                    result["host_stats"] = host_stats
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def combine_metrics(
+    activity: str, metrics_list: List[Optional[dict]], items: Optional[int] = None
+) -> dict:
+    """Combine metrics of several activity calls into one stage total
+
+    Pass items when the calls count the same items more than once, e.g. shards
+    and the merge of their outputs.
+    """
+    combined: Dict[str, Any] = {
+        "activity": activity,
+        **{key: 0 for key in SUMMED_METRICS},
+    }
+    peak_memory: List[Optional[float]] = []
+
+    for metrics in metrics_list:
+        if not metrics:
+            continue
+        for key in SUMMED_METRICS:
+            combined[key] += metrics.get(key) or 0
+        peak_memory.append(metrics.get("peak_memory_mb"))
+
+    if items is not None:
+        combined["items"] = items
+    combined["wall_seconds"] = round(combined["wall_seconds"], 3)
+    combined["cpu_seconds"] = round(combined["cpu_seconds"], 3)
+    combined["peak_memory_mb"] = max(
+        (value for value in peak_memory if value is not None), default=None
+    )
+    combined["items_per_second"] = items_per_second(
+        combined["items"], combined["wall_seconds"]
+    )
+    return combined
+
+
+def collect_metrics(results: dict) -> Dict[str, dict]:
+    """Collect stage metrics from orchestration results, keyed by chain and stage"""
+    collected: Dict[str, dict] = {}
+
+    def walk(value):
+        if isinstance(value, dict):
+            metrics = value.get("metrics")
+            if isinstance(metrics, dict) and "activity" in metrics:
+                chain = f"{value.get('manufacturer')}/{value.get('product_type')}"
+                stage_metrics = collected.setdefault(chain, {})
+                stage_metrics[metrics["activity"]] = combine_metrics(
+                    metrics["activity"],
+                    [stage_metrics.get(metrics["activity"]), metrics],
+                )
+            for child in value.values():
+                walk(child)
+        elif isinstance(value, list):
+            for child in value:
+                walk(child)
+
+    walk(results)
+    return collected
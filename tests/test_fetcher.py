@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import pytest
+
+from shared import fetcher
+from shared.fetcher import HTTP_MISS_LIMIT, HTTP_MISS_TTL_SECONDS, fetch_page
+
+HOST = "client-rendered.example.com"
+URL = f"https://{HOST}/series"
+
+
+@pytest.fixture
+def plain_requests(monkeypatch):
+    """URLs fetched over plain HTTP from a host rendering in the browser only"""
+    requested = []
+
+    def fetch_http(url):
+        requested.append(url)
+        return "<html><body>Loading...</body></html>"
+
+    async def fetch_browser(url, selector, timeout, capture=None):
+        return '<table class="models"></table>'
+
+    monkeypatch.setattr(fetcher, "fetch_http", fetch_http)
+    monkeypatch.setattr(fetcher, "fetch_browser", fetch_browser)
+    monkeypatch.setitem(fetcher._http_misses, HOST, (0, 0.0))
+    return requested
+
+
+def fetch():
+    return asyncio.run(fetch_page(URL, "table.models"))
+
+
+def expire_misses():
+    misses, last_miss = fetcher._http_misses[HOST]
+    fetcher._http_misses[HOST] = (misses, last_miss - HTTP_MISS_TTL_SECONDS)
+
+
+def test_host_missing_content_goes_straight_to_the_browser(plain_requests):
+    for _ in range(HTTP_MISS_LIMIT + 2):
+        assert fetch().text == '<table class="models"></table>'
+    assert len(plain_requests) == HTTP_MISS_LIMIT
+
+
+def test_expired_misses_give_the_host_one_plain_request(plain_requests):
+    for _ in range(HTTP_MISS_LIMIT):
+        fetch()
+    expire_misses()
+
+    fetch()
+    fetch()
+    # One trial request, and the miss sends the host back to the browser
+    assert len(plain_requests) == HTTP_MISS_LIMIT + 1
+
+
+def test_misses_below_the_limit_expire(plain_requests):
+    fetcher._http_misses[HOST] = (HTTP_MISS_LIMIT - 1, time.monotonic())
+    expire_misses()
+    assert fetcher.http_misses(HOST) == 0
@@ -0,0 +1,74 @@
+import pytest
+import requests
+
+from shared import governor as governor_module
+from shared.governor import RETRY_ATTEMPTS, governed_get, governor
+
+
+class FakeResponse:
+    headers: dict = {}
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FakeClient:
+    """Client failing with the given errors or statuses, in turn"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        outcome = self.outcomes[min(self.calls, len(self.outcomes) - 1)]
+        self.calls += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(governor_module, "retry_delay", lambda *args: 0)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        requests.exceptions.InvalidURL("bad url"),
+        requests.exceptions.MissingSchema("no scheme"),
+        requests.exceptions.TooManyRedirects("redirect loop"),
+    ],
+)
+def test_errors_repeating_on_every_attempt_are_raised_at_once(error):
+    url = f"https://{type(error).__name__.lower()}.example.com/"
+    client = FakeClient(error)
+
+    with pytest.raises(type(error)):
+        governed_get(client, url)
+
+    host = governor.for_url(url)
+    assert client.calls == 1
+    assert host.consecutive_failures == 0
+    assert host.in_flight == 0
+
+
+@pytest.mark.parametrize(
+    "error",
+    [requests.ConnectionError("connection reset"), requests.Timeout("read timeout")],
+)
+def test_connection_errors_and_timeouts_are_retried(error):
+    url = f"https://{type(error).__name__.lower()}.example.com/"
+    client = FakeClient(error, 200)
+
+    assert governed_get(client, url).status_code == 200
+    assert client.calls == 2
+
+
+def test_throttling_and_server_errors_are_retried_up_to_the_last_attempt():
+    url = "https://server-error.example.com/"
+    client = FakeClient(429, 503)
+
+    assert governed_get(client, url).status_code == 503
+    assert client.calls == RETRY_ATTEMPTS
+    assert governor.for_url(url).consecutive_failures == RETRY_ATTEMPTS
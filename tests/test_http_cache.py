@@ -0,0 +1,87 @@
+import asyncio
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from manufacturers import get_plugin
+from shared import http_cache
+from shared.http_cache import HttpCache
+from shared.storage import MemoryStorage
+
+traco = get_plugin("traco")
+
+SERIES = pd.Series(
+    {
+        "product_series": "TES 1",
+        "series_url": "https://www.tracopower.com/series/tes-1",
+        "series_power_variants": "1 W",
+    }
+)
+SERIES_HTML = (
+    Path(__file__).parents[1] / "benchmarks/fixtures/traco/products.html"
+).read_text()
+
+
+class FakeResponse:
+    encoding = "utf-8"
+
+    def __init__(self, status_code, text=""):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.headers = {"ETag": '"tes-1"'} if text else {}
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def requests_sent(monkeypatch):
+    """Headers of every request to a server answering validators with 304"""
+    sent = []
+
+    def governed_get(session, url, headers=None, timeout=None):
+        sent.append(dict(headers or {}))
+        if headers and headers.get("If-None-Match") == '"tes-1"':
+            return FakeResponse(304)
+        return FakeResponse(200, SERIES_HTML)
+
+    monkeypatch.setattr(http_cache, "governed_get", governed_get)
+    return sent
+
+
+@pytest.fixture
+def cache(requests_sent):
+    """Cache holding the series page of an earlier run"""
+    cache = HttpCache(MemoryStorage())
+    cache.get(SERIES["series_url"])
+    cache.commit()
+    requests_sent.clear()
+    return cache
+
+
+def scrape(cache, previous_rows=None):
+    return asyncio.run(traco.scrape_series_page(SERIES, cache, previous_rows))
+
+
+def test_unchanged_series_page_keeps_the_previous_products(cache, requests_sent):
+    previous_rows = [{"series_name": "TES 1", "model": "kept"}]
+    assert scrape(cache, previous_rows) == previous_rows
+    assert requests_sent == [{"If-None-Match": '"tes-1"'}]
+
+
+def test_series_page_without_previous_products_is_fetched_in_full(cache, requests_sent):
+    # A 304 would leave nothing to keep, so no validators are sent
+    products = scrape(cache)
+    assert len(products) == 80
+    assert requests_sent == [{}]
+    assert SERIES["series_url"] in cache.pending
+
+
+def test_304_to_a_full_fetch_is_not_taken_as_a_page(monkeypatch):
+    monkeypatch.setattr(
+        http_cache, "governed_get", lambda *args, **kwargs: FakeResponse(304)
+    )
+    with pytest.raises(ValueError, match="304"):
+        HttpCache(MemoryStorage()).get(SERIES["series_url"], conditional=False)
@@ -0,0 +1,140 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from manufacturers.xppower import plugin as xppower
+from shared import fetcher, json_endpoints
+from shared.fetcher import FetchedPage
+from shared.json_endpoints import JsonEndpoints, use_endpoints
+from shared.storage import MemoryStorage
+
+SERIES_URL = xppower.series_urls["dc-dc-converters"]
+ENDPOINT_URL = "https://www.xppower.com/api/products?category=dc-dc-converters"
+SERIES_HTML = (
+    Path(__file__).parents[1] / "benchmarks/fixtures/xppower/series.html"
+).read_text()
+
+
+def endpoint_payload() -> dict:
+    """JSON the XP Power series table is built from, with its own key names"""
+    return {
+        "total": 160,
+        "data": {
+            "products": [
+                {
+                    "code": series["productCode"],
+                    "links": {"page": series["url"], "pdf": series["datasheet"]},
+                    "thumbnail": series["image"],
+                    "specs": {
+                        "power": series["power"],
+                        "phase": series["phase"],
+                        "voltage": series["voltage"],
+                        "current": series["current"],
+                    },
+                }
+                for series in xppower.parse_series(SERIES_HTML)
+            ]
+        },
+    }
+
+
+class FakeResponse:
+    """JSON response seen by a page while it renders"""
+
+    url = ENDPOINT_URL
+    headers = {"content-type": "application/json"}
+
+    class request:
+        method = "GET"
+        resource_type = "xhr"
+
+    async def json(self):
+        return endpoint_payload()
+
+
+class FakePage:
+    def on(self, event, handler):
+        handler(FakeResponse())
+
+
+@pytest.fixture
+def endpoints():
+    return JsonEndpoints(MemoryStorage())
+
+
+def scrape_series(endpoints):
+    async def scrape():
+        with use_endpoints(endpoints):
+            return await xppower.scrape_series(SERIES_URL)
+
+    return asyncio.run(scrape())
+
+
+def test_rendered_xppower_series_list_captures_its_endpoint(monkeypatch, endpoints):
+    async def browser_fallback(
+        url, selector, timeout, cache=None, capture=None, conditional=True
+    ):
+        # The plain HTTP response lacks the table, so the page is rendered
+        capture.attach(FakePage())
+        return FetchedPage(url, SERIES_HTML)
+
+    monkeypatch.setattr(fetcher, "fetch_page", browser_fallback)
+    series_list = scrape_series(endpoints)
+
+    entry = endpoints.load(SERIES_URL)
+    assert entry["endpoint_url"] == ENDPOINT_URL
+    assert entry["records_path"] == "data.products"
+    assert entry["fields"]["productCode"] == "code"
+    assert len(series_list) == 160
+
+
+def test_captured_xppower_endpoint_replaces_the_render(monkeypatch, endpoints):
+    async def browser_fallback(
+        url, selector, timeout, cache=None, capture=None, conditional=True
+    ):
+        capture.attach(FakePage())
+        return FetchedPage(url, SERIES_HTML)
+
+    monkeypatch.setattr(fetcher, "fetch_page", browser_fallback)
+    rendered = scrape_series(endpoints)
+
+    async def no_render(*args, **kwargs):
+        raise AssertionError("series list rendered despite its captured endpoint")
+
+    fetched = []
+
+    def fetch_json(url):
+        fetched.append(url)
+        return json.dumps(endpoint_payload())
+
+    monkeypatch.setattr(fetcher, "fetch_page", no_render)
+    monkeypatch.setattr(json_endpoints, "fetch_json", fetch_json)
+    assert scrape_series(endpoints) == rendered
+    assert fetched == [ENDPOINT_URL]
+
+
+def test_xppower_endpoint_failure_falls_back_to_the_page(monkeypatch, endpoints):
+    async def browser_fallback(
+        url, selector, timeout, cache=None, capture=None, conditional=True
+    ):
+        capture.attach(FakePage())
+        return FetchedPage(url, SERIES_HTML)
+
+    monkeypatch.setattr(fetcher, "fetch_page", browser_fallback)
+    rendered = scrape_series(endpoints)
+
+    def fetch_json(url):
+        raise ConnectionError("endpoint gone")
+
+    async def server_rendered(
+        url, selector, timeout, cache=None, capture=None, conditional=True
+    ):
+        return FetchedPage(url, SERIES_HTML)
+
+    monkeypatch.setattr(json_endpoints, "fetch_json", fetch_json)
+    monkeypatch.setattr(fetcher, "fetch_page", server_rendered)
+    assert scrape_series(endpoints) == rendered
+    # No JSON response matched the rows, so the broken endpoint is dropped
+    assert endpoints.load(SERIES_URL) is None
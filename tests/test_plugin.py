@@ -0,0 +1,68 @@
+import asyncio
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from manufacturers import get_plugin
+from manufacturers.plugin import ManufacturerPlugin
+from shared.checkpoints import CrawlCheckpoint
+from shared.storage import MemoryStorage
+
+SCRAPING_MODULES = [
+    "playwright",
+    "bs4",
+    "shared.browser_pool",
+    "shared.fetcher",
+    "shared.json_endpoints",
+    "shared.navigation",
+]
+
+
+def test_loading_a_plugin_leaves_the_scraping_stack_unloaded():
+    # Extraction activities load a plugin only for its document hook
+    script = (
+        "import sys\n"
+        "from manufacturers import get_plugin\n"
+        "get_plugin('traco').extract_document_data\n"
+        f"print([m for m in {SCRAPING_MODULES!r} if m in sys.modules])\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_plugin_missing_a_hook_fails_when_created():
+    class Incomplete(ManufacturerPlugin):
+        name = "incomplete"
+
+        def parse_series(self, html_content):
+            return []
+
+    with pytest.raises(TypeError, match="series_page_url"):
+        Incomplete()
+
+
+def test_failed_series_are_reported_and_left_out_of_the_checkpoint(monkeypatch):
+    traco = type(get_plugin("traco"))()
+    monkeypatch.setenv("SERIES_DELAY_SECONDS_TRACO", "0")
+
+    async def scrape_series_page(series, cache=None, previous_rows=None):
+        if series["product_series"] == "TES 2":
+            raise ConnectionError("series page unreachable")
+        return [{"series_name": series["product_series"]}]
+
+    monkeypatch.setattr(traco, "scrape_series_page", scrape_series_page)
+    series_df = pd.DataFrame(
+        {"product_series": ["TES 1", "TES 2", "TES 3"], "series_url": ["u"] * 3}
+    )
+    checkpoint = CrawlCheckpoint(MemoryStorage(), "traco", "dc-dc", "run", every=1)
+
+    products, failed_series = asyncio.run(
+        traco.scrape_products(series_df, checkpoint=checkpoint)
+    )
+    assert products == [{"series_name": "TES 1"}, {"series_name": "TES 3"}]
+    assert failed_series == ["TES 2"]
+    assert sorted(checkpoint.load()) == ["0", "2"]
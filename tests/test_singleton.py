@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from blueprints.triggers import build_orchestrator_input
+from shared.singleton import merge_orchestrator_inputs, pipeline_instance_id
+
+CONFIGS = [
+    {},
+    {"manufacturer": "traco"},
+    {"manufacturer": "traco", "force": False, "parallel": False},
+    {"manufacturers": ["traco"], "streaming": False, "shard_products": True},
+    {"manufacturer": "xppower", "product_types": ["ac-dc-power-supplies"]},
+    {"manufacturers": ["xppower", "traco", "xppower"], "parallel": True},
+    {"manufacturer": "recom", "shard_products": False, "product_shard_size": 10},
+]
+
+
+def http_instance_id(config: dict) -> str:
+    """Instance ID start_orchestrator starts or joins for a request body"""
+    return pipeline_instance_id(build_orchestrator_input(config))
+
+
+def queued_instance_id(configs: list) -> str:
+    """Instance ID start_queued_pipeline starts for a burst of blob uploads"""
+    merged = merge_orchestrator_inputs([build_orchestrator_input(c) for c in configs])
+    # The debouncer hands the merged run over through a queue message
+    return pipeline_instance_id(json.loads(json.dumps(merged)))
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_http_blob_and_queue_paths_share_the_instance_id(config):
+    assert queued_instance_id([config]) == http_instance_id(config)
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_repeated_uploads_share_the_instance_id(config):
+    assert queued_instance_id([config, config]) == http_instance_id(config)
+
+
+def test_defaults_are_left_out_of_the_instance_id():
+    assert http_instance_id({}) == http_instance_id(
+        {
+            "manufacturer": "recom",
+            "product_types": ["ac-dc-power-supplies", "dc-dc-converters"],
+            "force": False,
+            "queue_pdfs": False,
+            "max_concurrent_shards": 4,
+        }
+    )
+
+
+def test_options_that_change_the_run_change_the_instance_id():
+    base = http_instance_id({"manufacturer": "traco"})
+    assert http_instance_id({"manufacturer": "traco", "force": True}) != base
+    assert http_instance_id({"manufacturer": "traco", "shard_products": False}) != base
+    assert http_instance_id({"manufacturer": "recom"}) != base